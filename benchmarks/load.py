@@ -0,0 +1,96 @@
+"""Load test of the config API: Flask's development server against the production ASGI mode.
+
+Starts each server on a local port, sends concurrent POST /config/cluster/read requests for
+a set of cluster.ini files, and reports requests per second and p99 latency.
+The production mode needs uvicorn (pip install dst-gui[asgi]). It runs one worker process by default,
+the only setup SERVER_WORKERS supports, more workers are only useful to compare raw throughput.
+
+Run from the repository root:
+    python -m benchmarks.load [requests] [concurrency] [workers]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from os import path
+from timeit import default_timer
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+warnings.simplefilter("ignore")
+
+from org.combatwombat.dst.config.Cluster import Cluster
+from org.combatwombat.web.flask import settings
+
+SERVERS = {
+    "development": "from org.combatwombat.web.flask.server import app, initialize_app\n"
+                   "initialize_app(app)\n"
+                   "app.run(port={port})\n",
+    "production": "import uvicorn\n"
+                  "uvicorn.run('org.combatwombat.web.flask.asgi:application', port={port},"
+                  " workers={workers}, log_level='warning')\n",
+}
+
+
+def request(port, file):
+    connection = HTTPConnection("127.0.0.1", port, timeout=30)
+    start = default_timer()
+    connection.request("POST", "/config/cluster/read", json.dumps({"path": file}),
+                       {"Host": settings.FLASK_SERVER_NAME, "Content-Type": "application/json"})
+    response = connection.getresponse()
+    response.read()
+    elapsed = default_timer() - start
+    connection.close()
+    if response.status != 200:
+        raise RuntimeError("HTTP {}".format(response.status))
+    return elapsed
+
+
+def wait_until_up(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/", headers={"Host": settings.FLASK_SERVER_NAME})
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server on port {} did not start".format(port))
+
+
+def run(mode, port, files, requests, concurrency, workers):
+    server = subprocess.Popen([sys.executable, "-c", SERVERS[mode].format(port=port, workers=workers)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        start = default_timer()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = sorted(executor.map(lambda i: request(port, files[i % len(files)]), range(requests)))
+        elapsed = default_timer() - start
+    finally:
+        server.terminate()
+        server.wait()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print("{:<12} {:>8.0f} req/s   p99 {:>7.1f} ms".format(mode, requests / elapsed, p99 * 1000))
+
+
+def main(requests=2000, concurrency=32, workers=settings.SERVER_WORKERS):
+    directory = tempfile.mkdtemp()
+    try:
+        files = []
+        for i in range(100):
+            files.append(path.join(directory, "cluster_{}.ini".format(i)))
+            Cluster().write_ini(files[-1])
+        print("{} requests, {} concurrent clients, {} worker process(es)".format(requests, concurrency, workers))
+        run("development", 18881, files, requests, concurrency, workers)
+        run("production", 18882, files, requests, concurrency, workers)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
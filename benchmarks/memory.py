@@ -0,0 +1,35 @@
+"""Memory used per Cluster when holding a large fleet of parsed cluster configs.
+
+Clusters are loaded through the schemas from JSON, like configs read from disk or the API,
+so every string value is a fresh object rather than a shared literal.
+
+Run from the repository root:
+    python -m benchmarks.memory [clusters]
+"""
+import gc
+import json
+import sys
+import tracemalloc
+import warnings
+
+warnings.simplefilter("ignore")
+
+from org.combatwombat.dst.config.Cluster import cluster_schema, fast_cluster_schema
+from benchmarks.serialization import make_clusters
+
+
+def main(count=10000):
+    documents = [json.dumps(fast_cluster_schema.dump(cluster)) for cluster in make_clusters(count)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    clusters = [cluster_schema.load(json.loads(document)) for document in documents]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print("{} clusters: {:.0f} bytes per Cluster ({:.1f} MiB total)".format(
+        len(clusters), used / len(clusters), used / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
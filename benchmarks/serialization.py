@@ -0,0 +1,54 @@
+"""Throughput of config serialization: fresh schema per call vs. shared schema vs. FastSchema.
+
+Run from the repository root:
+    python -m benchmarks.serialization [clusters]
+"""
+import sys
+import warnings
+from timeit import default_timer
+
+warnings.simplefilter("ignore")
+
+from org.combatwombat.dst.config.Cluster import Cluster, ClusterSchema, cluster_schema, fast_cluster_schema
+from org.combatwombat.dst.config.cluster.Gameplay import Gameplay
+from org.combatwombat.dst.config.cluster.Misc import Misc
+from org.combatwombat.dst.config.cluster.Network import Network
+from org.combatwombat.dst.config.cluster.Shard import Shard
+from org.combatwombat.dst.config.cluster.Steam import Steam
+
+
+def make_clusters(count):
+    """Builds count clusters with varied, valid settings"""
+    return [Cluster(gameplay=Gameplay(max_players=6 + i % 58, pvp=i % 2 == 0,
+                                      game_mode=("survival", "endless", "wilderness")[i % 3]),
+                    misc=Misc(max_snapshots=i % 10),
+                    network=Network(cluster_name="Cluster %d" % i, cluster_description="Server number %d" % i,
+                                    tick_rate=(10, 15, 30, 60)[i % 4]),
+                    shard=Shard(shard_enabled=i % 2 == 1, master_port=10888 + i % 100, cluster_key="key%d" % i),
+                    steam=Steam(steam_group_id=i))
+            for i in range(count)]
+
+
+def measure(label, function, items):
+    start = default_timer()
+    results = [function(item) for item in items]
+    elapsed = default_timer() - start
+    print("{:<34} {:>10.0f} clusters/s".format(label, len(items) / elapsed))
+    return results
+
+
+def main(count=5000):
+    clusters = make_clusters(count)
+    print("{} clusters".format(count))
+
+    expected = measure("dump, new ClusterSchema per call", lambda c: ClusterSchema().dump(c), clusters)
+    measure("dump, shared cluster_schema", cluster_schema.dump, clusters)
+    fast = measure("dump, fast_cluster_schema", fast_cluster_schema.dump, clusters)
+    assert fast == expected, "fast dump differs from ClusterSchema.dump"
+
+    measure("load, new ClusterSchema per call", lambda d: ClusterSchema().load(d), expected)
+    measure("load, shared cluster_schema", cluster_schema.load, expected)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
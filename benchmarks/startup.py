@@ -0,0 +1,78 @@
+"""Cold start time of the backend: importing server.py and answering a first request, against the
+dst-gui CLI commands.
+
+Every case runs in a fresh interpreter, --repeat times, keeping the best and median wall time.
+The bare interpreter start up is measured too, so the time spent in this package can be read off.
+
+Run from the repository root:
+    python -m benchmarks.startup [--repeat 10]
+"""
+from os import path
+from statistics import median
+from timeit import default_timer
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+CLI = [sys.executable, "-W", "ignore", "-m", "org.combatwombat.cli", "config"]
+
+
+def cases(directory):
+    """Benchmark cases as (name, command)"""
+    cluster_ini = path.join(directory, "cluster.ini")
+    first_response = ("from org.combatwombat.web.flask.server import app; "
+                      "response = app.test_client().post('/config/cluster/read', json={{'path': {!r}}}); "
+                      "assert response.status_code == 200").format(cluster_ini)
+    return [
+        ("python start up", [sys.executable, "-c", "pass"]),
+        ("import server.py", [sys.executable, "-W", "ignore", "-c", "import org.combatwombat.web.flask.server"]),
+        ("server.py first read", [sys.executable, "-W", "ignore", "-c", first_response]),
+        ("cli config defaults", CLI + ["defaults", "cluster"]),
+        ("cli config read", CLI + ["read", "cluster", cluster_ini]),
+        ("cli config read --section", CLI + ["read", "cluster", cluster_ini, "--section", "gameplay"]),
+        ("cli config write --no-validate", CLI + ["write", "cluster", path.join(directory, "fresh.ini"),
+                                                  "--no-validate"]),
+        ("cli config write", CLI + ["write", "cluster", cluster_ini]),
+    ]
+
+
+def run(repeat):
+    """Run every case in fresh interpreters
+
+    Returns:
+        list: One result per case with the best and median seconds
+    """
+    directory = tempfile.mkdtemp(prefix="dst-startup-")
+    try:
+        subprocess.run(CLI + ["write", "cluster", path.join(directory, "cluster.ini"), "--no-validate"],
+                       cwd=ROOT, check=True, capture_output=True)
+        results = []
+        for name, command in cases(directory):
+            times = []
+            for _ in range(repeat):
+                start = default_timer()
+                subprocess.run(command, cwd=ROOT, check=True, capture_output=True)
+                times.append(default_timer() - start)
+            result = {"name": name, "best": min(times), "median": median(times)}
+            print("{:<32} {:>8.1f} ms best {:>8.1f} ms median".format(name, result["best"] * 1000,
+                                                                     result["median"] * 1000))
+            results.append(result)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark backend start up.")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per case, the best and median are kept")
+    args = parser.parse_args(argv)
+
+    run(args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
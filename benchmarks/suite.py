@@ -0,0 +1,185 @@
+"""Baseline benchmarks of the config hot paths, saved as JSON to compare across commits.
+
+Covers ClusterSchema load and dumps, ServerSchema round trips, Cluster.write_ini and
+Server.write_ini, and the ini read path behind /config/cluster/read and /config/server/read,
+each at 1, 1k and 100k configs by default. Every case runs --repeat times and keeps the best
+and median time. Results go to benchmarks/results/<commit>.json unless --output is given.
+
+Run from the repository root:
+    python -m benchmarks.suite [--sizes 1,1000,100000] [--repeat 3] [--only load] [--output file]
+    python -m benchmarks.suite --compare old.json new.json [--threshold 0.1]
+"""
+from os import makedirs, path
+from statistics import median
+from timeit import default_timer
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+warnings.simplefilter("ignore")
+
+from org.combatwombat.dst.config.Cache import config_cache
+from org.combatwombat.dst.config.Cluster import Cluster, cluster_schema
+from org.combatwombat.dst.config.Server import Server, server_schema
+from org.combatwombat.dst.config.server.Network import Network
+from org.combatwombat.dst.config.server.Shard import Shard
+from org.combatwombat.dst.config.server.Steam import Steam
+from org.combatwombat.web.flask.server import app
+from benchmarks.serialization import make_clusters
+
+RESULTS_DIR = path.join(path.dirname(path.abspath(__file__)), "results")
+
+
+def make_servers(count):
+    """Builds count servers with varied, valid settings"""
+    return [Server(network=Network(port=10998 + i % 21),
+                   shard=Shard(is_master=i % 2 == 0, name="Shard%d" % i, shard_id=None if i % 2 == 0 else i + 2),
+                   steam=Steam(authentication_port=8766 + i % 1000, master_server_port=27016 + i % 1000))
+            for i in range(count)]
+
+
+def cases(size, directory):
+    """Benchmark cases for one size, as (name, setup, function) where setup returns the items passed to function"""
+    clusters = make_clusters(size)
+    servers = make_servers(size)
+    cluster_documents = [cluster_schema.dumps(cluster) for cluster in clusters]
+    server_documents = [server_schema.dump(server) for server in servers]
+    cluster_files = [path.join(directory, "c%d" % i, "cluster.ini") for i in range(size)]
+    server_files = [path.join(directory, "c%d" % i, "Master", "server.ini") for i in range(size)]
+    client = app.test_client()
+
+    def written(files, configs):
+        def setup():
+            for file, config in zip(files, configs):
+                if not path.exists(file):
+                    makedirs(path.dirname(file), exist_ok=True)
+                    config.write_ini(file)
+            config_cache.invalidate()
+            return files
+        return setup
+
+    def fresh_files(files, configs):
+        def setup():
+            shutil.rmtree(directory, ignore_errors=True)
+            for file in files:
+                makedirs(path.dirname(file), exist_ok=True)
+            return list(zip(files, configs))
+        return setup
+
+    def route(url):
+        def post(file):
+            response = client.post(url, json={"path": file})
+            if response.status_code != 200:
+                raise RuntimeError("{} failed for {}: {}".format(url, file, response.data))
+        return post
+
+    return [
+        ("cluster_schema.loads", lambda: cluster_documents, cluster_schema.loads),
+        ("cluster_schema.dumps", lambda: clusters, cluster_schema.dumps),
+        ("server_schema.dump+load", lambda: servers, lambda server: server_schema.load(server_schema.dump(server))),
+        ("server_schema.load", lambda: server_documents, server_schema.load),
+        ("Cluster.write_ini", fresh_files(cluster_files, clusters), lambda entry: entry[1].write_ini(entry[0])),
+        ("Server.write_ini", fresh_files(server_files, servers), lambda entry: entry[1].write_ini(entry[0])),
+        ("Cluster.read_ini", written(cluster_files, clusters), Cluster.read_ini),
+        ("Server.read_ini", written(server_files, servers), Server.read_ini),
+        ("POST /config/cluster/read", written(cluster_files, clusters), route("/config/cluster/read")),
+        ("POST /config/server/read", written(server_files, servers), route("/config/server/read")),
+    ]
+
+
+def run(sizes, repeat, only=None):
+    """Run every case at every size
+
+    Returns:
+        list: One result per case and size with the best and median seconds and items per second
+    """
+    results = []
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix="dst-bench-")
+        try:
+            for name, setup, function in cases(size, directory):
+                if only and only not in name:
+                    continue
+                times = []
+                for _ in range(repeat):
+                    items = setup()
+                    start = default_timer()
+                    for item in items:
+                        function(item)
+                    times.append(default_timer() - start)
+                best = min(times)
+                result = {"name": name, "size": size, "best": best, "median": median(times),
+                          "per_second": size / best if best else None}
+                print("{:<28} {:>7} {:>12.0f}/s {:>10.1f} us each".format(
+                    name, size, result["per_second"] or 0, best / size * 1e6))
+                results.append(result)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=path.dirname(path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "platform": platform.platform(), "processor": platform.processor()}
+
+
+def compare(old_file, new_file, threshold=0.1):
+    """Print the change of every case found in both result files
+
+    Returns:
+        int: Number of cases slower than threshold (0.1 is 10%)
+    """
+    with open(old_file) as old, open(new_file) as new:
+        old, new = json.load(old), json.load(new)
+    baseline = {(result["name"], result["size"]): result for result in old["results"]}
+    regressions = 0
+    print("{} -> {}".format(old["environment"].get("commit"), new["environment"].get("commit")))
+    for result in new["results"]:
+        before = baseline.get((result["name"], result["size"]))
+        if before is None or not before["best"]:
+            continue
+        change = result["best"] / before["best"] - 1
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print("{:<28} {:>7} {:>+8.1%}{}".format(result["name"], result["size"], change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the config hot paths.")
+    parser.add_argument("--sizes", default="1,1000,100000", help="comma separated numbers of configs")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the best and median are kept")
+    parser.add_argument("--only", help="only run cases whose name contains this text")
+    parser.add_argument("--output", help="result file, benchmarks/results/<commit>.json by default")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+
+    report = {"environment": environment(), "results": run([int(size) for size in args.sizes.split(",")],
+                                                            args.repeat, args.only)}
+    output = args.output or path.join(RESULTS_DIR, "{}.json".format(report["environment"]["commit"] or "latest"))
+    makedirs(path.dirname(path.abspath(output)), exist_ok=True)
+    with open(output, "w") as out_file:
+        json.dump(report, out_file, indent=2)
+    print("saved {}".format(output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Command line interface for reading and writing cluster.ini and server.ini files.
+
+    dst-gui config defaults cluster|server [--section NAME]
+    dst-gui config read cluster|server PATH [--section NAME]
+    dst-gui config write cluster|server PATH [--config JSON | --config-file FILE] [--no-validate]
+
+Commands print the configuration as JSON, like the matching /config routes. The CLI is meant for
+short lived automation runs where start up dominates, so every command imports only what it needs
+when it runs. Flask is never imported, and printing the defaults or writing them with
+--no-validate uses the precomputed configurations in dst.config.defaults without importing
+marshmallow or the config classes.
+"""
+from configparser import Error as ConfigParserError
+import argparse
+import json
+import sys
+
+KINDS = ("cluster", "server")
+
+
+def defaults(kind, section=None):
+    """Default configuration of a kind, or of one of its sections, as JSON"""
+    from org.combatwombat.dst.config.defaults import DEFAULT_CLUSTER, DEFAULT_SERVER
+    config = DEFAULT_CLUSTER if kind == "cluster" else DEFAULT_SERVER
+    if section is not None:
+        if section not in config:
+            raise ValueError("Unknown section {}.".format(section))
+        config = config[section]
+    return json.dumps(config)
+
+
+def read(kind, file, section=None):
+    """Configuration read from a cluster.ini or server.ini, or one of its sections, as JSON
+
+    Raises:
+        ValueError: For an unknown section, or a file that can not be parsed or holds invalid values.
+    """
+    from marshmallow import ValidationError
+    if kind == "cluster":
+        from org.combatwombat.dst.config.Cluster import Cluster as Config, LazyCluster as LazyConfig
+    else:
+        from org.combatwombat.dst.config.Server import Server as Config, LazyServer as LazyConfig
+    if section is not None and section not in LazyConfig.SECTIONS:
+        raise ValueError("Unknown section {}.".format(section))
+    try:
+        if section is not None:
+            return getattr(LazyConfig.load(file), section).to_json()
+        return Config.read_ini(file).to_json()
+    except ValidationError as error:
+        raise ValueError("Invalid configuration in {}: {}".format(file, json.dumps(error.messages)))
+    except ConfigParserError as error:
+        raise ValueError("Can not parse {}: {}".format(file, error))
+
+
+def write(kind, file, config=None, validate=True):
+    """Write a configuration, the defaults when config is None, to a cluster.ini or server.ini
+
+    Args:
+        kind (str): cluster or server.
+        file (str): Path of the file to write.
+        config (dict): Configuration in the JSON form printed by read.
+        validate (bool): Check the cross-section and cross-file rules first, like VALIDATE_WRITES.
+
+    Returns:
+        tuple: Configuration written as JSON and whether the file changed
+
+    Raises:
+        ValueError: If the configuration is invalid or breaks a rule.
+    """
+    if config is None and not validate:
+        from org.combatwombat.dst.config import ini
+        from org.combatwombat.dst.config.defaults import DEFAULT_CLUSTER_INI, DEFAULT_SERVER_INI
+        from configparser import ConfigParser
+        parser = ConfigParser()
+        parser.read_string(DEFAULT_CLUSTER_INI if kind == "cluster" else DEFAULT_SERVER_INI)
+        return defaults(kind), ini.write_config(file, parser)
+
+    from marshmallow import ValidationError
+    if kind == "cluster":
+        from org.combatwombat.dst.config.Cluster import Cluster as Config, cluster_schema as schema
+    else:
+        from org.combatwombat.dst.config.Server import Server as Config, server_schema as schema
+    try:
+        configuration = schema.load(config) if config is not None else Config()
+    except ValidationError as error:
+        raise ValueError("Invalid configuration: {}".format(json.dumps(error.messages)))
+    if validate:
+        from org.combatwombat.dst.config import Fleet, Rules
+        problems = Rules.errors(Fleet.check_write(file, configuration))
+        if problems:
+            raise ValueError("configuration failed validation:\n {}".format(json.dumps(problems)))
+    return configuration.to_json(), configuration.write_ini(file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="dst-gui", description="Don't Starve Together server management.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    config_parser = commands.add_parser("config", help="read and write cluster.ini and server.ini files")
+    actions = config_parser.add_subparsers(dest="action", required=True)
+
+    defaults_parser = actions.add_parser("defaults", help="print the default configuration")
+    defaults_parser.add_argument("kind", choices=KINDS)
+    defaults_parser.add_argument("--section", help="only print this section")
+
+    read_parser = actions.add_parser("read", help="print the configuration of a file")
+    read_parser.add_argument("kind", choices=KINDS)
+    read_parser.add_argument("path", help="cluster.ini or server.ini to read")
+    read_parser.add_argument("--section", help="only read this section")
+
+    write_parser = actions.add_parser("write", help="write a configuration, the defaults unless one is given")
+    write_parser.add_argument("kind", choices=KINDS)
+    write_parser.add_argument("path", help="cluster.ini or server.ini to write")
+    source = write_parser.add_mutually_exclusive_group()
+    source.add_argument("--config", help="configuration as JSON")
+    source.add_argument("--config-file", help="file holding the configuration as JSON, - for stdin")
+    write_parser.add_argument("--no-validate", action="store_true",
+                              help="skip the cross-section and cross-file rules")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "defaults":
+            print(defaults(args.kind, args.section))
+        elif args.action == "read":
+            print(read(args.kind, args.path, args.section))
+        else:
+            config = None
+            if args.config is not None:
+                config = json.loads(args.config)
+            elif args.config_file == "-":
+                config = json.load(sys.stdin)
+            elif args.config_file is not None:
+                with open(args.config_file, 'r') as config_file:
+                    config = json.load(config_file)
+            text, written = write(args.kind, args.path, config, not args.no_validate)
+            print(text)
+            print("wrote {}".format(args.path) if written else "{} already up to date".format(args.path),
+                  file=sys.stderr)
+    except (OSError, ValueError, ConfigParserError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from os import path, stat
+from threading import Lock
+
+
+class ConfigCache:
+    """Cache of parsed configuration files.
+
+    Entries are keyed by absolute file path and loader, and are only reused while the file's
+    (mtime, size, inode) stamp is unchanged, so edits made outside of this process are picked up
+    on the next read. Cached objects are shared between callers and must be treated as read only.
+
+    Args:
+        maxsize (int):  Maximum number of parsed files to keep before evicting the least recently used.
+
+    Attributes:
+        maxsize (int):  Maximum number of parsed files to keep before evicting the least recently used.
+        hits (int): Number of reads answered from the cache.
+        misses (int):   Number of reads that had to parse the file.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, file, loader):
+        """Return the parsed configuration for a file, parsing it only if it changed on disk
+
+        Args:
+            file (str): Path of the configuration file
+            loader (callable): Function parsing the file path into a configuration object
+
+        Returns:
+            object: Configuration object returned by loader
+        """
+        file_stat = stat(file)
+        stamp = (file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino)
+        key = (path.abspath(file), loader)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader(file)
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, file=None):
+        """Drop cached entries for a file, or every entry when no file is given"""
+        with self._lock:
+            if file is None:
+                self._entries.clear()
+                return
+            file = path.abspath(file)
+            for key in [key for key in self._entries if key[0] == file]:
+                del self._entries[key]
+
+    def stats(self):
+        """Returns hit/miss counters and current size as a dict"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+config_cache = ConfigCache()
@@ -4,19 +4,27 @@ from org.combatwombat.dst.config.cluster.Network import Network, NetworkSchema
 from org.combatwombat.dst.config.cluster.Steam import Steam, SteamSchema
 from org.combatwombat.dst.config.cluster.Shard import Shard, ShardSchema
 from os import path
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Cache import config_cache
+from org.combatwombat.dst.config.FastSchema import FastSchema
 from configparser import ConfigParser
 from marshmallow import Schema, fields, post_load
 
 
+# Options each section class writes, those a configuration no longer sets are removed from the file
+MANAGED_OPTIONS = {"GAMEPLAY": Gameplay.__slots__, "MISC": Misc.__slots__, "NETWORK": Network.__slots__,
+                   "SHARD": Shard.__slots__, "STEAM": Steam.__slots__}
+
+
 class Cluster:
     """Cluster configuration class for Don't Starve Together.
 
     Args:
-        gameplay (Gameplay): Gameplay configuration section.
-        misc (Misc): Misc configuration section.
-        network (Network): Network configuration section.
-        shard (Shard): Shard configuration section.
-        steam (Steam): Steam configuration section.
+        gameplay (Gameplay): Gameplay configuration section, defaults when None.
+        misc (Misc): Misc configuration section, defaults when None.
+        network (Network): Network configuration section, defaults when None.
+        shard (Shard): Shard configuration section, defaults when None.
+        steam (Steam): Steam configuration section, defaults when None.
 
     Attributes:
         gameplay (Gameplay): Gameplay configuration section.
@@ -26,31 +34,122 @@ class Cluster:
         steam (Steam): Steam configuration section.
     """
 
-    def __init__(self, gameplay=Gameplay(), misc=Misc(), network=Network(), shard=Shard(), steam=Steam()):
-        self.gameplay = gameplay
-        self.misc = misc
-        self.network = network
-        self.shard = shard
-        self.steam = steam
+    __slots__ = ("gameplay", "misc", "network", "shard", "steam")
+
+    def __init__(self, gameplay=None, misc=None, network=None, shard=None, steam=None):
+        self.gameplay = gameplay if gameplay is not None else Gameplay()
+        self.misc = misc if misc is not None else Misc()
+        self.network = network if network is not None else Network()
+        self.shard = shard if shard is not None else Shard()
+        self.steam = steam if steam is not None else Steam()
 
     def write_ini(self, file):
         """Write configuration data to specified file path
 
+        Only changed keys are rewritten and the file is replaced atomically.
+
         Args:
             file (str): Path to write configuration file
+
+        Returns:
+            bool: True if the file was written, False if it already held this configuration
         """
         config = ConfigParser()
-        with open(file, 'w') as iniFile:
-            self.network.set_config(config)
-            self.shard.set_config(config)
-            self.steam.set_config(config)
-            self.gameplay.set_config(config)
-            self.misc.set_config(config)
-            config.write(iniFile)
+        self.network.set_config(config)
+        self.shard.set_config(config)
+        self.steam.set_config(config)
+        self.gameplay.set_config(config)
+        self.misc.set_config(config)
+        written = ini.write_config(file, config, MANAGED_OPTIONS)
+        if written:
+            ini.notify_written(file, self)
+        return written
+
+    @staticmethod
+    def read_ini(file):
+        """Read configuration data from specified file path
+
+        Args:
+            file (str): Path to read configuration file
+
+        Returns:
+            Cluster: Configuration read from the file
+        """
+        config = ConfigParser()
+        with open(file, 'r') as iniFile:
+            config.read_file(iniFile)
+        return Cluster.from_config(config)
+
+    @staticmethod
+    def from_config(config):
+        """Builds class from every section of a config object"""
+        return Cluster(gameplay=Gameplay.from_config(config),
+                       misc=Misc.from_config(config),
+                       network=Network.from_config(config),
+                       shard=Shard.from_config(config),
+                       steam=Steam.from_config(config))
+
+    @staticmethod
+    def load_ini(file):
+        """Read configuration data from specified file path, reusing the cached result while the file is unchanged
+
+        Args:
+            file (str): Path to read configuration file
+
+        Returns:
+            Cluster: Shared configuration read from the file, which must not be modified
+        """
+        return config_cache.get(file, Cluster.read_ini)
 
     def to_json(self):
         """Turns configuration class into JSON"""
-        return ClusterSchema().dumps(self)
+        return cluster_schema.dumps(self)
+
+
+class LazyCluster(Cluster):
+    """Cluster configuration read from a cluster.ini, materializing each section on first access.
+
+    The file is read once when the object is created, but a section is only validated and built
+    when it is first used, so reading one field does not pay for all five sections.
+
+    Args:
+        file (str): Path of the cluster.ini to read.
+
+    Attributes:
+        file (str): Path of the cluster.ini the sections are read from.
+    """
+
+    __slots__ = ("file", "_config")
+
+    SECTIONS = {"gameplay": Gameplay, "misc": Misc, "network": Network, "shard": Shard, "steam": Steam}
+
+    def __init__(self, file):
+        self.file = file
+        self._config = ConfigParser()
+        with open(file, 'r') as iniFile:
+            self._config.read_file(iniFile)
+
+    def __getattr__(self, name):
+        section_class = LazyCluster.SECTIONS.get(name)
+        if section_class is None:
+            raise AttributeError(name)
+        section = section_class.from_config(self._config)
+        setattr(self, name, section)
+        return section
+
+    @staticmethod
+    def load(file):
+        """Lazily read configuration data from specified file path
+
+        The cached result is reused while the file is unchanged.
+
+        Args:
+            file (str): Path to read configuration file
+
+        Returns:
+            LazyCluster: Shared configuration read from the file, which must not be modified
+        """
+        return config_cache.get(file, LazyCluster)
 
 
 class ClusterSchema(Schema):
@@ -63,3 +162,7 @@ class ClusterSchema(Schema):
     @post_load
     def make_cluster(self, data, **kwargs):
         return Cluster(**data)
+
+
+cluster_schema = ClusterSchema()
+fast_cluster_schema = FastSchema(cluster_schema)
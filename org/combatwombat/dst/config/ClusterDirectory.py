@@ -0,0 +1,90 @@
+from org.combatwombat.dst.config.Cluster import Cluster, ClusterSchema
+from org.combatwombat.dst.config.Server import Server, ServerSchema
+from org.combatwombat.dst.config.FastSchema import FastSchema
+from os import path, makedirs, scandir
+from marshmallow import Schema, fields, post_load, validate
+
+CLUSTER_INI = "cluster.ini"
+SERVER_INI = "server.ini"
+
+
+class ClusterDirectory:
+    """Cluster directory for Don't Starve Together.
+
+    A cluster directory holds a cluster.ini plus one sub directory per shard (e.g. Master, Caves),
+    each of which holds that shard's server.ini.
+
+    Args:
+        cluster (Cluster): Cluster configuration from cluster.ini.
+        servers (dict): Server configurations keyed by shard directory name.
+
+    Attributes:
+        cluster (Cluster): Cluster configuration from cluster.ini.
+        servers (dict): Server configurations keyed by shard directory name.
+    """
+
+    def __init__(self, cluster=None, servers=None):
+        self.cluster = cluster if cluster is not None else Cluster()
+        self.servers = servers if servers is not None else {}
+
+    @staticmethod
+    def read(directory):
+        """Read cluster.ini and every shard's server.ini from a cluster directory
+
+        Args:
+            directory (str): Path of the cluster directory
+
+        Returns:
+            ClusterDirectory: Configuration read from the directory.
+                The Cluster and Server objects are shared with the config cache and must not be modified.
+        """
+        cluster = Cluster.load_ini(path.join(directory, CLUSTER_INI))
+        return ClusterDirectory(cluster=cluster, servers=ClusterDirectory.read_servers(directory))
+
+    @staticmethod
+    def read_servers(directory, exclude=()):
+        """Read every shard's server.ini from a cluster directory
+
+        Args:
+            directory (str): Path of the cluster directory
+            exclude (iterable): Shard directory names not to read
+
+        Returns:
+            dict: Server configurations keyed by shard directory name, shared with the config cache
+        """
+        servers = {}
+        with scandir(directory) as entries:
+            for entry in entries:
+                server_ini = path.join(entry.path, SERVER_INI)
+                if entry.is_dir() and entry.name not in exclude and path.isfile(server_ini):
+                    servers[entry.name] = Server.load_ini(server_ini)
+        return servers
+
+    def write(self, directory):
+        """Write cluster.ini and every shard's server.ini to a cluster directory
+
+        Args:
+            directory (str): Path of the cluster directory
+        """
+        makedirs(directory, exist_ok=True)
+        self.cluster.write_ini(path.join(directory, CLUSTER_INI))
+        for name, server in self.servers.items():
+            makedirs(path.join(directory, name), exist_ok=True)
+            server.write_ini(path.join(directory, name, SERVER_INI))
+
+    def to_json(self):
+        """Turns configuration class into JSON"""
+        return cluster_directory_schema.dumps(self)
+
+
+class ClusterDirectorySchema(Schema):
+    cluster = fields.Nested(ClusterSchema)
+    servers = fields.Dict(keys=fields.String(validate=validate.Regexp(r"^[\w\- ]+$")), values=fields.Nested(ServerSchema))
+
+    @post_load
+    def make_cluster_directory(self, data, **kwargs):
+        return ClusterDirectory(**data)
+
+
+cluster_directory_schema = ClusterDirectorySchema()
+fast_cluster_directory_schema = FastSchema(cluster_directory_schema)
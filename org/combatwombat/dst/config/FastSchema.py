@@ -0,0 +1,62 @@
+from marshmallow import fields, missing
+
+
+class FastSchema:
+    """Fast dump for a marshmallow schema.
+
+    A dump function is generated from the schema's declared fields, converting the plain Integer,
+    Boolean and String values used by the config sections directly and handing anything else to
+    the field's own serialization. Nested schemas, including Dict values, get their own FastSchema.
+    Loading is left to the schema itself, so it only relies on marshmallow's public API.
+
+    Args:
+        schema (Schema): Schema instance to speed up.
+
+    Attributes:
+        schema (Schema): Schema instance used for loading.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._fields = [(field.data_key or name, field.attribute or name, field)
+                        for name, field in schema.fields.items()]
+        self._nested = {key: FastSchema(field.schema) for key, _, field in self._fields
+                        if isinstance(field, fields.Nested)}
+        self._nested_values = {key: FastSchema(field.value_field.schema) for key, _, field in self._fields
+                               if isinstance(field, fields.Dict) and isinstance(field.value_field, fields.Nested)}
+        self.dump = self._compile_dump()
+
+    def dumps(self, obj):
+        """Serialize an object to a JSON string"""
+        return self.schema.opts.render_module.dumps(self.dump(obj))
+
+    def load(self, data):
+        """Deserialize a dict to an object, same as schema.load"""
+        return self.schema.load(data)
+
+    def _compile_dump(self):
+        lines = ["def dump(obj):", "    out = {}"]
+        namespace = {"missing": missing}
+        for index, (key, attribute, field) in enumerate(self._fields):
+            namespace["field_%d" % index] = field
+            fallback = "field_%d.serialize(%r, obj)" % (index, attribute)
+            if isinstance(field, fields.Nested):
+                namespace["nested_%d" % index] = self._nested[key].dump
+                converted = "None if value is None else nested_%d(value)" % index
+            elif key in self._nested_values:
+                namespace["nested_%d" % index] = self._nested_values[key].dump
+                converted = "None if value is None else {str(k): nested_%d(v) for k, v in value.items()}" % index
+            elif isinstance(field, fields.Boolean):
+                converted = "value if value is True or value is False else %s" % fallback
+            elif isinstance(field, fields.Integer):
+                converted = "value if type(value) is int else %s" % fallback
+            elif isinstance(field, fields.String):
+                converted = "value if type(value) is str else %s" % fallback
+            else:
+                converted = fallback
+            lines.append("    value = getattr(obj, %r, missing)" % attribute)
+            lines.append("    if value is not missing:")
+            lines.append("        out[%r] = %s" % (key, converted))
+        lines.append("    return out")
+        exec("\n".join(lines), namespace)
+        return namespace["dump"]
@@ -0,0 +1,217 @@
+from org.combatwombat.dst.config import Rules
+from org.combatwombat.dst.config.Cluster import Cluster, LazyCluster, cluster_schema
+from org.combatwombat.dst.config.ClusterDirectory import ClusterDirectory, fast_cluster_directory_schema, CLUSTER_INI
+from concurrent.futures import ThreadPoolExecutor
+from configparser import Error as ConfigParserError
+from glob import glob
+from os import path
+import json
+from marshmallow import ValidationError
+
+BATCH_ERRORS = (OSError, ConfigParserError, ValidationError, ValueError)
+
+
+def find_cluster_dirs(paths=None, pattern=None):
+    """Collect cluster directories from explicit paths and/or a glob pattern
+
+    Args:
+        paths (list): Cluster directory paths.
+        pattern (str): Glob pattern matching cluster directories.
+
+    Returns:
+        list: Cluster directory paths in request order, without duplicates.
+            Glob matches are only kept if they contain a cluster.ini.
+    """
+    found = list(paths or [])
+    if pattern:
+        found.extend(match for match in sorted(glob(pattern)) if path.isfile(path.join(match, CLUSTER_INI)))
+    return list(dict.fromkeys(found))
+
+
+def read_clusters(directories, max_workers=8, section=None):
+    """Read many cluster directories concurrently
+
+    Args:
+        directories (list): Cluster directory paths.
+        max_workers (int): Number of threads used for file I/O.
+        section (str): When given, only read this section of each cluster.ini, skipping the server.ini files.
+
+    Returns:
+        list: One result per directory in input order.
+            Each result holds the directory "path" and either its "config" or an "error" message.
+    """
+    if section is not None and section not in LazyCluster.SECTIONS:
+        raise ValueError("Unknown section {}.".format(section))
+
+    def read_one(directory):
+        try:
+            if section is not None:
+                cluster = LazyCluster.load(path.join(directory, CLUSTER_INI))
+                return {"path": directory, "config": cluster_schema.fields[section].schema.dump(getattr(cluster, section))}
+            return {"path": directory, "config": fast_cluster_directory_schema.dump(ClusterDirectory.read(directory))}
+        except BATCH_ERRORS as error:
+            return {"path": directory, "error": _describe(error)}
+
+    return _run_batch(read_one, directories, max_workers)
+
+
+def write_clusters(entries, max_workers=8, validate=True):
+    """Validate and write many cluster directories concurrently
+
+    Args:
+        entries (list): Dicts holding a cluster directory "path" and its "config" as accepted by
+            ClusterDirectorySchema. A missing config writes the default configuration.
+        max_workers (int): Number of threads used for file I/O.
+        validate (bool): Check the validation rules before writing, otherwise only the schema is checked.
+
+    Returns:
+        list: One result per entry in input order.
+            Each result holds the directory "path" and either "written": True or an "error" message.
+            Entries failing a validation rule are not written and report the failed rules as their error.
+    """
+    def write_one(entry):
+        directory = entry.get("path")
+        try:
+            if not directory:
+                raise ValueError("No path specified.")
+            if "config" in entry:
+                cluster_directory = fast_cluster_directory_schema.load(entry["config"])
+            else:
+                cluster_directory = ClusterDirectory()
+            problems = Rules.errors(Rules.check_cluster(directory, cluster_directory)) if validate else []
+            if problems:
+                return {"path": directory, "error": problems}
+            cluster_directory.write(directory)
+            return {"path": directory, "written": True}
+        except BATCH_ERRORS as error:
+            return {"path": directory, "error": _describe(error)}
+
+    return _run_batch(write_one, entries, max_workers)
+
+
+def validate_clusters(directories, max_workers=8):
+    """Read many cluster directories concurrently and check every validation rule across them
+
+    Args:
+        directories (list): Cluster directory paths.
+        max_workers (int): Number of threads used for file I/O.
+
+    Returns:
+        list: Diagnostics as returned by Rules.check_fleet. Directories that can not be read are
+            reported with the rule "read".
+    """
+    def read_one(directory):
+        try:
+            return directory, ClusterDirectory.read(directory), None
+        except BATCH_ERRORS as error:
+            return directory, None, _describe(error)
+
+    results = _run_batch(read_one, directories, max_workers)
+    diagnostics = [{"path": directory, "rule": "read", "severity": Rules.ERROR, "message": error}
+                   for directory, _, error in results if error is not None]
+    return diagnostics + Rules.check_fleet((directory, cluster_directory)
+                                           for directory, cluster_directory, error in results if error is None)
+
+
+def check_write(file, config):
+    """Check the validation rules for writing a Cluster or Server to a file, together with the rest of its
+    cluster directory on disk
+
+    Args:
+        file (str): Path of the cluster.ini or a shard's server.ini about to be written
+        config (Cluster or Server): Configuration about to be written
+
+    Returns:
+        list: Diagnostics as returned by Rules.check_cluster, empty if the cluster is unknown.
+            Other files of the cluster directory that can not be read are reported with the rule "read".
+    """
+    directory = path.dirname(path.abspath(file))
+    try:
+        if isinstance(config, Cluster):
+            servers = ClusterDirectory.read_servers(directory) if path.isdir(directory) else {}
+            return Rules.check_cluster(directory, ClusterDirectory(cluster=config, servers=servers))
+        shard = path.basename(directory)
+        directory = path.dirname(directory)
+        if not path.isfile(path.join(directory, CLUSTER_INI)):
+            return []
+        servers = ClusterDirectory.read_servers(directory, exclude=(shard,))
+        servers[shard] = config
+        cluster = Cluster.load_ini(path.join(directory, CLUSTER_INI))
+        return Rules.check_cluster(directory, ClusterDirectory(cluster=cluster, servers=servers))
+    except BATCH_ERRORS as error:
+        return [{"path": directory, "rule": "read", "severity": Rules.ERROR, "message": _describe(error)}]
+
+
+def export_clusters(root, directories):
+    """Stream cluster directories as newline delimited JSON, one directory at a time
+
+    Args:
+        root (str): Directory the exported names are relative to.
+        directories (list): Cluster directory paths.
+
+    Yields:
+        str: One JSON line per directory holding its "name" relative to root and either its "config"
+            or an "error" message.
+    """
+    for directory in directories:
+        name = path.relpath(directory, root)
+        try:
+            line = {"name": name, "config": fast_cluster_directory_schema.dump(ClusterDirectory.read(directory))}
+        except BATCH_ERRORS as error:
+            line = {"name": name, "error": _describe(error)}
+        yield json.dumps(line) + "\n"
+
+
+def import_clusters(root, lines, validate=True):
+    """Validate and write cluster directories from newline delimited JSON as it is read
+
+    Lines are handled one at a time, so the whole import never has to be held in memory.
+
+    Args:
+        root (str): Directory the imported names are written below.
+        lines (iterable): JSON lines as produced by export_clusters, as str or bytes.
+            Lines carrying an "error" instead of a "config" are skipped.
+        validate (bool): Check the validation rules before writing, otherwise only the schema is checked.
+            Clusters failing a rule are not written and report the failed rules as their error.
+
+    Returns:
+        dict: Number of "imported" directories and a list of "errors" with the line number and message
+    """
+    imported = 0
+    errors = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            if not isinstance(entry, dict):
+                raise ValueError("Expected a JSON object.")
+            if "error" in entry and "config" not in entry:
+                continue
+            name = entry.get("name", "")
+            if not isinstance(name, str) or path.basename(name) != name or name in ("", ".", ".."):
+                raise ValueError("Invalid cluster name {!r}.".format(name))
+            directory = path.join(root, name)
+            cluster_directory = fast_cluster_directory_schema.load(entry.get("config", {}))
+            problems = Rules.errors(Rules.check_cluster(directory, cluster_directory)) if validate else []
+            if problems:
+                errors.append({"line": number, "error": problems})
+                continue
+            cluster_directory.write(directory)
+            imported += 1
+        except BATCH_ERRORS as error:
+            errors.append({"line": number, "error": _describe(error)})
+    return {"imported": imported, "errors": errors}
+
+
+def _run_batch(function, items, max_workers):
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(function, items))
+
+
+def _describe(error):
+    if isinstance(error, ValidationError):
+        return error.messages
+    return str(error)
@@ -0,0 +1,257 @@
+"""Version history of the configuration files written by this package.
+
+Every Cluster.write_ini and Server.write_ini that changes a file is recorded through an ini write
+listener. A before write listener first stores the contents being replaced if they are not the
+newest recorded version, so a file's original or hand edited contents can be restored too. Contents
+are stored once as a blob named after their SHA-256 hash, so a configuration shared by many
+clusters, or a file rolled back to an earlier state, takes no extra space. Each file has an
+append-only log of its versions pointing at those blobs; rolling back looks up one log entry, reads
+one blob and writes it as the newest version.
+
+Several processes, such as the server and the CLI, may record into the same store. A version is
+appended while holding an flock on the file's log, after re-reading the entries other processes
+appended since. Without fcntl, as on Windows, only the threads of one process are coordinated.
+
+The store lives below its root directory:
+
+    objects/<first two hash characters>/<rest of the hash>
+    logs/<hash of the file path>.jsonl
+"""
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Cluster import Cluster
+from org.combatwombat.dst.config.Server import Server
+from org.combatwombat.dst.config.ClusterDirectory import CLUSTER_INI, SERVER_INI
+from configparser import ConfigParser
+from contextlib import contextmanager
+from difflib import unified_diff
+from hashlib import sha256
+from os import makedirs, path, scandir, stat
+from threading import RLock
+import json
+import time
+
+try:
+    import fcntl
+except ImportError:  # fcntl is POSIX only, fall back to coordinating the threads of this process
+    fcntl = None
+
+
+class ConfigHistory:
+    """Content addressed, deduplicated store of every version of each configuration file.
+
+    Args:
+        root (str): Directory holding the store.
+
+    Attributes:
+        root (str): Directory holding the store.
+        errors (dict): Files whose last write could not be recorded, with their error message.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.errors = {}
+        self._logs = {}
+        self._lock = RLock()
+
+    def record(self, file, config=None):
+        """Store a file's current contents as its newest version, does nothing if they did not change
+
+        Matches the ini write listener signature, so it can be registered with ini.add_write_listener.
+
+        Args:
+            file (str): Path of the configuration file.
+            config (Cluster or Server): Object written to the file, unused.
+
+        Returns:
+            dict: The newest version, or None if the file could not be read
+        """
+        try:
+            with open(file, 'r') as config_file:
+                text = config_file.read()
+        except OSError as error:
+            self.errors[path.abspath(file)] = str(error)
+            return None
+        return self.snapshot(file, text)
+
+    def snapshot(self, file, text):
+        """Store contents of a file as its newest version, does nothing if they are the newest version already
+
+        Matches the ini before write listener signature, so registered with ini.add_before_write_listener
+        it keeps the contents a write is about to replace, including edits made by hand since the last write.
+
+        Args:
+            file (str): Path of the configuration file.
+            text (str): Contents of the file.
+
+        Returns:
+            dict: The newest version, or None if it could not be stored
+        """
+        file = path.abspath(file)
+        with self._lock:
+            try:
+                digest = self._store(text)
+                with self._log_lock(file) as log_file:
+                    versions = self._log(file)
+                    if versions and versions[-1]["hash"] == digest:
+                        return versions[-1]
+                    entry = {"version": len(versions) + 1, "hash": digest, "time": time.time()}
+                    log_file.write(json.dumps(dict(entry, path=file)) + "\n")
+                    log_file.flush()
+                    versions.append(entry)
+                    self._logs[file] = (log_file.tell(), versions)
+                self.errors.pop(file, None)
+                return entry
+            except OSError as error:
+                self.errors[file] = str(error)
+                return None
+
+    def versions(self, file):
+        """Recorded versions of a file, oldest first, each holding its "version" number, content "hash" and "time"."""
+        with self._lock:
+            return [dict(entry) for entry in self._log(path.abspath(file))]
+
+    def read(self, file, version):
+        """Contents of a file at a version
+
+        Raises:
+            ValueError: If the file has no such version.
+        """
+        with self._lock:
+            entry = self._entry(path.abspath(file), version)
+            with open(self._object_file(entry["hash"]), 'r') as blob:
+                return blob.read()
+
+    def diff(self, file, old, new):
+        """Unified diff between two versions of a file
+
+        Raises:
+            ValueError: If the file is missing either version.
+        """
+        return "".join(unified_diff(self.read(file, old).splitlines(True), self.read(file, new).splitlines(True),
+                                    "{}@{}".format(path.basename(file), old),
+                                    "{}@{}".format(path.basename(file), new)))
+
+    def load(self, file, version):
+        """Configuration object of a cluster.ini or server.ini version, for checks before a rollback
+
+        Returns:
+            Cluster or Server: Configuration of the version, None for other files
+
+        Raises:
+            ValueError: If the file has no such version.
+            configparser.Error: If the version is not a valid ini file.
+            ValidationError: If the version holds invalid settings.
+        """
+        return self._parse(file, self.read(file, version))
+
+    def rollback(self, file, version):
+        """Restore a file to an earlier version, recorded as its newest version
+
+        The version is parsed before anything is written, and the contents it replaces are stored
+        first unless they are already the newest version. Write listeners are notified with the
+        restored configuration, so indexes following writes see the rollback as well.
+
+        Returns:
+            dict: The newest version
+
+        Raises:
+            ValueError: If the file has no such version.
+            configparser.Error: If a cluster.ini or server.ini version is not a valid ini file.
+            ValidationError: If a cluster.ini or server.ini version holds invalid settings.
+        """
+        with self._lock:
+            text = self.read(file, version)
+            config = self._parse(file, text)
+            try:
+                with open(file, 'r') as config_file:
+                    self.snapshot(file, config_file.read())
+            except FileNotFoundError:
+                pass
+            ini.atomic_write(file, text)
+            if config is not None:
+                ini.notify_written(file, config)
+            return self.record(file)
+
+    def stats(self):
+        """Returns the number of files, versions and distinct blobs in the store and the blobs' size in bytes"""
+        with self._lock:
+            blobs = 0
+            size = 0
+            objects = path.join(self.root, "objects")
+            if path.isdir(objects):
+                for prefix in scandir(objects):
+                    for blob in scandir(prefix.path):
+                        blobs += 1
+                        size += blob.stat().st_size
+            logs = path.join(self.root, "logs")
+            files = [entry.path for entry in scandir(logs)] if path.isdir(logs) else []
+            versions = 0
+            for log_file in files:
+                with open(log_file, 'r') as lines:
+                    versions += sum(1 for line in lines if line.strip())
+            return {"files": len(files), "versions": versions, "blobs": blobs, "bytes": size}
+
+    def _store(self, text):
+        digest = sha256(text.encode("utf-8")).hexdigest()
+        object_file = self._object_file(digest)
+        if not path.exists(object_file):
+            makedirs(path.dirname(object_file), exist_ok=True)
+            ini.atomic_write(object_file, text)
+        return digest
+
+    @staticmethod
+    def _parse(file, text):
+        config_class = {CLUSTER_INI: Cluster, SERVER_INI: Server}.get(path.basename(file))
+        if config_class is None:
+            return None
+        parser = ConfigParser()
+        parser.read_string(text, file)
+        return config_class.from_config(parser)
+
+    @contextmanager
+    def _log_lock(self, file):
+        """Open a file's log for appending, holding an exclusive flock on it"""
+        makedirs(path.join(self.root, "logs"), exist_ok=True)
+        with open(self._log_file(file), 'a') as log_file:
+            if fcntl is None:
+                yield log_file
+                return
+            fcntl.flock(log_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield log_file
+            finally:
+                fcntl.flock(log_file.fileno(), fcntl.LOCK_UN)
+
+    def _log(self, file):
+        """Versions of a file, re-read when another process appended to its log"""
+        log_file = self._log_file(file)
+        try:
+            size = stat(log_file).st_size
+        except FileNotFoundError:
+            size = 0
+        cached = self._logs.get(file)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        versions = []
+        try:
+            with open(log_file, 'r') as lines:
+                for line in lines:
+                    if line.strip():
+                        entry = json.loads(line)
+                        versions.append({key: entry[key] for key in ("version", "hash", "time")})
+        except FileNotFoundError:
+            pass
+        self._logs[file] = (size, versions)
+        return versions
+
+    def _entry(self, file, version):
+        versions = self._log(file)
+        if not isinstance(version, int) or not 1 <= version <= len(versions):
+            raise ValueError("{} has no version {}.".format(file, version))
+        return versions[version - 1]
+
+    def _object_file(self, digest):
+        return path.join(self.root, "objects", digest[:2], digest[2:])
+
+    def _log_file(self, file):
+        return path.join(self.root, "logs", sha256(file.encode("utf-8")).hexdigest() + ".jsonl")
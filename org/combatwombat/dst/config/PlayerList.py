@@ -0,0 +1,182 @@
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Cache import config_cache
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from threading import Lock
+import re
+
+WHITELIST = "whitelist.txt"
+ADMINLIST = "adminlist.txt"
+BLOCKLIST = "blocklist.txt"
+PLAYER_LISTS = {"whitelist": WHITELIST, "adminlist": ADMINLIST, "blocklist": BLOCKLIST}
+
+_PLAYER_ID = re.compile(r"^KU_[A-Za-z0-9_-]+$")
+
+_file_locks = {}
+_file_locks_lock = Lock()
+
+
+class PlayerList:
+    """Klei user ids of a whitelist.txt, adminlist.txt or blocklist.txt in a cluster directory.
+
+    The ids are kept in an insertion ordered dict used as a set, so membership checks, adds and
+    removes take constant time however many ids a list holds, and the file keeps its order when
+    written back.
+
+    Args:
+        ids (iterable): Klei user ids, such as KU_ab12CD34.
+
+    Attributes:
+        ids (dict): Klei user ids as keys, in file order.
+    """
+    __slots__ = ("ids",)
+
+    def __init__(self, ids=()):
+        self.ids = dict.fromkeys(ids)
+
+    def __contains__(self, player_id):
+        return player_id in self.ids
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids):
+        """Add ids not in the list yet
+
+        Returns:
+            int: Number of ids added
+
+        Raises:
+            ValueError: If an id is not a Klei user id, in which case nothing is added.
+        """
+        ids = [player_id for player_id in dict.fromkeys(ids) if player_id not in self.ids]
+        for player_id in ids:
+            check_player_id(player_id)
+        self.ids.update(dict.fromkeys(ids))
+        return len(ids)
+
+    def remove(self, ids):
+        """Remove ids in the list
+
+        Returns:
+            int: Number of ids removed
+        """
+        removed = 0
+        for player_id in ids:
+            if player_id in self.ids:
+                del self.ids[player_id]
+                removed += 1
+        return removed
+
+    def to_text(self):
+        """Turns the list into the file's text, one id per line"""
+        return "".join(player_id + "\n" for player_id in self.ids)
+
+    @staticmethod
+    def from_text(text):
+        """Builds the list from a file's text, ignoring blank lines and surrounding whitespace"""
+        return PlayerList(line.strip() for line in text.splitlines() if line.strip())
+
+    def write_file(self, file):
+        """Write the list to specified file path
+
+        The file is replaced atomically, so the game never reads a half written list.
+
+        Args:
+            file (str): Path to write the list file
+        """
+        ini.atomic_write(file, self.to_text())
+        ini.notify_written(file, self)
+
+    @staticmethod
+    def read_file(file):
+        """Read the list from specified file path, a missing file is an empty list
+
+        Args:
+            file (str): Path to read the list file
+
+        Returns:
+            PlayerList: List read from the file
+        """
+        try:
+            with open(file, 'r') as list_file:
+                return PlayerList.from_text(list_file.read())
+        except FileNotFoundError:
+            return PlayerList()
+
+    @staticmethod
+    def load(file):
+        """Read the list from specified file path, reusing the cached result while the file is unchanged
+
+        Args:
+            file (str): Path to read the list file
+
+        Returns:
+            PlayerList: Shared list read from the file, which must not be modified, empty if the file is missing
+        """
+        if not path.isfile(file):
+            return PlayerList()
+        return config_cache.get(file, PlayerList.read_file)
+
+
+def check_player_id(player_id):
+    """Raises ValueError if player_id is not a Klei user id such as KU_ab12CD34"""
+    if not isinstance(player_id, str) or not _PLAYER_ID.match(player_id):
+        raise ValueError("Invalid Klei user id {!r}.".format(player_id))
+
+
+def _file_lock(file):
+    """Returns the lock serializing updates of one list file"""
+    with _file_locks_lock:
+        return _file_locks.setdefault(path.abspath(file), Lock())
+
+
+def update_player_lists(directories, kind, add=(), remove=(), max_workers=8):
+    """Add and remove ids in the same player list of many cluster directories concurrently
+
+    An id given in both add and remove is removed. A list is only written if it changed. Updates of
+    the same file hold its lock from reading to writing, so concurrent requests do not lose ids.
+
+    Args:
+        directories (list): Cluster directory paths.
+        kind (str): whitelist, adminlist or blocklist.
+        add (list): Klei user ids to add.
+        remove (list): Klei user ids to remove.
+        max_workers (int): Number of threads used for file I/O.
+
+    Returns:
+        list: One result per directory in input order, holding the directory "path" and the number
+            of ids "added" and "removed" and the list's new "size", or an "error" message
+
+    Raises:
+        ValueError: For an unknown kind or an id that is not a Klei user id.
+    """
+    if kind not in PLAYER_LISTS:
+        raise ValueError("Unknown player list {}.".format(kind))
+    remove = set(remove)
+    add = [player_id for player_id in dict.fromkeys(add) if player_id not in remove]
+    for player_id in add:
+        check_player_id(player_id)
+
+    def update_one(directory):
+        file = path.join(directory, PLAYER_LISTS[kind])
+        try:
+            if not path.isdir(directory):
+                raise ValueError("Unknown cluster directory {}.".format(directory))
+            with _file_lock(file):
+                players = PlayerList(PlayerList.load(file))
+                added = players.add(add)
+                removed = players.remove(remove)
+                if added or removed:
+                    players.write_file(file)
+            return {"path": directory, "added": added, "removed": removed, "size": len(players)}
+        except (OSError, ValueError) as error:
+            return {"path": directory, "error": str(error)}
+
+    if not directories:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(directories))) as executor:
+        return list(executor.map(update_one, directories))
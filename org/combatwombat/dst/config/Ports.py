@@ -0,0 +1,176 @@
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Cluster import Cluster
+from org.combatwombat.dst.config.Server import Server
+from org.combatwombat.dst.config.ClusterDirectory import CLUSTER_INI, SERVER_INI
+from configparser import Error as ConfigParserError
+from glob import glob
+from heapq import heappop, heappush
+from os import path
+from threading import RLock
+from marshmallow import ValidationError
+
+PORT_KINDS = {
+    "server_port": range(10998, 11019),
+    "authentication_port": range(8766, 65536),
+    "master_server_port": range(27016, 65536),
+    "master_port": range(10888, 65536),
+}
+
+
+def config_ports(config):
+    """Ports a configuration object listens on
+
+    Args:
+        config (Cluster or Server): Configuration object.
+
+    Returns:
+        dict: Port numbers keyed by kind. Clusters only use their master_port when sharding is enabled.
+    """
+    if isinstance(config, Server):
+        return {"server_port": config.network.server_port,
+                "authentication_port": config.steam.authentication_port,
+                "master_server_port": config.steam.master_server_port}
+    if isinstance(config, Cluster) and config.shard.shard_enabled:
+        return {"master_port": config.shard.master_port}
+    return {}
+
+
+class PortIndex:
+    """Host wide index of the ports used by every cluster.ini and server.ini.
+
+    The index is built once by scanning the clusters root and then follows every Cluster.write_ini
+    and Server.write_ini below the root through an ini write listener, so it never needs to rescan.
+    Files deleted since are dropped whenever build is called again. Given a ConfigWatcher, the index
+    starts it when built and also follows files edited by hand or written by other processes.
+    Looking up the next free port of a kind is amortized O(log n): a cursor moves up through used
+    ports and ports released below the cursor are kept in a heap of the kind they were taken from.
+    Ports are not reserved: the index only changes when a file is written, so two callers asking
+    before either writes get the same port.
+
+    Args:
+        root (str): Directory holding one sub directory per cluster.
+        watcher (ConfigWatcher):    Watcher of the same root to follow outside changes with, optional.
+
+    Attributes:
+        root (str): Directory holding one sub directory per cluster.
+        errors (dict): Files that could not be read during the last build, with their error message.
+    """
+
+    def __init__(self, root, watcher=None):
+        self.root = root
+        self.errors = {}
+        self._watcher = watcher
+        self._owners = {}
+        self._files = {}
+        self._cursors = {kind: ports.start for kind, ports in PORT_KINDS.items()}
+        self._released = {kind: [] for kind in PORT_KINDS}
+        self._built = False
+        self._lock = RLock()
+
+    def build(self):
+        """Scan every config file below the root and start following writes, once built only drop deleted files"""
+        with self._lock:
+            if self._built:
+                for file in [file for file in self._files if not path.isfile(file)]:
+                    self.remove(file)
+                return
+            if self._watcher is not None:  # Started first, so changes made during the scan are not missed
+                self._watcher.add_listener(self.watched)
+                self._watcher.start()
+            files = glob(path.join(self.root, "*", CLUSTER_INI)) + glob(path.join(self.root, "*", "*", SERVER_INI))
+            for file in files:
+                self._load(file)
+            ini.add_write_listener(self.update)
+            self._built = True
+
+    def watched(self, event):
+        """ConfigWatcher listener re-reading a file changed outside of write_ini, or dropping it when deleted"""
+        if not path.isfile(event["path"]):
+            self.remove(event["path"])
+        else:
+            self._load(event["path"])
+
+    def _load(self, file):
+        try:
+            if path.basename(file) == CLUSTER_INI:
+                self.update(file, Cluster.load_ini(file))
+            else:
+                self.update(file, Server.load_ini(file))
+        except (OSError, ConfigParserError, ValidationError, ValueError) as error:
+            self.errors[file] = str(error)
+        else:
+            self.errors.pop(file, None)
+
+    def update(self, file, config):
+        """Record the ports of a configuration object written to a file, replacing the file's previous ports"""
+        if not ini.is_below(file, self.root):
+            return
+        with self._lock:
+            self.remove(file)
+            ports = config_ports(config)
+            if not ports:
+                return
+            file = path.abspath(file)
+            self._files[file] = ports
+            for kind, port in ports.items():
+                self._owners.setdefault(port, set()).add((file, kind))
+
+    def remove(self, file):
+        """Forget the ports of a file"""
+        with self._lock:
+            for kind, port in self._files.pop(path.abspath(file), {}).items():
+                owners = self._owners.get(port, set())
+                owners.discard((path.abspath(file), kind))
+                if not owners:
+                    self._owners.pop(port, None)
+                    if port in PORT_KINDS[kind] and port < self._cursors[kind]:
+                        heappush(self._released[kind], port)
+
+    def ports(self):
+        """Returns the set of every used port"""
+        with self._lock:
+            return set(self._owners)
+
+    def next_free(self, kind):
+        """Lowest unused port of a kind, preferring ports released by earlier changes
+
+        Args:
+            kind (str): One of server_port, authentication_port, master_server_port or master_port.
+
+        Returns:
+            int: Free port, or None if the kind's range is exhausted
+        """
+        with self._lock:
+            released = self._released[kind]
+            while released:
+                if released[0] not in self._owners:
+                    return released[0]
+                heappop(released)  # Taken again since it was released
+            ports = PORT_KINDS[kind]
+            while self._cursors[kind] in self._owners:
+                self._cursors[kind] += 1
+            return self._cursors[kind] if self._cursors[kind] in ports else None
+
+    def conflicts(self, file=None, config=None):
+        """Find ports used more than once
+
+        Args:
+            file (str): When given with config, only check that configuration as if it were written to file.
+            config (Cluster or Server): Configuration to check.
+
+        Returns:
+            list: One dict per conflicting port with the "port" and its "owners" as [file, kind] pairs
+        """
+        with self._lock:
+            if config is None:
+                return [{"port": port, "owners": sorted([list(owner) for owner in owners])}
+                        for port, owners in sorted(self._owners.items()) if len(owners) > 1]
+            file = path.abspath(file) if file else None
+            ports = config_ports(config)
+            result = []
+            for port in sorted(set(ports.values())):
+                owners = {owner for owner in self._owners.get(port, set()) if owner[0] != file}
+                owners.update((file, other) for other, other_port in ports.items() if other_port == port)
+                if len(owners) > 1:
+                    result.append({"port": port, "owners": sorted([list(owner) for owner in owners], key=str)})
+            return result
@@ -0,0 +1,94 @@
+"""Validation rules spanning several sections or files of cluster configurations.
+
+The marshmallow schemas validate single fields. The rules here cover the requirements described in
+the section docstrings that involve more than one field: exactly one master shard per cluster,
+bind_ip/master_ip/name when sharding, whitelist_slots within max_players, and a warning for sharded
+clusters that share a master address with different cluster_key values, since separate clusters on
+one address can not run at the same time and shards of one cluster must share its key. check_fleet
+looks at every cluster once, collecting what the cross-cluster rules need as it goes, so it stays
+linear in the size of the fleet.
+
+Diagnostics are dicts holding the "path" of the cluster directory, the "rule" that failed, its
+"severity" (error or warning) and a "message".
+"""
+
+ERROR = "error"
+WARNING = "warning"
+
+
+def check_cluster(directory, cluster_directory):
+    """Check the rules that only involve a single cluster directory
+
+    Args:
+        directory (str):    Path of the cluster directory, used in the diagnostics.
+        cluster_directory (ClusterDirectory):   Cluster and server configurations to check.
+
+    Returns:
+        list: Diagnostics, empty if every rule passed
+    """
+    diagnostics = []
+
+    def report(rule, message, severity=ERROR):
+        diagnostics.append({"path": directory, "rule": rule, "severity": severity, "message": message})
+
+    cluster = cluster_directory.cluster
+    shard = cluster.shard
+    if cluster.network.whitelist_slots > cluster.gameplay.max_players:
+        report("whitelist_slots", "whitelist_slots ({}) exceeds max_players ({}).".format(
+            cluster.network.whitelist_slots, cluster.gameplay.max_players))
+
+    masters = [name for name, server in cluster_directory.servers.items() if server.shard.is_master]
+    if cluster_directory.servers and len(masters) != 1:
+        report("single_master", "Expected exactly one master shard, found {}{}.".format(
+            len(masters), " ({})".format(", ".join(sorted(masters))) if masters else ""))
+    if len(cluster_directory.servers) > 1 and not shard.shard_enabled:
+        report("shard_enabled", "shard_enabled must be true for a cluster with {} shards.".format(
+            len(cluster_directory.servers)))
+
+    if shard.shard_enabled:
+        if masters and not shard.bind_ip:
+            report("bind_ip", "bind_ip is required when shard_enabled is true and a shard is the master.")
+        if len(masters) < len(cluster_directory.servers) and not shard.master_ip:
+            report("master_ip", "master_ip is required when shard_enabled is true and a shard is not the master.")
+        if not shard.cluster_key:
+            report("cluster_key", "cluster_key should be set when shard_enabled is true.", WARNING)
+        for name, server in sorted(cluster_directory.servers.items()):
+            if not server.shard.is_master and not server.shard.name:
+                report("shard_name", "Shard {} needs a name when shard_enabled is true and it is not the master."
+                       .format(name))
+    return diagnostics
+
+
+def check_fleet(entries):
+    """Check every rule for many cluster directories in one pass
+
+    Args:
+        entries (iterable): (path, ClusterDirectory) pairs.
+
+    Returns:
+        list: Diagnostics, empty if every rule passed
+    """
+    diagnostics = []
+    keys_by_master = {}
+    for directory, cluster_directory in entries:
+        diagnostics.extend(check_cluster(directory, cluster_directory))
+        shard = cluster_directory.cluster.shard
+        if shard.shard_enabled:
+            keys_by_master.setdefault((shard.master_ip, shard.master_port), {}) \
+                .setdefault(shard.cluster_key, []).append(directory)
+
+    for (master_ip, master_port), keys in keys_by_master.items():
+        if len(keys) < 2:
+            continue
+        for directories in keys.values():
+            for directory in directories:
+                diagnostics.append({"path": directory, "rule": "cluster_key", "severity": WARNING,
+                                    "message": "{} sharded clusters use master {}:{} with different cluster_key "
+                                               "values, they can not run at the same time."
+                                    .format(sum(map(len, keys.values())), master_ip, master_port)})
+    return diagnostics
+
+
+def errors(diagnostics):
+    """Returns only the diagnostics with error severity"""
+    return [diagnostic for diagnostic in diagnostics if diagnostic["severity"] == ERROR]
@@ -0,0 +1,198 @@
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Cluster import Cluster, LazyCluster, cluster_schema
+from org.combatwombat.dst.config.ClusterDirectory import CLUSTER_INI
+from configparser import Error as ConfigParserError
+from glob import glob
+from os import path
+from threading import RLock
+from marshmallow import ValidationError
+import operator
+
+SEARCH_SECTIONS = ("gameplay", "network", "steam", "misc")
+HIDDEN_FIELDS = ("cluster_password",)
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "lt": operator.lt,
+    "le": operator.le,
+    "in": lambda value, options: value in options,
+    "contains": lambda value, text: str(text).lower() in str(value).lower(),
+}
+SEARCH_FIELDS = tuple(name for section in SEARCH_SECTIONS for name in cluster_schema.fields[section].schema.fields
+                      if name not in HIDDEN_FIELDS)
+
+
+class SearchIndex:
+    """In memory, column oriented index of the cluster.ini settings of every cluster.
+
+    Each searchable field of the GAMEPLAY, NETWORK, STEAM and MISC sections is kept in its own list,
+    with one row per cluster directory, so a filter only scans the columns it names. Like PortIndex
+    the index is built once by scanning the clusters root and then follows every Cluster.write_ini
+    below the root through an ini write listener. Given a ConfigWatcher, it starts the watcher when
+    built and re-indexes cluster.ini files edited by hand or written by other processes. Clusters
+    whose cluster.ini was deleted are dropped whenever build is called again or the watcher reports
+    the deletion, and their rows are reused by the next cluster added. cluster_password is never indexed.
+
+    Args:
+        root (str): Directory holding one sub directory per cluster.
+        watcher (ConfigWatcher):    Watcher of the same root to follow outside changes with, optional.
+
+    Attributes:
+        root (str): Directory holding one sub directory per cluster.
+        errors (dict): Files that could not be read during the last build, with their error message.
+    """
+
+    def __init__(self, root, watcher=None):
+        self.root = root
+        self.errors = {}
+        self._watcher = watcher
+        self._columns = {name: [] for name in SEARCH_FIELDS}
+        self._paths = []
+        self._rows = {}
+        self._free_rows = []
+        self._built = False
+        self._lock = RLock()
+
+    def build(self):
+        """Scan every cluster.ini below the root and start following writes, once built only drop deleted clusters"""
+        with self._lock:
+            if self._built:
+                for directory in [directory for directory in self._rows
+                                  if not path.isfile(path.join(directory, CLUSTER_INI))]:
+                    self.remove(directory)
+                return
+            if self._watcher is not None:  # Started first, so changes made during the scan are not missed
+                self._watcher.add_listener(self.watched)
+                self._watcher.start()
+            for file in glob(path.join(self.root, "*", CLUSTER_INI)):
+                self._load(file)
+            ini.add_write_listener(self.update)
+            self._built = True
+
+    def _load(self, file):
+        try:
+            self.update(file, LazyCluster.load(file))
+        except (OSError, ConfigParserError, ValidationError, ValueError) as error:
+            self.errors[file] = str(error)
+        else:
+            self.errors.pop(file, None)
+
+    def update(self, file, config):
+        """Record the settings of a cluster configuration written to a file, ignoring server configurations"""
+        if not isinstance(config, Cluster) or path.basename(file) != CLUSTER_INI or not ini.is_below(file, self.root):
+            return
+        values = {}
+        for section in SEARCH_SECTIONS:
+            values.update(cluster_schema.fields[section].schema.dump(getattr(config, section)))
+        directory = path.dirname(path.abspath(file))
+        with self._lock:
+            row = self._rows.get(directory)
+            if row is None:
+                row = self._free_rows.pop() if self._free_rows else len(self._paths)
+                if row == len(self._paths):
+                    self._paths.append(None)
+                    for column in self._columns.values():
+                        column.append(None)
+                self._rows[directory] = row
+                self._paths[row] = directory
+            for name, column in self._columns.items():
+                column[row] = values.get(name)
+
+    def remove(self, directory):
+        """Forget a cluster directory"""
+        with self._lock:
+            row = self._rows.pop(path.abspath(directory), None)
+            if row is None:
+                return
+            self._paths[row] = None
+            for column in self._columns.values():
+                column[row] = None
+            self._free_rows.append(row)
+
+    def watched(self, event):
+        """ConfigWatcher listener re-indexing a changed cluster.ini, or dropping its cluster when deleted"""
+        if event.get("kind") != "cluster":
+            return
+        if not path.isfile(event["path"]):
+            self.remove(path.dirname(event["path"]))
+        else:
+            self._load(event["path"])
+
+    def __len__(self):
+        return len(self._rows)
+
+    def query(self, filters=(), sort=None, descending=False, offset=0, limit=100, fields=None):
+        """Find clusters matching every filter
+
+        Args:
+            filters (list or dict): [field, operator, value] triples, with operators eq, ne, gt, ge,
+                lt, le, in (value is a list) and contains (case insensitive substring), or a dict of
+                field values to match exactly.
+            sort (str): Field to order the matches by, directory path order when not given.
+            descending (bool): Reverse the order.
+            offset (int): Number of matches to skip.
+            limit (int): Maximum number of matches returned, all of them when None.
+            fields (list): Fields included in each match, every searchable field when not given.
+
+        Returns:
+            dict: The "total" number of matches and the page of "results", each holding the cluster
+                directory "path" and the requested fields
+
+        Raises:
+            ValueError: For unknown fields or operators, values that can not be compared with a field,
+                or arguments of the wrong type.
+        """
+        if isinstance(filters, dict):
+            filters = [(name, "eq", value) for name, value in filters.items()]
+        if not isinstance(filters, (list, tuple)):
+            raise ValueError("Filters must be a list or an object.")
+        for label, value in (("offset", offset), ("limit", limit)):
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 0):
+                raise ValueError("{} must be a non-negative integer.".format(label))
+        if offset is None:
+            offset = 0
+        if not isinstance(descending, bool):
+            raise ValueError("descending must be true or false.")
+        if fields is not None and not isinstance(fields, (list, tuple)):
+            raise ValueError("fields must be a list of field names.")
+        checks = []
+        for condition in filters:
+            if not isinstance(condition, (list, tuple)) or len(condition) != 3:
+                raise ValueError("Filters need a field, an operator and a value.")
+            name, op, value = condition
+            self._check_field(name)
+            if op not in OPERATORS:
+                raise ValueError("Unknown operator {}.".format(op))
+            checks.append((name, OPERATORS[op], value))
+        fields = list(fields) if fields is not None else list(SEARCH_FIELDS)
+        for name in fields:
+            self._check_field(name)
+        if sort is not None:
+            self._check_field(sort)
+
+        with self._lock:
+            rows = list(self._rows.values())
+            for name, compare, value in checks:
+                column = self._columns[name]
+                try:
+                    rows = [row for row in rows if column[row] is not None and compare(column[row], value)]
+                except TypeError:
+                    raise ValueError("Can not compare {} with {!r}.".format(name, value))
+
+            if sort is None:
+                rows.sort(key=self._paths.__getitem__, reverse=descending)
+            else:
+                column = self._columns[sort]
+                rows.sort(key=lambda row: (True, column[row]) if column[row] is not None else (False, 0),
+                          reverse=descending)
+            page = rows[offset:] if limit is None else rows[offset:offset + limit]
+            return {"total": len(rows),
+                    "results": [dict({"path": self._paths[row]}, **{name: self._columns[name][row] for name in fields})
+                                for row in page]}
+
+    @staticmethod
+    def _check_field(name):
+        if not isinstance(name, str) or name not in SEARCH_FIELDS:
+            raise ValueError("Unknown field {}.".format(name))
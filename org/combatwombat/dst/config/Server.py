@@ -1,44 +1,137 @@
 from org.combatwombat.dst.config.server.Network import Network, NetworkSchema
 from org.combatwombat.dst.config.server.Shard import Shard, ShardSchema
 from org.combatwombat.dst.config.server.Steam import Steam, SteamSchema
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Cache import config_cache
+from org.combatwombat.dst.config.FastSchema import FastSchema
 from configparser import ConfigParser
 from marshmallow import Schema, fields, post_load
 
 
+# Options each section class writes, those a configuration no longer sets are removed from the file
+MANAGED_OPTIONS = {"NETWORK": Network.__slots__, "SHARD": Shard.__slots__, "STEAM": Steam.__slots__}
+
+
 class Server:
     """Server configuration class for Don't Starve Together.
 
     Args:
-        network (Network): Network configuration section.
-        shard (Shard): Shard configuration section.
-        steam (Steam): Steam configuration section.
+        network (Network): Network configuration section, defaults when None.
+        shard (Shard): Shard configuration section, defaults when None.
+        steam (Steam): Steam configuration section, defaults when None.
 
     Attributes:
         network (Network): Network configuration section.
         shard (Shard): Shard configuration section.
         steam (Steam): Steam configuration section.
     """
-    def __init__(self, network=Network(), shard=Shard(), steam=Steam()):
-        self.network = network
-        self.shard = shard
-        self.steam = steam
+    __slots__ = ("network", "shard", "steam")
+
+    def __init__(self, network=None, shard=None, steam=None):
+        self.network = network if network is not None else Network()
+        self.shard = shard if shard is not None else Shard()
+        self.steam = steam if steam is not None else Steam()
 
     def write_ini(self, file):
         """Write configuration data to specified file path
 
+        Only changed keys are rewritten and the file is replaced atomically.
+
         Args:
             file (str): Path to write configuration file
+
+        Returns:
+            bool: True if the file was written, False if it already held this configuration
         """
         write_config = ConfigParser()
-        with open(file, 'w') as iniFile:
-            self.network.set_config(write_config)
-            self.shard.set_config(write_config)
-            self.steam.set_config(write_config)
-            write_config.write(iniFile)
+        self.network.set_config(write_config)
+        self.shard.set_config(write_config)
+        self.steam.set_config(write_config)
+        written = ini.write_config(file, write_config, MANAGED_OPTIONS)
+        if written:
+            ini.notify_written(file, self)
+        return written
+
+    @staticmethod
+    def read_ini(file):
+        """Read configuration data from specified file path
+
+        Args:
+            file (str): Path to read configuration file
+
+        Returns:
+            Server: Configuration read from the file
+        """
+        read_config = ConfigParser()
+        with open(file, 'r') as iniFile:
+            read_config.read_file(iniFile)
+        return Server.from_config(read_config)
+
+    @staticmethod
+    def from_config(config):
+        """Builds class from every section of a config object"""
+        return Server(network=Network.from_config(config),
+                      shard=Shard.from_config(config),
+                      steam=Steam.from_config(config))
+
+    @staticmethod
+    def load_ini(file):
+        """Read configuration data from specified file path, reusing the cached result while the file is unchanged
+
+        Args:
+            file (str): Path to read configuration file
+
+        Returns:
+            Server: Shared configuration read from the file, which must not be modified
+        """
+        return config_cache.get(file, Server.read_ini)
 
     def to_json(self):
         """Turns configuration class into JSON"""
-        return ServerSchema().dumps(self)
+        return server_schema.dumps(self)
+
+
+class LazyServer(Server):
+    """Server configuration read from a server.ini, materializing each section on first access.
+
+    Args:
+        file (str): Path of the server.ini to read.
+
+    Attributes:
+        file (str): Path of the server.ini the sections are read from.
+    """
+
+    __slots__ = ("file", "_config")
+
+    SECTIONS = {"network": Network, "shard": Shard, "steam": Steam}
+
+    def __init__(self, file):
+        self.file = file
+        self._config = ConfigParser()
+        with open(file, 'r') as iniFile:
+            self._config.read_file(iniFile)
+
+    def __getattr__(self, name):
+        section_class = LazyServer.SECTIONS.get(name)
+        if section_class is None:
+            raise AttributeError(name)
+        section = section_class.from_config(self._config)
+        setattr(self, name, section)
+        return section
+
+    @staticmethod
+    def load(file):
+        """Lazily read configuration data from specified file path
+
+        The cached result is reused while the file is unchanged.
+
+        Args:
+            file (str): Path to read configuration file
+
+        Returns:
+            LazyServer: Shared configuration read from the file, which must not be modified
+        """
+        return config_cache.get(file, LazyServer)
 
 
 class ServerSchema(Schema):
@@ -49,3 +142,7 @@ class ServerSchema(Schema):
     @post_load
     def make_server(self, data, **kwargs):
         return Server(**data)
+
+
+server_schema = ServerSchema()
+fast_server_schema = FastSchema(server_schema)
@@ -0,0 +1,172 @@
+from org.combatwombat.dst.config.Cluster import Cluster
+from org.combatwombat.dst.config.ClusterDirectory import ClusterDirectory
+from org.combatwombat.dst.config.Server import Server
+from org.combatwombat.dst.config.cluster.Gameplay import Gameplay
+from org.combatwombat.dst.config.cluster.Misc import Misc
+from org.combatwombat.dst.config.cluster.Network import Network as ClusterNetwork
+from org.combatwombat.dst.config.cluster.Shard import Shard as ClusterShard
+from org.combatwombat.dst.config.cluster.Steam import Steam as ClusterSteam
+from org.combatwombat.dst.config.server.Network import Network
+from org.combatwombat.dst.config.server.Shard import Shard
+from org.combatwombat.dst.config.server.Steam import Steam
+from os import path
+from secrets import token_hex
+from zlib import crc32
+
+SERVER_PORTS = range(10998, 11019)
+AUTHENTICATION_PORT = 8766
+MASTER_SERVER_PORT = 27016
+MASTER_SHARD_ID = 1
+
+
+def shard_names(layout):
+    """Shard directory names for a layout
+
+    Args:
+        layout (int or list): Number of shards, or the shard names with the master first.
+            Counts name the shards Master, Caves, then Shard3, Shard4 and so on.
+
+    Returns:
+        list: Shard names, master first
+
+    Raises:
+        ValueError: If the layout is not a count or a list of valid, unique directory names.
+    """
+    if isinstance(layout, bool) or not isinstance(layout, (int, list, tuple)):
+        raise ValueError("Shards must be a number or a list of shard names.")
+    if isinstance(layout, int):
+        if layout < 1:
+            raise ValueError("A cluster needs at least one shard.")
+        return (["Master", "Caves"] + ["Shard{}".format(i) for i in range(3, layout + 1)])[:layout]
+    names = list(layout)
+    if not names:
+        raise ValueError("A cluster needs at least one shard.")
+    for name in names:
+        if not isinstance(name, str) or not name or path.basename(name) != name or name in (".", ".."):
+            raise ValueError("Invalid shard name {!r}.".format(name))
+    if len(set(names)) != len(names):
+        raise ValueError("Shard names must be unique.")
+    return names
+
+
+def shard_id(cluster_key, name):
+    """Stable id for a non-master shard, derived from the cluster key and shard name"""
+    return crc32("{}/{}".format(cluster_key, name).encode("utf-8")) % (2 ** 31 - 2) + 2
+
+
+def build_topology(layout=2, cluster=None, master_ip="127.0.0.1", bind_ip="127.0.0.1", cluster_key=None,
+                   master_port=10888, taken_ports=()):
+    """Generate a cluster.ini and one server.ini per shard for a multi-shard cluster
+
+    The first shard is the master. Every shard gets a unique, stable id and its own server_port
+    (from the LAN visible 10998-11018 range), authentication_port and master_server_port, none of
+    which collide with each other, with master_port or with taken_ports.
+
+    Args:
+        layout (int or list): Number of shards, or the shard names with the master first.
+        cluster (Cluster): Cluster settings to use. Its SHARD section is replaced.
+        master_ip (str):    IP address non-master shards connect to.
+        bind_ip (str):  IP address the master shard listens on.
+        cluster_key (str):  Shared shard password, generated when not given.
+        master_port (int):  Port the master shard listens on for other shards.
+        taken_ports (iterable): Ports already used on the host.
+
+    Returns:
+        ClusterDirectory: Cluster and per-shard server configurations
+
+    Raises:
+        ValueError: If an argument has the wrong type, master_port is not a port or the layout
+            has more shards than there are server ports.
+    """
+    if isinstance(master_port, bool) or not isinstance(master_port, int) or not 0 < master_port < 65536:
+        raise ValueError("master_port must be a port number between 1 and 65535.")
+    for label, value in (("master_ip", master_ip), ("bind_ip", bind_ip)):
+        if not isinstance(value, str):
+            raise ValueError("{} must be a string.".format(label))
+    if cluster_key is not None and not isinstance(cluster_key, str):
+        raise ValueError("cluster_key must be a string.")
+    if not isinstance(layout, bool) and isinstance(layout, int) and layout > len(SERVER_PORTS):
+        raise ValueError("A cluster can have at most {} shards.".format(len(SERVER_PORTS)))
+    names = shard_names(layout)
+    cluster_key = cluster_key or token_hex(16)
+    taken = set(taken_ports)
+    taken.add(master_port)
+    server_ports = (port for port in SERVER_PORTS if port not in taken)
+    authentication_ports = _free_ports(AUTHENTICATION_PORT, taken)
+    master_server_ports = _free_ports(MASTER_SERVER_PORT, taken)
+
+    servers = {}
+    for index, name in enumerate(names):
+        port = next(server_ports, None)
+        if port is None:
+            raise ValueError("No free server_port left in {}-{} for shard {}.".format(
+                SERVER_PORTS.start, SERVER_PORTS.stop - 1, name))
+        taken.add(port)
+        is_master = index == 0
+        servers[name] = Server(network=Network(port=port),
+                               shard=Shard(is_master=is_master, name=name,
+                                           shard_id=MASTER_SHARD_ID if is_master else shard_id(cluster_key, name)),
+                               steam=Steam(authentication_port=next(authentication_ports),
+                                           master_server_port=next(master_server_ports)))
+
+    cluster = cluster or Cluster(gameplay=Gameplay(), misc=Misc(), network=ClusterNetwork(), steam=ClusterSteam())
+    cluster = Cluster(gameplay=cluster.gameplay, misc=cluster.misc, network=cluster.network, steam=cluster.steam,
+                      shard=ClusterShard(shard_enabled=len(names) > 1, bind_ip=bind_ip, master_ip=master_ip,
+                                         master_port=master_port, cluster_key=cluster_key))
+    cluster_directory = ClusterDirectory(cluster=cluster, servers=servers)
+    errors = check_topology(cluster_directory)
+    if errors:
+        raise ValueError(" ".join(errors))
+    return cluster_directory
+
+
+def check_topology(cluster_directory):
+    """Check a cluster's shards for consistency in a single pass
+
+    Args:
+        cluster_directory (ClusterDirectory): Cluster to check.
+
+    Returns:
+        list: Error messages, empty if the topology is consistent
+    """
+    errors = []
+    shard = cluster_directory.cluster.shard
+    ports = {shard.master_port: "cluster master_port"}
+    ids = {}
+    masters = []
+    for name, server in cluster_directory.servers.items():
+        if server.shard.is_master:
+            masters.append(name)
+        elif server.shard.id is not None:
+            if server.shard.id in ids:
+                errors.append("Shards {} and {} share id {}.".format(ids[server.shard.id], name, server.shard.id))
+            ids[server.shard.id] = name
+        for label, port in (("server_port", server.network.server_port),
+                            ("authentication_port", server.steam.authentication_port),
+                            ("master_server_port", server.steam.master_server_port)):
+            owner = "{} {}".format(name, label)
+            if port in ports:
+                errors.append("{} {} collides with {}.".format(owner, port, ports[port]))
+            ports[port] = owner
+
+    if len(masters) != 1:
+        errors.append("Expected exactly one master shard, found {}.".format(len(masters)))
+    if len(cluster_directory.servers) > 1:
+        if not shard.shard_enabled:
+            errors.append("shard_enabled must be true for a cluster with several shards.")
+        if not shard.bind_ip:
+            errors.append("bind_ip is required when sharding is enabled.")
+        if not shard.master_ip:
+            errors.append("master_ip is required when sharding is enabled.")
+        if not shard.cluster_key:
+            errors.append("cluster_key is required when sharding is enabled.")
+    return errors
+
+
+def _free_ports(start, taken):
+    port = start
+    while True:
+        if port not in taken:
+            taken.add(port)
+            yield port
+        port += 1
@@ -0,0 +1,212 @@
+from org.combatwombat.dst.config.Cluster import Cluster, fast_cluster_schema
+from org.combatwombat.dst.config.Server import Server, fast_server_schema
+from org.combatwombat.dst.config.ClusterDirectory import CLUSTER_INI, SERVER_INI
+from configparser import Error as ConfigParserError
+from glob import glob
+from os import path, stat
+from queue import Queue, Full
+from threading import Event, Lock, Thread
+from marshmallow import ValidationError
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional, fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+
+def diff_configs(old, new):
+    """Compare two dumped configurations section by section
+
+    Args:
+        old (dict): Previously dumped configuration, or None if there was none.
+        new (dict): Newly dumped configuration, or None if it was removed.
+
+    Returns:
+        dict: Changed values keyed by section then field. Removed sections or fields map to None.
+    """
+    old = old or {}
+    new = new or {}
+    changes = {}
+    for section in old.keys() | new.keys():
+        old_section = old.get(section)
+        new_section = new.get(section)
+        if new_section is None:
+            changes[section] = None
+            continue
+        old_section = old_section or {}
+        changed = {key: new_section.get(key) for key in old_section.keys() | new_section.keys()
+                   if old_section.get(key) != new_section.get(key)}
+        if changed:
+            changes[section] = changed
+    return changes
+
+
+class ConfigWatcher:
+    """Watches cluster.ini and server.ini files below a clusters root directory.
+
+    Uses watchdog (inotify on Linux) when it is installed and polls file stamps otherwise.
+    Only the file that changed is re-parsed, and subscribers receive the difference to the
+    previously seen configuration.
+
+    Args:
+        root (str): Directory holding one sub directory per cluster.
+        poll_interval (float):  Seconds between scans when polling.
+        queue_size (int):   Maximum number of undelivered events kept per subscriber.
+
+    Attributes:
+        root (str): Directory holding one sub directory per cluster.
+        poll_interval (float):  Seconds between scans when polling.
+        queue_size (int):   Maximum number of undelivered events kept per subscriber.
+            Events for a subscriber that is not keeping up are dropped.
+    """
+
+    def __init__(self, root, poll_interval=2.0, queue_size=1000):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._configs = {}
+        self._stamps = {}
+        self._subscribers = set()
+        self._listeners = []
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+        self._observer = None
+
+    def start(self):
+        """Take a baseline of every config file and start watching, does nothing if already started"""
+        with self._lock:
+            if self._thread is not None or self._observer is not None:
+                return
+            self._stop = Event()  # A poll thread that has not noticed the last stop yet keeps the old event
+            for file in self._config_files():
+                self._stamps[file] = _stamp(file)
+                self._configs[file] = self._load(file)
+            if Observer is not None and path.isdir(self.root):
+                self._observer = Observer()
+                self._observer.schedule(_ChangeHandler(self), self.root, recursive=True)
+                self._observer.daemon = True
+                self._observer.start()
+            else:
+                self._thread = Thread(target=self._poll, args=(self._stop,), name="config-watcher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        with self._lock:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer = None
+            self._thread = None
+
+    def subscribe(self):
+        """Register a new subscriber
+
+        Returns:
+            Queue: Queue receiving one dict per changed file with its "path", "kind" and "changes",
+                or an "error" if the file could not be parsed.
+        """
+        events = Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(events)
+        return events
+
+    def unsubscribe(self, events):
+        """Remove a subscriber queue returned by subscribe"""
+        with self._lock:
+            self._subscribers.discard(events)
+
+    def add_listener(self, listener):
+        """Call listener(event) for every event published from now on, on the watching thread"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stop calling a listener added with add_listener"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def changed(self, file):
+        """Re-parse a single config file and publish its differences to subscribers"""
+        if path.basename(file) not in (CLUSTER_INI, SERVER_INI):
+            return
+        kind = "cluster" if path.basename(file) == CLUSTER_INI else "server"
+        if path.isfile(file):
+            new = self._load(file)
+        else:
+            new = None
+        if isinstance(new, str):
+            self._publish({"path": file, "kind": kind, "error": new})
+            return
+        with self._lock:
+            old = self._configs.get(file)
+            if new is None:
+                self._configs.pop(file, None)
+            else:
+                self._configs[file] = new
+        changes = diff_configs(old if isinstance(old, dict) else None, new)
+        if changes:
+            self._publish({"path": file, "kind": kind, "changes": changes})
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(event)
+        for events in subscribers:
+            try:
+                events.put_nowait(event)
+            except Full:
+                pass
+
+    def _poll(self, stop):
+        while not stop.wait(self.poll_interval):
+            files = set(self._config_files())
+            for file in files | self._stamps.keys():
+                stamp = _stamp(file) if file in files else None
+                if stamp != self._stamps.get(file):
+                    if stamp is None:
+                        self._stamps.pop(file, None)
+                    else:
+                        self._stamps[file] = stamp
+                    self.changed(file)
+
+    def _config_files(self):
+        return glob(path.join(self.root, "*", CLUSTER_INI)) + glob(path.join(self.root, "*", "*", SERVER_INI))
+
+    @staticmethod
+    def _load(file):
+        """Returns the dumped configuration of a file, or an error message if it can not be parsed"""
+        try:
+            if path.basename(file) == CLUSTER_INI:
+                return fast_cluster_schema.dump(Cluster.load_ini(file))
+            return fast_server_schema.dump(Server.load_ini(file))
+        except (OSError, ConfigParserError, ValidationError, ValueError) as error:
+            return str(error)
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in ("created", "modified", "moved", "deleted"):
+            return
+        self.watcher.changed(event.src_path)
+        if event.event_type == "moved":
+            self.watcher.changed(event.dest_path)
+
+
+def _stamp(file):
+    try:
+        file_stat = stat(file)
+    except OSError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino
@@ -1,4 +1,5 @@
-from marshmallow import Schema, fields, post_load, validate
+from sys import intern
+from marshmallow import EXCLUDE, Schema, fields, post_load, validate
 
 
 class Gameplay:
@@ -20,10 +21,12 @@ class Gameplay:
         pause_when_empty (bool):    Pause the server when there are no players connected.
         vote_kick_enabled (bool):   Set to true to enable the “Vote to Kick” feature.
     """
+    __slots__ = ("max_players", "pvp", "game_mode", "pause_when_empty", "vote_kick_enabled")
+
     def __init__(self, max_players=16, pvp=False, game_mode="survival", pause_when_empty=False, vote_kick_enabled=False):
         self.max_players = max_players
         self.pvp = pvp
-        self.game_mode = game_mode
+        self.game_mode = intern(game_mode)
         self.pause_when_empty = pause_when_empty
         self.vote_kick_enabled = vote_kick_enabled
 
@@ -37,9 +40,16 @@ class Gameplay:
         config.set("GAMEPLAY", "pause_when_empty", str(self.pause_when_empty))
         config.set("GAMEPLAY", "vote_kick_enabled", str(self.vote_kick_enabled))
 
+    @staticmethod
+    def from_config(config):
+        """Builds class from the GAMEPLAY section of a config object"""
+        if not config.has_section("GAMEPLAY"):
+            return Gameplay()
+        return gameplay_schema.load(dict(config.items("GAMEPLAY")), unknown=EXCLUDE)
+
     def to_json(self):
         """Turns configuration class into JSON"""
-        return GameplaySchema().dumps(self)
+        return gameplay_schema.dumps(self)
 
 
 class GameplaySchema(Schema):
@@ -52,3 +62,6 @@ class GameplaySchema(Schema):
     @post_load
     def make_gameplay(self, data, **kwargs):
         return Gameplay(**data)
+
+
+gameplay_schema = GameplaySchema()
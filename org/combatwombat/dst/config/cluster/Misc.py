@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, post_load
+from marshmallow import EXCLUDE, Schema, fields, post_load
 
 
 class Misc:
@@ -14,6 +14,8 @@ class Misc:
             Snapshots are available in the “Rollback” tab on the “Host Game” screen.
         console_enabled (bool): Allow lua commands to be entered in the command prompt or terminal.
     """
+    __slots__ = ("max_snapshots", "console_enabled")
+
     def __init__(self, max_snapshots=6, console_enabled=True):
         self.max_snapshots = max_snapshots
         self.console_enabled = console_enabled
@@ -25,9 +27,16 @@ class Misc:
         config.set("MISC", "max_snapshots", str(self.max_snapshots))
         config.set("MISC", "console_enabled", str(self.console_enabled))
 
+    @staticmethod
+    def from_config(config):
+        """Builds class from the MISC section of a config object"""
+        if not config.has_section("MISC"):
+            return Misc()
+        return misc_schema.load(dict(config.items("MISC")), unknown=EXCLUDE)
+
     def to_json(self):
         """Turns configuration class into JSON"""
-        return MiscSchema().dumps(self)
+        return misc_schema.dumps(self)
 
 
 class MiscSchema(Schema):
@@ -37,3 +46,6 @@ class MiscSchema(Schema):
     @post_load
     def make_misc(self, data, **kwargs):
         return Misc(**data)
+
+
+misc_schema = MiscSchema()
@@ -1,4 +1,5 @@
-from marshmallow import Schema, fields, post_load, validate
+from sys import intern
+from marshmallow import EXCLUDE, Schema, fields, post_load, validate
 
 
 class Network:
@@ -37,6 +38,9 @@ class Network:
         autosaver_enabled (bool): Automatically save state at end of each game day.
             The game will still save on shutdown, and can be manually saved using c_save().
     """
+    __slots__ = ("offline_server", "tick_rate", "whitelist_slots", "cluster_password", "cluster_name",
+                 "cluster_description", "lan_only_cluster", "cluster_intention", "autosaver_enabled")
+
     def __init__(self, offline_server=False, tick_rate=15, whitelist_slots=0, cluster_password=""
                  , cluster_name="", cluster_description="", lan_only_cluster=False
                  , cluster_intention="cooperative", autosaver_enabled=True):
@@ -47,7 +51,7 @@ class Network:
         self.cluster_name = cluster_name
         self.cluster_description = cluster_description
         self.lan_only_cluster = lan_only_cluster
-        self.cluster_intention = cluster_intention
+        self.cluster_intention = intern(cluster_intention)
         self.autosaver_enabled = autosaver_enabled
 
     def set_config(self, config):
@@ -64,9 +68,16 @@ class Network:
         config.set("NETWORK", "cluster_intention", self.cluster_intention)
         config.set("NETWORK", "autosaver_enabled", str(self.autosaver_enabled))
 
+    @staticmethod
+    def from_config(config):
+        """Builds class from the NETWORK section of a config object"""
+        if not config.has_section("NETWORK"):
+            return Network()
+        return network_schema.load(dict(config.items("NETWORK")), unknown=EXCLUDE)
+
     def to_json(self):
         """Turns configuration class into JSON"""
-        return NetworkSchema().dumps(self)
+        return network_schema.dumps(self)
 
 
 class NetworkSchema(Schema):
@@ -83,3 +94,6 @@ class NetworkSchema(Schema):
     @post_load
     def make_network(self, data, **kwargs):
         return Network(**data)
+
+
+network_schema = NetworkSchema()
@@ -1,5 +1,5 @@
-from marshmallow import Schema, fields, post_load
-
+from sys import intern
+from marshmallow import EXCLUDE, Schema, fields, post_load
 
 
 class Shard:
@@ -32,10 +32,12 @@ class Shard:
             this value must be the same on each machine.
             For servers running on the same machine, you can just set this once in cluster.ini.
     """
+    __slots__ = ("shard_enabled", "bind_ip", "master_ip", "master_port", "cluster_key")
+
     def __init__(self, shard_enabled=False, bind_ip="127.0.0.1", master_ip="127.0.0.1", master_port=10888, cluster_key=""):
         self.shard_enabled = shard_enabled
-        self.bind_ip = bind_ip
-        self.master_ip = master_ip
+        self.bind_ip = intern(bind_ip)
+        self.master_ip = intern(master_ip)
         self.master_port = master_port
         self.cluster_key = cluster_key
 
@@ -49,9 +51,16 @@ class Shard:
         config.set("SHARD", "master_port", str(self.master_port))
         config.set("SHARD", "cluster_key", self.cluster_key)
 
+    @staticmethod
+    def from_config(config):
+        """Builds class from the SHARD section of a config object"""
+        if not config.has_section("SHARD"):
+            return Shard()
+        return shard_schema.load(dict(config.items("SHARD")), unknown=EXCLUDE)
+
     def to_json(self):
         """Turns configuration class into JSON"""
-        return ShardSchema().dumps(self)
+        return shard_schema.dumps(self)
 
 
 class ShardSchema(Schema):
@@ -64,3 +73,6 @@ class ShardSchema(Schema):
     @post_load
     def make_shard(self, data, **kwargs):
         return Shard(**data)
+
+
+shard_schema = ShardSchema()
@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, post_load
+from marshmallow import EXCLUDE, Schema, fields, post_load
 
 
 class Steam:
@@ -17,6 +17,8 @@ class Steam:
         steam_group_admins (bool): Use Steam group admins as cluster admins
     """
 
+    __slots__ = ("steam_group_only", "steam_group_id", "steam_group_admins")
+
     def __init__(self, steam_group_only=False, steam_group_id=0, steam_group_admins=False):
         self.steam_group_only = steam_group_only
         self.steam_group_id = steam_group_id
@@ -30,9 +32,16 @@ class Steam:
         config.set("STEAM", "steam_group_id", str(self.steam_group_id))
         config.set("STEAM", "steam_group_admins", str(self.steam_group_admins))
 
+    @staticmethod
+    def from_config(config):
+        """Builds class from the STEAM section of a config object"""
+        if not config.has_section("STEAM"):
+            return Steam()
+        return steam_schema.load(dict(config.items("STEAM")), unknown=EXCLUDE)
+
     def to_json(self):
         """Turns configuration class into JSON"""
-        return SteamSchema().dumps(self)
+        return steam_schema.dumps(self)
 
 
 class SteamSchema(Schema):
@@ -43,3 +52,6 @@ class SteamSchema(Schema):
     @post_load
     def make_steam(self, data, **kwargs):
         return Steam(**data)
+
+
+steam_schema = SteamSchema()
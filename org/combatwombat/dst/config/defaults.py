@@ -0,0 +1,108 @@
+"""Default cluster.ini and server.ini, precomputed so the CLI can print and write them without
+importing marshmallow or the config classes.
+
+They must match Cluster() and Server(), tests/test_cli.py compares them.
+"""
+
+DEFAULT_CLUSTER = {
+    "network": {
+        "offline_server": False,
+        "tick_rate": 15,
+        "whitelist_slots": 0,
+        "cluster_password": "",
+        "cluster_name": "",
+        "cluster_description": "",
+        "lan_only_cluster": False,
+        "cluster_intention": "cooperative",
+        "autosaver_enabled": True,
+    },
+    "shard": {
+        "shard_enabled": False,
+        "bind_ip": "127.0.0.1",
+        "master_ip": "127.0.0.1",
+        "master_port": 10888,
+        "cluster_key": "",
+    },
+    "steam": {
+        "steam_group_only": False,
+        "steam_group_id": 0,
+        "steam_group_admins": False,
+    },
+    "gameplay": {
+        "max_players": 16,
+        "pvp": False,
+        "game_mode": "survival",
+        "pause_when_empty": False,
+        "vote_kick_enabled": False,
+    },
+    "misc": {
+        "max_snapshots": 6,
+        "console_enabled": True,
+    },
+}
+
+DEFAULT_SERVER = {
+    "network": {
+        "port": 10999,
+    },
+    "shard": {
+        "is_master": True,
+        "name": "",
+        "shard_id": None,
+    },
+    "steam": {
+        "authentication_port": 8766,
+        "master_server_port": 27016,
+    },
+}
+
+DEFAULT_CLUSTER_INI = (
+    "[NETWORK]\n"
+    "offline_server = False\n"
+    "tick_rate = 15\n"
+    "whitelist_slots = 0\n"
+    "cluster_password = \n"
+    "cluster_name = \n"
+    "cluster_description = \n"
+    "lan_only_cluster = False\n"
+    "cluster_intention = cooperative\n"
+    "autosaver_enabled = True\n"
+    "\n"
+    "[SHARD]\n"
+    "shard_enabled = False\n"
+    "bind_ip = 127.0.0.1\n"
+    "master_ip = 127.0.0.1\n"
+    "master_port = 10888\n"
+    "cluster_key = \n"
+    "\n"
+    "[STEAM]\n"
+    "steam_group_only = False\n"
+    "steam_group_id = 0\n"
+    "steam_group_admins = False\n"
+    "\n"
+    "[GAMEPLAY]\n"
+    "max_players = 16\n"
+    "pvp = False\n"
+    "game_mode = survival\n"
+    "pause_when_empty = False\n"
+    "vote_kick_enabled = False\n"
+    "\n"
+    "[MISC]\n"
+    "max_snapshots = 6\n"
+    "console_enabled = True\n"
+    "\n"
+)
+
+DEFAULT_SERVER_INI = (
+    "[NETWORK]\n"
+    "server_port = 10999\n"
+    "\n"
+    "[SHARD]\n"
+    "is_master = True\n"
+    "name = \n"
+    "\n"
+    "[STEAM]\n"
+    "authentication_port = 8766\n"
+    "master_server_port = 27016\n"
+    "\n"
+)
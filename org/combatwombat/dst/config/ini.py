@@ -0,0 +1,273 @@
+"""Incremental, crash safe writing of ini files.
+
+Configuration objects fill a ConfigParser through their set_config methods. Instead of truncating
+the target and dumping the whole parser, write_config compares it with the file on disk, leaves the
+file alone if nothing changed, and otherwise patches only the changed keys so comments, ordering and
+keys this package does not know about survive. Keys the writer manages but no longer sets, such as
+the id of a server.ini shard written without one, are removed. Files are replaced atomically through a temporary
+file in the same directory, so a crash leaves either the old or the new file, never a torn one.
+
+Indexes that need to follow configuration changes register a write listener, which Cluster.write_ini
+and Server.write_ini call with the file path and the object after every write that changed the file.
+The file is already replaced by then, so a failing write listener is logged instead of failing the write.
+Before write listeners are called by write_config with the path and the current text of a file it is
+about to change, so contents edited by hand can be kept before they are replaced.
+"""
+from configparser import ConfigParser, Error as ConfigParserError
+from io import StringIO
+from os import path, close, fsync, open as os_open, replace, stat, chmod, unlink, O_RDONLY
+import logging
+import re
+import tempfile
+
+_SECTION = re.compile(r"^\s*\[(?P<name>[^\]]+)\]")
+_OPTION = re.compile(r"^(?P<key>\s*[^=:\s\[;#][^=:]*?)(?P<separator>\s*[=:]\s*)(?P<value>.*)$")
+_listeners = []
+_before_listeners = []
+_logger = logging.getLogger(__name__)
+
+
+def add_write_listener(listener):
+    """Register listener(file, obj) to be called after a configuration object changed a file"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_write_listener(listener):
+    """Unregister a listener added with add_write_listener"""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def add_before_write_listener(listener):
+    """Register listener(file, text) to be called with a file's current contents before write_config changes it"""
+    if listener not in _before_listeners:
+        _before_listeners.append(listener)
+
+
+def remove_before_write_listener(listener):
+    """Unregister a listener added with add_before_write_listener"""
+    if listener in _before_listeners:
+        _before_listeners.remove(listener)
+
+
+def is_below(file, directory):
+    """Whether a file lies inside a directory, for listeners that only follow files below a root"""
+    return path.abspath(file).startswith(path.join(path.abspath(directory), ""))
+
+
+def notify_written(file, obj):
+    """Call every write listener for a file written from a configuration object, logging their errors"""
+    for listener in list(_listeners):
+        try:
+            listener(file, obj)
+        except Exception:
+            _logger.exception("Write listener %r failed for %s", listener, file)
+
+
+def write_config(file, config, managed=None):
+    """Write a ConfigParser to an ini file if it differs from what is on disk
+
+    Args:
+        file (str): Path of the ini file
+        config (ConfigParser): Configuration to write
+        managed (dict): Options the configuration manages by section, those it does not set are
+            removed from the file. Every other option is kept.
+
+    Returns:
+        bool: True if the file was written, False if it already held the configuration
+    """
+    try:
+        with open(file, 'r') as ini_file:
+            current = ini_file.read()
+    except FileNotFoundError:
+        current = None
+
+    if current is None:
+        text = StringIO()
+        config.write(text)
+        atomic_write(file, text.getvalue())
+        return True
+
+    if not changed_values(current, config) and not removed_options(current, config, managed):
+        return False
+    for listener in list(_before_listeners):
+        listener(file, current)
+    atomic_write(file, patch_ini(current, config, managed))
+    return True
+
+
+def changed_values(text, config):
+    """Find values in a ConfigParser that differ from an ini file's text
+
+    Args:
+        text (str): Current ini file contents
+        config (ConfigParser): Configuration to compare
+
+    Returns:
+        dict: New values keyed by section then option, only for options that differ or are missing
+    """
+    current = ConfigParser(interpolation=None)
+    try:
+        current.read_string(text)
+    except ConfigParserError:
+        current = ConfigParser(interpolation=None)
+    changes = {}
+    for section in config.sections():
+        for option, value in config.items(section, raw=True):
+            if not current.has_option(section, option) or current.get(section, option) != value:
+                changes.setdefault(section, {})[option] = value
+    return changes
+
+
+def removed_options(text, config, managed=None):
+    """Find managed options in an ini file's text that a ConfigParser no longer sets
+
+    Args:
+        text (str): Current ini file contents
+        config (ConfigParser): Configuration to compare
+        managed (dict): Options the configuration manages by section
+
+    Returns:
+        dict: Sets of option names keyed by section
+    """
+    if not managed:
+        return {}
+    current = ConfigParser(interpolation=None)
+    try:
+        current.read_string(text)
+    except ConfigParserError:
+        return {}
+    removed = {}
+    for section, options in managed.items():
+        if not current.has_section(section):
+            continue
+        for option in options:
+            if current.has_option(section, option) and not config.has_option(section, option):
+                removed.setdefault(section, set()).add(option)
+    return removed
+
+
+def patch_ini(text, config, managed=None):
+    """Apply a ConfigParser's changed values to an ini file's text
+
+    Changed options are rewritten in place, missing options are appended to the end of their
+    section and missing sections are appended to the end of the file. Managed options the
+    ConfigParser does not set are dropped along with their continuation lines. Every other line is kept.
+
+    Args:
+        text (str): Current ini file contents
+        config (ConfigParser): Configuration to apply
+        managed (dict): Options the configuration manages by section
+
+    Returns:
+        str: Patched ini file contents
+    """
+    changes = changed_values(text, config)
+    removed = removed_options(text, config, managed)
+    lines = text.splitlines()
+    output = []
+    section = None
+    section_end = {}
+    in_value = False
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+        match = _SECTION.match(line)
+        if match:
+            section = match.group("name").strip()
+            in_value = False
+            output.append(line)
+            section_end[section] = len(output)
+            continue
+        match = _OPTION.match(line)
+        if section is not None and match and not (in_value and line[:1].isspace()):
+            in_value = True
+            option = match.group("key").strip().lower()
+            if option in removed.get(section, ()):
+                index = _value_end(lines, index)
+                continue
+            if option in changes.get(section, {}):
+                line = match.group("key") + match.group("separator") + _format_value(changes[section].pop(option))
+                index = _value_end(lines, index)
+        elif line.strip() and not line[:1].isspace():
+            in_value = False
+        output.append(line)
+        if section is not None and line.strip():
+            section_end[section] = len(output)
+
+    for section in sorted(section_end, key=section_end.get, reverse=True):
+        missing = changes.pop(section, {})
+        if missing:
+            index = section_end[section]
+            output[index:index] = ["{} = {}".format(option, _format_value(value)) for option, value in missing.items()]
+
+    for section, missing in changes.items():
+        if output and output[-1].strip():
+            output.append("")
+        output.append("[{}]".format(section))
+        output.extend("{} = {}".format(option, _format_value(value)) for option, value in missing.items())
+    return "\n".join(output) + "\n"
+
+
+def _format_value(value):
+    """Indent the continuation lines of a multi-line value, like ConfigParser.write does"""
+    return str(value).replace("\n", "\n\t")
+
+
+def _value_end(lines, index):
+    """Index of the first line after the continuation lines of an option value starting before index"""
+    end = index
+    while end < len(lines) and (not lines[end].strip() or lines[end][:1].isspace()):
+        end += 1
+    while end > index and not lines[end - 1].strip():
+        end -= 1
+    return end
+
+
+def atomic_write(file, text):
+    """Replace a file's contents atomically
+
+    The text is written to a temporary file in the same directory, flushed to disk and renamed over
+    the target, keeping the target's permissions if it already exists.
+
+    Args:
+        file (str): Path of the file to replace
+        text (str): New file contents
+    """
+    directory = path.dirname(path.abspath(file))
+    try:
+        mode = stat(file).st_mode
+    except FileNotFoundError:
+        mode = 0o644
+    handle, temp_file = tempfile.mkstemp(prefix="." + path.basename(file) + ".", suffix=".tmp", dir=directory)
+    try:
+        with open(handle, 'w') as out_file:
+            out_file.write(text)
+            out_file.flush()
+            fsync(out_file.fileno())
+        chmod(temp_file, mode)
+        replace(temp_file, file)
+    except BaseException:
+        try:
+            unlink(temp_file)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+
+def fsync_directory(directory):
+    """Flush a directory's entries to disk, so files renamed into it survive a crash"""
+    try:
+        handle = os_open(directory, O_RDONLY)
+    except OSError:  # Directories can not be opened on every platform
+        return
+    try:
+        fsync(handle)
+    except OSError:
+        pass
+    finally:
+        close(handle)
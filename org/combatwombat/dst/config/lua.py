@@ -0,0 +1,289 @@
+"""Reading and writing the Lua tables DST uses for world, level and mod settings.
+
+Files such as worldgenoverride.lua, leveldataoverride.lua and modoverrides.lua hold a single
+"return { ... }" table of strings, numbers, booleans and nested tables. loads parses such a table in
+one pass over the text, without building a token list or syntax tree, and dumps writes one back.
+
+Tables map to Python as follows: a table with only positional values becomes a list, any other
+table becomes a dict, with positional values keyed 1, 2, ... when mixed with named keys. nil
+becomes None. Lua code other than table constructors is not supported.
+"""
+import re
+
+_SKIP = re.compile(r"(?:\s+|--\[(=*)\[.*?\]\1\]|--[^\n]*)*", re.S)
+_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_NUMBER = re.compile(r"0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_STRING = {'"': re.compile(r'"((?:[^"\\\n]|\\.)*)"', re.S), "'": re.compile(r"'((?:[^'\\\n]|\\.)*)'", re.S)}
+_LONG_STRING = re.compile(r"\[(=*)\[\n?(.*?)\]\1\]", re.S)
+_ESCAPE = re.compile(r"\\(\d{1,3}|x[0-9a-fA-F]{2}|z\s*|.)", re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "a": "\a", "b": "\b", "f": "\f", "v": "\v", "\\": "\\", '"': '"',
+            "'": "'", "\n": "\n"}
+_CONSTANTS = {"true": True, "false": False, "nil": None}
+_KEYWORDS = frozenset(("and", "break", "do", "else", "elseif", "end", "false", "for", "function", "goto", "if",
+                       "in", "local", "nil", "not", "or", "repeat", "return", "then", "true", "until", "while"))
+_ENTRY = re.compile(r"""[ \t\r\n]*(?:([A-Za-z_][A-Za-z0-9_]*)[ \t\r\n]*=(?!=)[ \t\r\n]*)?"""
+                    r"""(?:"([^"\\\n]*)"|'([^'\\\n]*)'|(-?\d+(?:\.\d+)?)(?![\w.])|(true|false|nil)(?!\w))[ \t\r\n]*([,;])?""")
+_ASSIGNMENT = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)[ \t]*=(?!=)")
+_QUOTE = re.compile(r'[\\"\n\r\t\0]')
+_QUOTES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t", "\0": "\\000"}
+
+
+class LuaError(ValueError):
+    """Raised for Lua text that is not a supported table"""
+
+    def __init__(self, message, text, position):
+        line = text.count("\n", 0, position) + 1
+        column = position - text.rfind("\n", 0, position)
+        super().__init__("{} at line {} column {}".format(message, line, column))
+        self.line = line
+        self.column = column
+
+
+def loads(text):
+    """Parse the value a Lua file returns
+
+    Args:
+        text (str): Lua source holding a value, optionally preceded by return.
+
+    Returns:
+        Parsed value, see the module docstring for the mapping of tables
+
+    Raises:
+        LuaError: If the text is not a single supported value.
+    """
+    position = _SKIP.match(text, 0).end()
+    if text.startswith("return", position) and not _NAME.match(text, position + 6):
+        position = _SKIP.match(text, position + 6).end()
+    value, position = _value(text, position)
+    position = _SKIP.match(text, position).end()
+    if position < len(text) and text[position] == ";":
+        position = _SKIP.match(text, position + 1).end()
+    if position != len(text):
+        raise LuaError("Unexpected text after value", text, position)
+    return value
+
+
+def assignments(text):
+    """Read the top level name = value assignments of a Lua chunk, such as a modinfo.lua
+
+    Values are read like loads does, with strings joined by .. concatenated. Only unindented
+    assignments count as top level, so those inside an if block, such as translations, are skipped.
+    Every other statement, and assignments whose value is not a supported constant, are skipped line
+    by line, so a chunk using functions or locals still yields the assignments that can be read.
+
+    Args:
+        text (str): Lua source.
+
+    Returns:
+        dict: Assigned values by name, the last assignment of a name wins
+    """
+    values = {}
+    position = 0
+    while True:
+        position = _SKIP.match(text, position).end()
+        if position >= len(text):
+            return values
+        match = _ASSIGNMENT.match(text, position)
+        if match is not None and match.group(1) not in _KEYWORDS and (position == 0 or text[position - 1] == "\n"):
+            try:
+                value, end = _value(text, _SKIP.match(text, match.end()).end())
+                following = _SKIP.match(text, end).end()
+                while isinstance(value, str) and text.startswith("..", following):
+                    more, end = _value(text, _SKIP.match(text, following + 2).end())
+                    if not isinstance(more, (str, int, float)) or isinstance(more, bool):
+                        raise LuaError("Can not concatenate", text, following)
+                    value += more if isinstance(more, str) else repr(more)
+                    following = _SKIP.match(text, end).end()
+                if following >= len(text) or text[following] == ";" or "\n" in text[end:following]:
+                    values[match.group(1)] = value
+                    position = following
+                    continue
+            except LuaError:
+                pass
+        newline = text.find("\n", position)
+        if newline < 0:
+            return values
+        position = newline + 1
+
+
+def dumps(value, indent="\t", level=0):
+    """Write a value as a Lua expression
+
+    Args:
+        value: None, bool, int, float, str, or a list or dict of those.
+        indent (str): Indentation of nested table entries, None writes each table on one line.
+        level (int): Indentation level of the value itself.
+
+    Returns:
+        str: Lua expression, prefix with "return " to make a file
+    """
+    return _dump(value, indent, level)
+
+
+def _value(text, position):
+    if position >= len(text):
+        raise LuaError("Unexpected end of text", text, position)
+    char = text[position]
+    if char == "{":
+        return _table(text, position + 1)
+    if char in _STRING:
+        match = _STRING[char].match(text, position)
+        if match is None:
+            raise LuaError("Unterminated string", text, position)
+        value = match.group(1)
+        return (_ESCAPE.sub(_unescape, value) if "\\" in value else value), match.end()
+    if char == "[":
+        match = _LONG_STRING.match(text, position)
+        if match is None:
+            raise LuaError("Unterminated long string", text, position)
+        return match.group(2), match.end()
+    if char == "-":
+        value, position = _value(text, _SKIP.match(text, position + 1).end())
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise LuaError("Expected a number after -", text, position)
+        return -value, position
+    match = _NUMBER.match(text, position)
+    if match is not None:
+        number = match.group()
+        if number[:2] in ("0x", "0X"):
+            return int(number, 16), match.end()
+        if "." in number or "e" in number or "E" in number:
+            return float(number), match.end()
+        return int(number), match.end()
+    match = _NAME.match(text, position)
+    if match is not None and match.group() in _CONSTANTS:
+        return _CONSTANTS[match.group()], match.end()
+    raise LuaError("Unexpected {!r}".format(text[position:position + 20]), text, position)
+
+
+def _table(text, position):
+    array = []
+    items = {}
+    skip = _SKIP.match
+    entry = _ENTRY.match
+    while True:
+        match = entry(text, position)
+        if match is not None:  # Fast path for the common name = "string" / number / boolean entries
+            key, double_quoted, single_quoted, number, constant, separator = match.groups()
+            if double_quoted is not None:
+                value = double_quoted
+            elif single_quoted is not None:
+                value = single_quoted
+            elif number is not None:
+                value = float(number) if "." in number else int(number)
+            else:
+                value = _CONSTANTS[constant]
+            if key is None:
+                array.append(value)
+            elif key in _CONSTANTS:
+                raise LuaError("Expected a value", text, match.start(1))
+            else:
+                items[key] = value
+            position = match.end()
+            if separator is not None:
+                continue
+        else:
+            position = skip(text, position).end()
+            if position >= len(text):
+                raise LuaError("Unterminated table", text, position)
+            if text[position] == "}":
+                return _table_value(array, items), position + 1
+            position = _entry(text, position, array, items)
+
+        position = skip(text, position).end()
+        char = text[position:position + 1]
+        if char == "," or char == ";":
+            position += 1
+        elif char == "}":
+            return _table_value(array, items), position + 1
+        else:
+            raise LuaError("Expected , or }", text, position)
+
+
+def _entry(text, position, array, items):
+    skip = _SKIP.match
+    if text[position] == "[" and text[position + 1:position + 2] not in ("[", "="):
+        key, position = _value(text, skip(text, position + 1).end())
+        position = skip(text, position).end()
+        if text[position:position + 1] != "]":
+            raise LuaError("Expected ]", text, position)
+        position = skip(text, position + 1).end()
+        if text[position:position + 1] != "=":
+            raise LuaError("Expected =", text, position)
+        items[key], position = _value(text, skip(text, position + 1).end())
+        return position
+
+    match = _NAME.match(text, position)
+    if match is not None and match.group() not in _CONSTANTS:
+        position = skip(text, match.end()).end()
+        if text[position:position + 1] != "=" or text[position + 1:position + 2] == "=":
+            raise LuaError("Expected =", text, position)
+        items[match.group()], position = _value(text, skip(text, position + 1).end())
+        return position
+
+    value, position = _value(text, position)
+    array.append(value)
+    return position
+
+
+def _table_value(array, items):
+    if not items:
+        return array if array else {}
+    if array:
+        positional = dict(zip(range(1, len(array) + 1), array))
+        positional.update(items)
+        return positional
+    return items
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape[0].isdigit():
+        return chr(int(escape))
+    if escape[0] == "x":
+        return chr(int(escape[1:], 16))
+    if escape[0] == "z":
+        return ""
+    return _ESCAPES.get(escape, escape)
+
+
+def _dump(value, indent, level):
+    kind = type(value)
+    if kind is str:
+        if '"' in value or "\\" in value or not value.isprintable():
+            return '"' + _QUOTE.sub(_quote, value) + '"'
+        return '"' + value + '"'
+    if kind is bool:
+        return "true" if value else "false"
+    if kind is int:
+        return repr(value)
+    if value is None:
+        return "nil"
+    if isinstance(value, (dict, list, tuple)):
+        if not value:
+            return "{}"
+        if indent is None:
+            opening, separator, closing = "{ ", ", ", " }"
+        else:
+            opening = "{\n" + indent * (level + 1)
+            separator = ",\n" + indent * (level + 1)
+            closing = ",\n" + indent * level + "}"
+        level += 1
+        if isinstance(value, dict):
+            entries = [(key if type(key) is str and key.isidentifier() and key.isascii() and key not in _KEYWORDS
+                        else "[" + _dump(key, indent, level) + "]") + "=" + _dump(item, indent, level)
+                       for key, item in value.items()]
+        else:
+            entries = [_dump(item, indent, level) for item in value]
+        return opening + separator.join(entries) + closing
+    if isinstance(value, (int, float)):
+        if value != value or value in (float("inf"), float("-inf")):
+            raise ValueError("Can not write {} as a Lua number.".format(value))
+        return repr(value)
+    if isinstance(value, str):
+        return _dump(str(value), indent, level)
+    raise ValueError("Can not write {} as a Lua value.".format(type(value).__name__))
+
+
+def _quote(match):
+    return _QUOTES[match.group()]
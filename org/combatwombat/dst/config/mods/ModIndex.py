@@ -0,0 +1,122 @@
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.mods.ModInfo import ModInfo, MODINFO, mod_info_schema
+from os import path, scandir, stat
+from threading import RLock
+from marshmallow import ValidationError
+import json
+
+INDEX_VERSION = 1
+
+
+class ModIndex:
+    """Persistent index of the modinfo.lua of every mod in a mods directory.
+
+    Each modinfo.lua is parsed once. The result is kept in an index file together with the
+    modification time and size of the modinfo.lua it came from, so after a restart the index is
+    loaded from that file and refresh only parses mods that were added or changed since, at the
+    cost of one stat per mod. Mods whose modinfo.lua can not be read are indexed with their error,
+    so they are not parsed again until they change either.
+
+    Args:
+        mods_dir (str): Directory holding one folder per installed mod.
+        index_file (str):   File the index is persisted to.
+
+    Attributes:
+        mods_dir (str): Directory holding one folder per installed mod.
+        index_file (str):   File the index is persisted to.
+    """
+
+    def __init__(self, mods_dir, index_file):
+        self.mods_dir = mods_dir
+        self.index_file = index_file
+        self._entries = None
+        self._mods = {}
+        self._lock = RLock()
+
+    def load(self):
+        """Read the index file, does nothing if already loaded. A missing or unreadable file starts an empty index"""
+        with self._lock:
+            if self._entries is not None:
+                return
+            try:
+                with open(self.index_file, 'r') as index_file:
+                    data = json.load(index_file)
+                self._entries = data["mods"] if data.get("version") == INDEX_VERSION else {}
+            except (OSError, ValueError, KeyError, AttributeError):
+                self._entries = {}
+
+    def refresh(self):
+        """Index mods added or changed since the last refresh and forget removed ones, saving the index if it changed
+
+        Returns:
+            dict: Folder names that were "parsed" and "removed"
+        """
+        with self._lock:
+            self.load()
+            parsed = []
+            seen = set()
+            if path.isdir(self.mods_dir):
+                with scandir(self.mods_dir) as entries:
+                    for entry in entries:
+                        if not entry.is_dir():
+                            continue
+                        try:
+                            info = stat(path.join(entry.path, MODINFO))
+                        except OSError:
+                            continue
+                        seen.add(entry.name)
+                        indexed = self._entries.get(entry.name)
+                        if indexed is not None and indexed["mtime_ns"] == info.st_mtime_ns \
+                                and indexed["size"] == info.st_size:
+                            continue
+                        self._entries[entry.name] = self._parse(entry.name, entry.path, info)
+                        self._mods.pop(entry.name, None)
+                        parsed.append(entry.name)
+            removed = [folder for folder in self._entries if folder not in seen]
+            for folder in removed:
+                del self._entries[folder]
+                self._mods.pop(folder, None)
+            if parsed or removed:
+                self.save()
+            return {"parsed": sorted(parsed), "removed": sorted(removed)}
+
+    def save(self):
+        """Write the index file atomically"""
+        with self._lock:
+            ini.atomic_write(self.index_file, json.dumps({"version": INDEX_VERSION, "mods": self._entries or {}}))
+
+    def get(self, folder):
+        """Returns the ModInfo of a mod folder, None if it is not indexed or its modinfo.lua could not be read"""
+        with self._lock:
+            self.load()
+            mod = self._mods.get(folder)
+            if mod is None:
+                entry = self._entries.get(folder)
+                if entry is None or "info" not in entry:
+                    return None
+                mod = self._mods[folder] = mod_info_schema.load(entry["info"])
+            return mod
+
+    def mods(self):
+        """Returns the indexed metadata of every readable mod, as dumped by ModInfoSchema, by folder"""
+        with self._lock:
+            self.load()
+            return {folder: entry["info"] for folder, entry in sorted(self._entries.items()) if "info" in entry}
+
+    def errors(self):
+        """Returns the error message of every mod whose modinfo.lua could not be read, by folder"""
+        with self._lock:
+            self.load()
+            return {folder: entry["error"] for folder, entry in sorted(self._entries.items()) if "error" in entry}
+
+    @staticmethod
+    def _parse(folder, directory, info):
+        entry = {"mtime_ns": info.st_mtime_ns, "size": info.st_size}
+        try:
+            with open(path.join(directory, MODINFO), 'r', encoding='utf-8', errors='replace') as modinfo:
+                entry["info"] = mod_info_schema.dump(ModInfo.from_lua(folder, modinfo.read()))
+        except ValidationError as error:
+            entry["error"] = json.dumps(error.messages)
+        except (OSError, ValueError) as error:
+            entry["error"] = str(error)
+        return entry
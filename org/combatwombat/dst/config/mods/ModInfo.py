@@ -0,0 +1,109 @@
+from org.combatwombat.dst.config import lua
+from marshmallow import EXCLUDE, Schema, fields, post_load
+import sys
+
+MODINFO = "modinfo.lua"
+WORKSHOP_PREFIX = "workshop-"
+
+
+class ModInfo:
+    """Metadata of an installed mod, read from its modinfo.lua
+
+    Args:
+        folder (str):   Name of the mod's folder in the mods directory, such as workshop-378160973.
+        name (str): Display name.
+        description (str):  Description shown in the mod list.
+        author (str):   Mod author.
+        version (str):  Mod version.
+        api_version (int):  Mod API version.
+        dst_compatible (bool):  Whether the mod supports Don't Starve Together.
+        client_only_mod (bool): Whether only clients run the mod.
+        all_clients_require_mod (bool): Whether every player must have the mod installed.
+        server_filter_tags (list):  Tags shown in the server browser.
+        configuration_options (list):   Options the mod can be configured with, each a dict with its
+            "name", "label", "options" (dicts with a "description" and "data") and "default".
+
+    Attributes:
+        folder (str):   Name of the mod's folder in the mods directory.
+        name (str): Display name.
+        description (str):  Description shown in the mod list.
+        author (str):   Mod author.
+        version (str):  Mod version.
+        api_version (int):  Mod API version.
+        dst_compatible (bool):  Whether the mod supports Don't Starve Together.
+        client_only_mod (bool): Whether only clients run the mod.
+        all_clients_require_mod (bool): Whether every player must have the mod installed.
+        server_filter_tags (list):  Tags shown in the server browser.
+        configuration_options (list):   Options the mod can be configured with.
+    """
+    __slots__ = ("folder", "name", "description", "author", "version", "api_version", "dst_compatible",
+                 "client_only_mod", "all_clients_require_mod", "server_filter_tags", "configuration_options")
+
+    def __init__(self, folder, name="", description="", author="", version="", api_version=None,
+                 dst_compatible=False, client_only_mod=False, all_clients_require_mod=False,
+                 server_filter_tags=None, configuration_options=None):
+        self.folder = sys.intern(folder)
+        self.name = name
+        self.description = description
+        self.author = author
+        self.version = version
+        self.api_version = api_version
+        self.dst_compatible = dst_compatible
+        self.client_only_mod = client_only_mod
+        self.all_clients_require_mod = all_clients_require_mod
+        self.server_filter_tags = server_filter_tags if server_filter_tags is not None else []
+        self.configuration_options = configuration_options if configuration_options is not None else []
+
+    @property
+    def workshop_id(self):
+        """Steam Workshop id of the mod, None if it was not installed from the Workshop"""
+        if self.folder.startswith(WORKSHOP_PREFIX):
+            return self.folder[len(WORKSHOP_PREFIX):]
+        return None
+
+    def defaults(self):
+        """Returns the default value of every configuration option by option name"""
+        return {option["name"]: option.get("default") for option in self.configuration_options
+                if isinstance(option, dict) and isinstance(option.get("name"), str) and option["name"]}
+
+    @staticmethod
+    def from_lua(folder, text):
+        """Builds class from the text of a modinfo.lua
+
+        Values a modinfo.lua computes, rather than assigns, are left at their defaults.
+        """
+        values = lua.assignments(text)
+        values["folder"] = folder
+        for key in ("name", "description", "author", "version"):
+            if isinstance(values.get(key), (int, float)) and not isinstance(values[key], bool):
+                values[key] = str(values[key])
+        if not isinstance(values.get("configuration_options"), list):
+            values.pop("configuration_options", None)
+        if not isinstance(values.get("server_filter_tags"), list):
+            values.pop("server_filter_tags", None)
+        return mod_info_schema.load(values, unknown=EXCLUDE)
+
+    def to_json(self):
+        """Turns configuration class into JSON"""
+        return mod_info_schema.dumps(self)
+
+
+class ModInfoSchema(Schema):
+    folder = fields.String(required=True)
+    name = fields.String()
+    description = fields.String()
+    author = fields.String()
+    version = fields.String()
+    api_version = fields.Integer(allow_none=True)
+    dst_compatible = fields.Boolean()
+    client_only_mod = fields.Boolean()
+    all_clients_require_mod = fields.Boolean()
+    server_filter_tags = fields.List(fields.String())
+    configuration_options = fields.List(fields.Dict())
+
+    @post_load
+    def make_mod_info(self, data, **kwargs):
+        return ModInfo(**data)
+
+
+mod_info_schema = ModInfoSchema()
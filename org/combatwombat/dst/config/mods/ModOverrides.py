@@ -0,0 +1,155 @@
+from org.combatwombat.dst.config import ini, lua
+from org.combatwombat.dst.config.mods.ModInfo import WORKSHOP_PREFIX
+from marshmallow import Schema, ValidationError, fields, post_load
+import re
+
+MODOVERRIDES = "modoverrides.lua"
+SERVER_MODS_SETUP = "dedicated_server_mods_setup.lua"
+
+_WORKSHOP_ID = re.compile(r"^\d+$")
+
+
+class ModOverrides:
+    """Mods enabled on a shard and their configuration, read from and written to the shard's modoverrides.lua
+
+    Args:
+        mods (dict):    Settings by mod folder, such as workshop-378160973. Each holds whether the mod
+            is "enabled" and its "configuration_options" by option name.
+
+    Attributes:
+        mods (dict):    Settings by mod folder.
+    """
+    __slots__ = ("mods",)
+
+    def __init__(self, mods=None):
+        self.mods = mods if mods is not None else {}
+
+    def with_defaults(self, mod_index):
+        """Returns a copy with every configuration option a mod's modinfo.lua defines but this leaves unset
+
+        Args:
+            mod_index (ModIndex):   Index of the installed mods, mods it does not know are copied as they are.
+        """
+        mods = {}
+        for folder, settings in self.mods.items():
+            info = mod_index.get(folder)
+            options = dict(info.defaults()) if info is not None else {}
+            options.update(settings.get("configuration_options", {}))
+            mods[folder] = {"enabled": settings.get("enabled", True), "configuration_options": options}
+        return ModOverrides(mods)
+
+    def workshop_ids(self):
+        """Returns the Steam Workshop ids of the enabled mods installed from the Workshop"""
+        return sorted(folder[len(WORKSHOP_PREFIX):] for folder, settings in self.mods.items()
+                      if settings.get("enabled", True) and folder.startswith(WORKSHOP_PREFIX))
+
+    def to_lua(self):
+        """Turns configuration class into the Lua table of a modoverrides.lua"""
+        return "return " + lua.dumps({folder: {"configuration_options": settings.get("configuration_options", {}),
+                                               "enabled": settings.get("enabled", True)}
+                                      for folder, settings in self.mods.items()}) + "\n"
+
+    @staticmethod
+    def from_lua(text):
+        """Builds class from the Lua table of a modoverrides.lua
+
+        Raises:
+            LuaError: If the text is not a Lua table.
+            ValidationError: If the table's settings are not valid.
+        """
+        table = lua.loads(text)
+        if not isinstance(table, dict):
+            raise ValidationError("A modoverrides.lua must return a table of mods.")
+        return mod_overrides_schema.load({"mods": table})
+
+    def write_lua(self, file):
+        """Write configuration data to specified file path
+
+        The file is replaced atomically and left alone if it already holds this configuration.
+
+        Args:
+            file (str): Path to write configuration file
+
+        Returns:
+            bool: True if the file was written, False if it already held this configuration
+        """
+        text = self.to_lua()
+        try:
+            with open(file, 'r') as lua_file:
+                if lua_file.read() == text:
+                    return False
+        except FileNotFoundError:
+            pass
+        ini.atomic_write(file, text)
+        ini.notify_written(file, self)
+        return True
+
+    @staticmethod
+    def read_lua(file):
+        """Read configuration data from specified file path
+
+        Args:
+            file (str): Path to read configuration file
+
+        Returns:
+            ModOverrides: Configuration read from the file
+        """
+        with open(file, 'r') as lua_file:
+            return ModOverrides.from_lua(lua_file.read())
+
+    def to_json(self):
+        """Turns configuration class into JSON"""
+        return mod_overrides_schema.dumps(self)
+
+
+def server_mods_setup(workshop_ids, collections=()):
+    """Text of a dedicated_server_mods_setup.lua downloading Workshop mods and collections when the server starts
+
+    Args:
+        workshop_ids (iterable):    Steam Workshop ids of mods.
+        collections (iterable): Steam Workshop ids of mod collections.
+
+    Raises:
+        ValueError: If an id is not a number.
+    """
+    lines = []
+    for function, ids in (("ServerModSetup", workshop_ids), ("ServerModCollectionSetup", collections)):
+        for workshop_id in sorted(set(str(workshop_id) for workshop_id in ids)):
+            if not _WORKSHOP_ID.match(workshop_id):
+                raise ValueError("Invalid Steam Workshop id {!r}.".format(workshop_id))
+            lines.append('{}("{}")'.format(function, workshop_id))
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def write_server_mods_setup(file, workshop_ids, collections=()):
+    """Write a dedicated_server_mods_setup.lua atomically, if it does not already hold these mods
+
+    Returns:
+        bool: True if the file was written, False if it already held these mods
+    """
+    text = server_mods_setup(workshop_ids, collections)
+    try:
+        with open(file, 'r') as lua_file:
+            if lua_file.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    ini.atomic_write(file, text)
+    return True
+
+
+class ModSettingsSchema(Schema):
+    enabled = fields.Boolean(load_default=True)
+    configuration_options = fields.Dict(keys=fields.String(), load_default=dict)
+
+
+class ModOverridesSchema(Schema):
+    mods = fields.Dict(keys=fields.String(validate=lambda folder: bool(folder) and "/" not in folder),
+                       values=fields.Nested(ModSettingsSchema))
+
+    @post_load
+    def make_mod_overrides(self, data, **kwargs):
+        return ModOverrides(**data)
+
+
+mod_overrides_schema = ModOverridesSchema()
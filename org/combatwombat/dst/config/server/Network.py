@@ -14,6 +14,8 @@ class Network:
             to see it in their server listing.
             Ports below 1024 are restricted to privileged users on some operating systems.
     """
+    __slots__ = ("server_port",)
+
     def __init__(self, port=10999):
         self.server_port = port
 
@@ -22,16 +24,24 @@ class Network:
             config.add_section("NETWORK")
         config.set("NETWORK", "server_port", str(self.server_port))
 
+    @staticmethod
+    def from_config(config):
+        """Builds class from the NETWORK section of a config object"""
+        if not config.has_section("NETWORK"):
+            return Network()
+        return network_schema.load({"port": config.get("NETWORK", "server_port", fallback=10999)})
+
     def to_json(self):
         """Turns configuration class into JSON"""
-        return NetworkSchema().dumps(self)
+        return network_schema.dumps(self)
 
 
 class NetworkSchema(Schema):
-    port = fields.Integer(required=True, validate=validate.Range(10998, 11018))
+    port = fields.Integer(required=True, attribute="server_port", validate=validate.Range(10998, 11018))
 
     @post_load
     def make_network(self, data, **kwargs):
-        return Network(**data)
+        return Network(port=data["server_port"])
 
 
+network_schema = NetworkSchema()
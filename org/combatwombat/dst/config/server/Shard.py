@@ -1,5 +1,5 @@
-from random import random
-from marshmallow import Schema, fields, post_load
+from sys import intern
+from marshmallow import EXCLUDE, Schema, fields, post_load
 
 
 class Shard:
@@ -9,6 +9,7 @@ class Shard:
         is_master (bool):   Sets a shard to be the master shard for a cluster.
         name (str):   This is the name of the shard that will show up in log files.
         shard_id (int):  This is field is automatically generated for non-master servers.
+            Leave as None to let the server generate it.
 
     Attributes:
         is_master (bool):   Sets a shard to be the master shard for a cluster.
@@ -23,10 +24,12 @@ class Shard:
             Altering this or removing it may cause problems on your server if anybody’s
             character currently resides in the world that this server manages.
     """
-    def __init__(self, is_master=True, name="", shard_id=random()):
+    __slots__ = ("is_master", "name", "id")
+
+    def __init__(self, is_master=True, name="", shard_id=None):
         self.is_master = is_master
-        self.name = name
-        self.id = shard_id if (self.is_master is None) else None
+        self.name = intern(name)
+        self.id = shard_id
 
     def set_config(self, config):
         """Sets config object with configurations from this class"""
@@ -34,18 +37,33 @@ class Shard:
             config.add_section("SHARD")
         config.set("SHARD", "is_master", str(self.is_master))
         config.set("SHARD", "name", self.name)
-        config.set("SHARD", "id", str(self.id))
+        if self.id is not None:
+            config.set("SHARD", "id", str(self.id))
+
+    @staticmethod
+    def from_config(config):
+        """Builds class from the SHARD section of a config object"""
+        if not config.has_section("SHARD"):
+            return Shard()
+        data = dict(config.items("SHARD"))
+        shard_id = data.pop("id", "None")
+        if shard_id not in ("None", ""):
+            data["shard_id"] = shard_id
+        return shard_schema.load(data, unknown=EXCLUDE)
 
     def to_json(self):
         """Turns configuration class into JSON"""
-        return ShardSchema().dumps(self)
+        return shard_schema.dumps(self)
 
 
 class ShardSchema(Schema):
     is_master = fields.Boolean()
     name = fields.Str(required=True)
-    shard_id = fields.Integer()
+    shard_id = fields.Integer(attribute="id", allow_none=True)
 
     @post_load
     def make_shard(self, data, **kwargs):
-        return Shard(**data)
+        return Shard(is_master=data.get("is_master", True), name=data["name"], shard_id=data.get("id"))
+
+
+shard_schema = ShardSchema()
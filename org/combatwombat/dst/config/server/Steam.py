@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, post_load
+from marshmallow import EXCLUDE, Schema, fields, post_load
 
 
 class Steam:
@@ -14,6 +14,8 @@ class Steam:
         master_server_port (int):   Internal port used by steam.
             Make sure that this is different for each server you run on the same machine.
     """
+    __slots__ = ("authentication_port", "master_server_port")
+
     def __init__(self, authentication_port=8766, master_server_port=27016):
         self.authentication_port = authentication_port
         self.master_server_port = master_server_port
@@ -25,9 +27,16 @@ class Steam:
         config.set("STEAM", "authentication_port", str(self.authentication_port))
         config.set("STEAM", "master_server_port", str(self.master_server_port))
 
+    @staticmethod
+    def from_config(config):
+        """Builds class from the STEAM section of a config object"""
+        if not config.has_section("STEAM"):
+            return Steam()
+        return steam_schema.load(dict(config.items("STEAM")), unknown=EXCLUDE)
+
     def to_json(self):
         """Turns configuration class into JSON"""
-        return SteamSchema().dumps(self)
+        return steam_schema.dumps(self)
 
 
 class SteamSchema(Schema):
@@ -37,3 +46,6 @@ class SteamSchema(Schema):
     @post_load
     def make_steam(self, data, **kwargs):
         return Steam(**data)
+
+
+steam_schema = SteamSchema()
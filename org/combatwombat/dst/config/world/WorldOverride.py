@@ -0,0 +1,129 @@
+from org.combatwombat.dst.config import ini, lua
+from marshmallow import Schema, ValidationError, fields, post_load, pre_load
+import re
+
+WORLDGEN_OVERRIDE = "worldgenoverride.lua"
+LEVELDATA_OVERRIDE = "leveldataoverride.lua"
+WORLD_FILES = (WORLDGEN_OVERRIDE, LEVELDATA_OVERRIDE)
+
+_SETTING_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class WorldOverride:
+    """World generation and level settings of a shard, read from and written to worldgenoverride.lua or
+    leveldataoverride.lua in the shard's directory.
+
+    Args:
+        override_enabled (bool):    Whether the game applies these settings.
+        preset (str):   Preset the overrides start from, such as SURVIVAL_TOGETHER or DST_CAVE.
+        overrides (dict):   World settings by name, such as {"season_start": "autumn", "spiders": "often"}.
+        extra (dict):   Other keys of the file, such as the id, name and location of a leveldataoverride.lua,
+            kept so they are written back unchanged.
+
+    Attributes:
+        override_enabled (bool):    Whether the game applies these settings.
+        preset (str):   Preset the overrides start from, None if the file does not name one.
+        overrides (dict):   World settings by name, each a string, number or boolean.
+        extra (dict):   Other keys of the file.
+    """
+    __slots__ = ("override_enabled", "preset", "overrides", "extra")
+
+    def __init__(self, override_enabled=True, preset=None, overrides=None, extra=None):
+        self.override_enabled = override_enabled
+        self.preset = preset
+        self.overrides = overrides if overrides is not None else {}
+        self.extra = extra if extra is not None else {}
+
+    def to_lua(self):
+        """Turns configuration class into the Lua table of a worldgenoverride.lua or leveldataoverride.lua"""
+        table = dict(self.extra)
+        table["override_enabled"] = self.override_enabled
+        if self.preset is not None:
+            table["preset"] = self.preset
+        table["overrides"] = self.overrides
+        return "return " + lua.dumps(table) + "\n"
+
+    @staticmethod
+    def from_lua(text):
+        """Builds class from the Lua table of a worldgenoverride.lua or leveldataoverride.lua
+
+        Raises:
+            LuaError: If the text is not a Lua table.
+            ValidationError: If the table's settings are not valid.
+        """
+        table = lua.loads(text)
+        if not isinstance(table, dict):
+            raise ValidationError("A world override file must return a table of settings.")
+        return world_override_schema.load(table)
+
+    def write_lua(self, file):
+        """Write configuration data to specified file path
+
+        The file is replaced atomically and left alone if it already holds this configuration.
+
+        Args:
+            file (str): Path to write configuration file
+
+        Returns:
+            bool: True if the file was written, False if it already held this configuration
+        """
+        text = self.to_lua()
+        try:
+            with open(file, 'r') as lua_file:
+                if lua_file.read() == text:
+                    return False
+        except FileNotFoundError:
+            pass
+        ini.atomic_write(file, text)
+        ini.notify_written(file, self)
+        return True
+
+    @staticmethod
+    def read_lua(file):
+        """Read configuration data from specified file path
+
+        Args:
+            file (str): Path to read configuration file
+
+        Returns:
+            WorldOverride: Configuration read from the file
+        """
+        with open(file, 'r') as lua_file:
+            return WorldOverride.from_lua(lua_file.read())
+
+    def to_json(self):
+        """Turns configuration class into JSON"""
+        return world_override_schema.dumps(self)
+
+
+def _check_overrides(overrides):
+    for name, value in overrides.items():
+        if not isinstance(name, str) or not _SETTING_NAME.match(name):
+            raise ValidationError("Invalid setting name {!r}.".format(name))
+        if not isinstance(value, (str, int, float)):
+            raise ValidationError("Setting {} must be a string, number or boolean.".format(name))
+
+
+class WorldOverrideSchema(Schema):
+    override_enabled = fields.Boolean()
+    preset = fields.String(allow_none=True)
+    overrides = fields.Dict(validate=_check_overrides)
+    extra = fields.Dict()
+
+    @pre_load
+    def collect_extra(self, data, **kwargs):
+        """Moves the keys of a Lua table this schema has no field for into extra"""
+        if not isinstance(data, dict) or "extra" in data:
+            return data
+        known = {key: value for key, value in data.items() if key in self.fields}
+        extra = {key: value for key, value in data.items() if key not in self.fields}
+        if extra:
+            known["extra"] = extra
+        return known
+
+    @post_load
+    def make_world_override(self, data, **kwargs):
+        return WorldOverride(**data)
+
+
+world_override_schema = WorldOverrideSchema()
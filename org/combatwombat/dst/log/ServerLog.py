@@ -0,0 +1,193 @@
+from bisect import bisect_right
+from mmap import mmap, ACCESS_READ
+from os import stat
+from threading import Lock
+import re
+import time
+
+LOG_FILE = "server_log.txt"
+_TIMESTAMP = re.compile(rb"\[(\d+):(\d\d):(\d\d)\]")
+
+
+def parse_time(text):
+    """Seconds since server start for a HH:MM or HH:MM:SS string as used in server_log.txt"""
+    parts = [int(part) for part in text.split(":")]
+    if len(parts) == 2:
+        parts.append(0)
+    if len(parts) != 3:
+        raise ValueError("Expected HH:MM or HH:MM:SS, got {!r}.".format(text))
+    hours, minutes, seconds = parts
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def line_time(line):
+    """Seconds since server start of a log line, or None if it has no timestamp"""
+    match = _TIMESTAMP.match(line)
+    if match is None:
+        return None
+    return int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3))
+
+
+class ServerLog:
+    """Incremental reader and time index for a dedicated server log file.
+
+    server_log.txt lines start with the time since the server started, e.g. "[00:01:23]: ...".
+    The index keeps one (time, offset) pair per index_step bytes of log. Building it jumps index_step
+    bytes at a time instead of visiting every line, it is only extended over bytes added since the
+    last lookup, and it is reset when the file is replaced or truncated by a restart.
+    Time range lookups seek to the closest indexed offset instead of scanning from the start.
+    Files are scanned through mmap, so only the pages actually touched are read.
+
+    Args:
+        file (str): Path of the log file.
+        index_step (int):   Approximate number of bytes between index entries.
+
+    Attributes:
+        file (str): Path of the log file.
+        index_step (int):   Approximate number of bytes between index entries.
+    """
+
+    def __init__(self, file, index_step=64 * 1024):
+        self.file = file
+        self.index_step = index_step
+        self._times = []
+        self._offsets = []
+        self._search = 0
+        self._size = 0
+        self._inode = None
+        self._lock = Lock()
+
+    def read_from(self, offset, max_bytes=1024 * 1024):
+        """Read complete lines added after an offset
+
+        Args:
+            offset (int):   Byte offset to continue from, as returned by an earlier call. Offsets past the
+                end of the file, after a restart truncated it, start again from the beginning.
+            max_bytes (int):    Maximum number of bytes to read.
+
+        Returns:
+            tuple: List of lines and the offset to continue from
+        """
+        with open(self.file, 'rb') as log_file:
+            size = log_file.seek(0, 2)
+            if offset > size:
+                offset = 0
+            log_file.seek(offset)
+            data = log_file.read(max_bytes)
+        end = data.rfind(b"\n") + 1
+        return _decode(data[:end]), offset + end
+
+    def tail(self, lines=100, block_size=64 * 1024):
+        """Read the last lines of the file by seeking backwards from the end
+
+        Returns:
+            tuple: List of at most lines lines and the end offset, to continue with read_from
+        """
+        with open(self.file, 'rb') as log_file:
+            end = log_file.seek(0, 2)
+            position = end
+            data = b""
+            while position > 0 and data.count(b"\n") <= lines:
+                step = min(block_size, position)
+                position -= step
+                log_file.seek(position)
+                data = log_file.read(step) + data
+        result = _decode(data)
+        return result[-lines:] if lines else [], end
+
+    def follow(self, offset=None, interval=0.5, keepalive=None):
+        """Yield lines as they are appended, starting at an offset or at the current end of the file
+
+        Args:
+            offset (int):   Byte offset to start from, the current end of the file when None.
+            interval (float):   Seconds between checks for new lines.
+            keepalive (float):  Yield None after this many seconds without a new line, never when None.
+        """
+        if offset is None:
+            offset = stat(self.file).st_size
+        idle_since = time.monotonic()
+        while True:
+            lines, offset = self.read_from(offset)
+            yield from lines
+            if lines:
+                idle_since = time.monotonic()
+                continue
+            if keepalive is not None and time.monotonic() - idle_since >= keepalive:
+                idle_since = time.monotonic()
+                yield None
+            time.sleep(interval)
+
+    def between(self, start, end, limit=10000):
+        """Read lines logged between two times, using the index to seek close to the start
+
+        Args:
+            start (int):    First second since server start to include.
+            end (int):  Last second since server start to include.
+            limit (int):    Maximum number of lines to return.
+
+        Returns:
+            list: Lines in the time range. Lines without a timestamp follow the line before them.
+        """
+        result = []
+        with open(self.file, 'rb') as log_file:
+            size = log_file.seek(0, 2)
+            if size == 0:
+                return result
+            with mmap(log_file.fileno(), 0, access=ACCESS_READ) as data:
+                position = self._seek_offset(data, start)
+                current = None
+                while position < size and len(result) < limit:
+                    newline = data.find(b"\n", position)
+                    line_end = size if newline < 0 else newline
+                    line = data[position:line_end]
+                    position = line_end + 1
+                    seconds = line_time(line)
+                    if seconds is not None:
+                        current = seconds
+                    if current is None or current < start:
+                        continue
+                    if current > end:
+                        break
+                    result.append(line)
+        return _decode(b"\n".join(result) + b"\n") if result else []
+
+    def index_size(self):
+        """Returns the number of entries in the time index"""
+        return len(self._offsets)
+
+    def _seek_offset(self, data, start):
+        with self._lock:
+            self._update_index(data)
+            position = bisect_right(self._times, start - 1) - 1
+            return self._offsets[position] if position >= 0 else 0
+
+    def _update_index(self, data):
+        size = len(data)
+        inode = stat(self.file).st_ino
+        if inode != self._inode or size < self._size:
+            self._times, self._offsets, self._search, self._inode = [], [], 0, inode
+        self._size = size
+        search = self._search
+        while search < size:
+            if search == 0:
+                line_start = 0
+            else:
+                newline = data.find(b"\n", search - 1)
+                if newline < 0:
+                    break
+                line_start = newline + 1
+            line_end = data.find(b"\n", line_start)
+            if line_end < 0:
+                break
+            seconds = line_time(data[line_start:line_start + 16])
+            if seconds is None:
+                search = line_end + 1
+                continue
+            self._times.append(seconds)
+            self._offsets.append(line_start)
+            search = line_start + self.index_step
+        self._search = search
+
+
+def _decode(data):
+    return data.decode("utf-8", errors="replace").splitlines()
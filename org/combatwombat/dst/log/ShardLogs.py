@@ -0,0 +1,65 @@
+from org.combatwombat.dst.config.ClusterDirectory import CLUSTER_INI, SERVER_INI
+from org.combatwombat.dst.config.Server import Server
+from org.combatwombat.dst.log.ServerLog import ServerLog, LOG_FILE
+from configparser import Error as ConfigParserError
+from os import path, scandir
+from threading import Lock
+from marshmallow import ValidationError
+
+
+class ShardLogs:
+    """Finds the server_log.txt of a shard below a clusters root and keeps one ServerLog per file.
+
+    Shards are looked up by their directory name or by the name in their server.ini, and keeping
+    the ServerLog objects around means their time indexes are reused between requests.
+
+    Args:
+        clusters_root (str):    Directory holding one sub directory per cluster.
+
+    Attributes:
+        clusters_root (str):    Directory holding one sub directory per cluster.
+    """
+
+    def __init__(self, clusters_root):
+        self.clusters_root = clusters_root
+        self._logs = {}
+        self._lock = Lock()
+
+    def log(self, cluster, shard):
+        """Returns the ServerLog of a shard
+
+        Args:
+            cluster (str):  Name of the cluster directory.
+            shard (str):    Shard directory name or the shard name from its server.ini.
+
+        Raises:
+            ValueError: If the cluster, shard or log file does not exist
+        """
+        file = path.join(self._shard_dir(cluster, shard), LOG_FILE)
+        if not path.isfile(file):
+            raise ValueError("Shard {}/{} has no {}.".format(cluster, shard, LOG_FILE))
+        with self._lock:
+            if file not in self._logs:
+                self._logs[file] = ServerLog(file)
+            return self._logs[file]
+
+    def _shard_dir(self, cluster, shard):
+        for name in (cluster, shard):
+            if not name or path.basename(name) != name or name in (".", ".."):
+                raise ValueError("Invalid name {!r}.".format(name))
+        cluster_dir = path.join(self.clusters_root, cluster)
+        if not path.isfile(path.join(cluster_dir, CLUSTER_INI)):
+            raise ValueError("Unknown cluster {}.".format(cluster))
+        if path.isdir(path.join(cluster_dir, shard)):
+            return path.join(cluster_dir, shard)
+        with scandir(cluster_dir) as entries:
+            for entry in entries:
+                server_ini = path.join(entry.path, SERVER_INI)
+                if not entry.is_dir() or not path.isfile(server_ini):
+                    continue
+                try:
+                    if Server.load_ini(server_ini).shard.name == shard:
+                        return entry.path
+                except (OSError, ConfigParserError, ValidationError, ValueError):
+                    continue
+        raise ValueError("Unknown shard {}/{}.".format(cluster, shard))
@@ -0,0 +1,211 @@
+"""Sending console commands to running shards and collecting their responses.
+
+The dedicated server reads Lua console commands from its stdin when started with -console and
+console_enabled is set in cluster.ini. Each shard gets a ShardConsole with a bounded queue and a
+writer thread sending one command at a time, so commands to one shard keep their order while
+every shard works through its queue in parallel. A fleet wide c_save() takes as long as the
+slowest shard, not the sum of all of them. Commands are refused when a shard's queue is full and
+carry a deadline, so a command still queued or unanswered when it passes fails with a timeout.
+
+The console does not tag its output, so every command is followed by a print of a unique marker.
+Console commands run one after the other, so the lines output between a command and its marker
+are its response. The marker is printed as a concatenation, so an echo of the command text does
+not contain it, and lines holding an earlier, timed out command's marker are left out.
+"""
+from org.combatwombat.dst.config import lua
+from org.combatwombat.dst.config.Cluster import LazyCluster
+from org.combatwombat.dst.config.ClusterDirectory import CLUSTER_INI
+from concurrent.futures import Future
+from configparser import Error as ConfigParserError
+from itertools import count
+from os import path
+from queue import Full, Queue
+from threading import Event, Lock, Thread
+from timeit import default_timer
+from marshmallow import ValidationError
+
+SAVE_COMMAND = "c_save()"
+MARKER_PREFIX = "dst-gui-console"
+
+
+def announce_command(message):
+    """Returns the c_announce command broadcasting a message to every player of a shard"""
+    return "c_announce({})".format(lua.dumps(str(message)))
+
+
+class ShardConsole:
+    """Queue of console commands sent to one shard process.
+
+    Args:
+        process (ShardProcess): Shard the commands are sent to.
+        queue_size (int):   Commands waiting to be sent before submit refuses new ones.
+
+    Attributes:
+        process (ShardProcess): Shard the commands are sent to.
+    """
+
+    _markers = count(1)
+
+    def __init__(self, process, queue_size=16):
+        self.process = process
+        self._queue = Queue(maxsize=queue_size)
+        self._pending = None
+        self._lock = Lock()
+        self._thread = None
+        process.add_output_listener(self._output)
+
+    def submit(self, command, deadline):
+        """Queue a command without waiting
+
+        Args:
+            command (str):  One line of Lua.
+            deadline (float):   default_timer() value by which the command must have been answered.
+
+        Returns:
+            Future: Resolves to the output lines of the command, or fails with TimeoutError once the deadline passed
+
+        Raises:
+            RuntimeError: If the queue is full.
+        """
+        future = Future()
+        try:
+            self._queue.put_nowait((command, future, deadline))
+        except Full:
+            raise RuntimeError("Console queue of shard {}/{} is full.".format(self.process.cluster,
+                                                                              self.process.shard))
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._write, daemon=True,
+                                      name="shard-console-{}-{}".format(self.process.cluster, self.process.shard))
+                self._thread.start()
+        return future
+
+    def _write(self):
+        while True:
+            command, future, deadline = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            if default_timer() >= deadline:
+                future.set_exception(TimeoutError("Timed out waiting in the console queue."))
+                continue
+            number = next(self._markers)
+            marker = "{}:{}".format(MARKER_PREFIX, number)
+            pending = (marker, [], Event())
+            with self._lock:
+                self._pending = pending
+            try:
+                self.process.send(command)
+                self.process.send('print("{}" .. ":{}")'.format(MARKER_PREFIX, number))
+                if pending[2].wait(deadline - default_timer()):
+                    future.set_result(pending[1])
+                else:
+                    future.set_exception(TimeoutError("No response before the timeout."))
+            except (OSError, RuntimeError) as error:
+                future.set_exception(error)
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def _output(self, line):
+        with self._lock:
+            pending = self._pending
+        if pending is None:
+            return
+        if pending[0] in line:
+            pending[2].set()
+        elif MARKER_PREFIX not in line and not pending[2].is_set():
+            pending[1].append(line)
+
+
+class ConsoleDispatcher:
+    """Sends console commands to many running shards concurrently.
+
+    Args:
+        supervisor (Supervisor):    Supervisor of the shard processes.
+        queue_size (int):   Commands waiting per shard before new ones are refused.
+        timeout (float):    Default seconds to wait for the shards' responses.
+        max_timeout (float):    Largest timeout a caller may ask for, longer ones are cut to it.
+
+    Attributes:
+        supervisor (Supervisor):    Supervisor of the shard processes.
+        queue_size (int):   Commands waiting per shard before new ones are refused.
+        timeout (float):    Default seconds to wait for the shards' responses.
+        max_timeout (float):    Largest timeout a caller may ask for, longer ones are cut to it.
+    """
+
+    def __init__(self, supervisor, queue_size=16, timeout=10.0, max_timeout=60.0):
+        self.supervisor = supervisor
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_timeout = max_timeout
+        self._consoles = {}
+        self._lock = Lock()
+
+    def send(self, command, clusters=None, shards=None, timeout=None):
+        """Send a command to every running shard, or those of some clusters, and wait for the responses
+
+        Args:
+            command (str):  One line of Lua.
+            clusters (list):    Cluster names, every cluster when None.
+            shards (list):  Shard names in each cluster, every shard when None.
+            timeout (float):    Seconds to wait for the responses of every shard, the dispatcher's timeout
+                when None, at most max_timeout.
+
+        Returns:
+            list: For each shard its "cluster", "shard", the "output" lines of the command and the
+                "elapsed" seconds, or an "error"
+
+        Raises:
+            ValueError: If the command is empty or spans several lines, or the timeout is not a positive number.
+        """
+        if not isinstance(command, str) or not command.strip() or "\n" in command or "\r" in command:
+            raise ValueError("Console commands must be a single line of Lua.")
+        if timeout is None:
+            timeout = self.timeout
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not timeout > 0:
+            raise ValueError("The timeout must be a positive number of seconds.")
+        start = default_timer()
+        deadline = start + min(timeout, self.max_timeout)
+        submitted = []
+        results = []
+        errors = {}
+        for status in self.supervisor.status(clusters):
+            if status["state"] != "running" or (shards is not None and status["shard"] not in shards):
+                continue
+            result = {"cluster": status["cluster"], "shard": status["shard"]}
+            if status["cluster"] not in errors:
+                errors[status["cluster"]] = self._console_error(status["cluster"])
+            if errors[status["cluster"]]:
+                results.append(dict(result, error=errors[status["cluster"]]))
+                continue
+            try:
+                submitted.append((result, self._console(status["cluster"], status["shard"]).submit(command, deadline)))
+            except (RuntimeError, ValueError) as error:
+                results.append(dict(result, error=str(error)))
+        for result, future in submitted:
+            try:
+                result["output"] = future.result(max(deadline - default_timer(), 0) + 1)
+            except (OSError, RuntimeError, TimeoutError) as error:
+                future.cancel()
+                result["error"] = str(error) or "No response before the timeout."
+            result["elapsed"] = default_timer() - start
+            results.append(result)
+        return results
+
+    def _console(self, cluster, shard):
+        process = self.supervisor.shard(cluster, shard)
+        with self._lock:
+            console = self._consoles.get(process)
+            if console is None:
+                console = self._consoles[process] = ShardConsole(process, self.queue_size)
+            return console
+
+    def _console_error(self, cluster):
+        """Why commands can not be sent to a cluster's shards, None if they can"""
+        try:
+            misc = LazyCluster.load(path.join(self.supervisor.clusters_root, cluster, CLUSTER_INI)).misc
+        except (OSError, ConfigParserError, ValidationError, ValueError) as error:
+            return "Can not read {}: {}".format(CLUSTER_INI, getattr(error, "messages", error))
+        if not misc.console_enabled:
+            return "console_enabled is off in {}.".format(CLUSTER_INI)
+        return None
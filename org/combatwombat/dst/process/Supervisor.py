@@ -0,0 +1,270 @@
+from org.combatwombat.dst.config.ClusterDirectory import CLUSTER_INI, SERVER_INI
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from os import path, scandir
+from threading import Lock, Thread
+from time import time
+import subprocess
+
+SHUTDOWN_COMMAND = "c_shutdown()"
+
+
+class ShardProcess:
+    """A running (or stopped) dedicated server process for one shard of a cluster.
+
+    Output is read line by line on a background thread, the most recent lines are kept in memory and
+    every line is passed to the output listeners.
+
+    Args:
+        cluster (str):  Name of the cluster directory.
+        shard (str):    Name of the shard directory inside the cluster.
+        command (list): Command line starting the shard.
+        cwd (str):  Working directory of the process.
+        output_lines (int): Number of output lines to keep.
+
+    Attributes:
+        cluster (str):  Name of the cluster directory.
+        shard (str):    Name of the shard directory inside the cluster.
+        command (list): Command line starting the shard.
+        cwd (str):  Working directory of the process.
+        output (deque): Most recent output lines.
+        state (str):    One of stopped, running, stopping or exited.
+        started_at (float): Time the process was last started.
+        process (Popen):    Underlying process, None before the first start.
+    """
+
+    def __init__(self, cluster, shard, command, cwd=None, output_lines=1000):
+        self.cluster = cluster
+        self.shard = shard
+        self.command = command
+        self.cwd = cwd
+        self.output = deque(maxlen=output_lines)
+        self.state = "stopped"
+        self.started_at = None
+        self.process = None
+        self._output_listeners = []
+        self._lock = Lock()
+
+    def start(self):
+        """Start the process unless it is already running"""
+        with self._lock:
+            if self.process is not None and self.process.poll() is None:
+                return
+            self.output.clear()
+            self.process = subprocess.Popen(self.command, cwd=self.cwd, stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                            text=True, bufsize=1, errors="replace")
+            self.state = "running"
+            self.started_at = time()
+            Thread(target=self._read_output, args=(self.process,), daemon=True,
+                   name="shard-output-{}-{}".format(self.cluster, self.shard)).start()
+
+    def stop(self, timeout=30):
+        """Ask the shard to shut down cleanly, terminating it if it has not exited after timeout seconds
+
+        Returns immediately, the shutdown continues on a background thread.
+        """
+        with self._lock:
+            process = self.process
+            if process is None or process.poll() is not None or self.state == "stopping":
+                return
+            self.state = "stopping"
+        Thread(target=self._shutdown, args=(process, timeout), daemon=True,
+               name="shard-stop-{}-{}".format(self.cluster, self.shard)).start()
+
+    def send(self, line):
+        """Write a console command line to the process's stdin"""
+        with self._lock:
+            if self.process is None or self.process.poll() is not None:
+                raise RuntimeError("Shard {}/{} is not running.".format(self.cluster, self.shard))
+            self.process.stdin.write(line + "\n")
+            self.process.stdin.flush()
+
+    def add_output_listener(self, listener):
+        """Call listener(line) for every output line read from now on, on the output reading thread"""
+        self._output_listeners.append(listener)
+
+    def remove_output_listener(self, listener):
+        """Stop calling a listener added with add_output_listener"""
+        if listener in self._output_listeners:
+            self._output_listeners.remove(listener)
+
+    def status(self):
+        """Returns the shard's state, pid, start time and exit code as a dict"""
+        process = self.process
+        return {
+            "cluster": self.cluster,
+            "shard": self.shard,
+            "state": self.state,
+            "pid": process.pid if process is not None else None,
+            "started_at": self.started_at,
+            "returncode": process.poll() if process is not None else None,
+        }
+
+    def _shutdown(self, process, timeout):
+        try:
+            self.send(SHUTDOWN_COMMAND)
+        except (OSError, RuntimeError):
+            pass
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def _read_output(self, process):
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            self.output.append(line)
+            for listener in tuple(self._output_listeners):
+                listener(line)
+        process.wait()
+        with self._lock:
+            if self.process is process:
+                self.state = "stopped" if self.state == "stopping" else "exited"
+
+
+class Supervisor:
+    """Starts, stops and monitors dedicated server shards for the clusters below a clusters root.
+
+    The clusters root is expected to be <persistent_storage_root>/<conf_dir>, as with the default
+    ~/.klei/DoNotStarveTogether, and every shard is started as
+    <executable> -console -persistent_storage_root <root> -conf_dir <dir> -cluster <cluster> -shard <shard>
+    from the executable's directory. Starting and stopping many shards is done concurrently.
+
+    Args:
+        executable (str):   Path of the dedicated server executable.
+        clusters_root (str):    Directory holding one sub directory per cluster.
+        max_workers (int):  Number of shards started or stopped in parallel.
+        output_lines (int): Number of output lines kept per shard.
+
+    Attributes:
+        executable (str):   Path of the dedicated server executable.
+        clusters_root (str):    Directory holding one sub directory per cluster.
+        max_workers (int):  Number of shards started or stopped in parallel.
+        output_lines (int): Number of output lines kept per shard.
+    """
+
+    def __init__(self, executable, clusters_root, max_workers=16, output_lines=1000):
+        self.executable = executable
+        self.clusters_root = clusters_root
+        self.max_workers = max_workers
+        self.output_lines = output_lines
+        self._shards = {}
+        self._lock = Lock()
+
+    def clusters(self):
+        """Returns the names of every cluster directory below the clusters root"""
+        if not path.isdir(self.clusters_root):
+            return []
+        with scandir(self.clusters_root) as entries:
+            return sorted(entry.name for entry in entries
+                          if entry.is_dir() and path.isfile(path.join(entry.path, CLUSTER_INI)))
+
+    def shard_names(self, cluster):
+        """Returns the names of every shard directory holding a server.ini in a cluster"""
+        directory = self._cluster_dir(cluster)
+        with scandir(directory) as entries:
+            return sorted(entry.name for entry in entries
+                          if entry.is_dir() and path.isfile(path.join(entry.path, SERVER_INI)))
+
+    def shard(self, cluster, shard):
+        """Returns the ShardProcess of a shard, creating it if needed"""
+        key = (cluster, shard)
+        if not shard or path.basename(shard) != shard or shard in (".", ".."):
+            raise ValueError("Invalid shard name {!r}.".format(shard))
+        with self._lock:
+            if key not in self._shards:
+                if not path.isfile(path.join(self._cluster_dir(cluster), shard, SERVER_INI)):
+                    raise ValueError("Unknown shard {}/{}.".format(cluster, shard))
+                self._shards[key] = ShardProcess(cluster, shard, self._command(cluster, shard),
+                                                 cwd=path.dirname(path.abspath(self.executable)),
+                                                 output_lines=self.output_lines)
+            return self._shards[key]
+
+    def start(self, clusters=None, shards=None):
+        """Start shards concurrently
+
+        Args:
+            clusters (list):    Cluster names, every cluster when None.
+            shards (list):  Shard names to start in each cluster, every shard when None.
+
+        Returns:
+            list: Status of every started shard, or its "error"
+        """
+        return self._each(lambda process: process.start(), clusters, shards)
+
+    def stop(self, clusters=None, shards=None, timeout=30):
+        """Ask shards to shut down without waiting for them to exit
+
+        Args:
+            clusters (list):    Cluster names, every cluster when None.
+            shards (list):  Shard names to stop in each cluster, every shard when None.
+            timeout (float):    Seconds to wait for a clean shutdown before terminating a shard.
+
+        Returns:
+            list: Status of every stopping shard, or its "error"
+        """
+        return self._each(lambda process: process.stop(timeout), clusters, shards)
+
+    def restart(self, clusters=None, shards=None, timeout=30):
+        """Stop shards, wait for them to exit and start them again, concurrently per shard
+
+        Returns:
+            list: Status of every restarted shard, or its "error"
+        """
+        def restart_one(process):
+            process.stop(timeout)
+            if process.process is not None:
+                process.process.wait()
+            process.start()
+
+        return self._each(restart_one, clusters, shards)
+
+    def status(self, clusters=None):
+        """Returns the status of every known shard, optionally limited to some clusters"""
+        with self._lock:
+            processes = list(self._shards.values())
+        return [process.status() for process in processes if clusters is None or process.cluster in clusters]
+
+    def _each(self, action, clusters, shards):
+        targets = []
+        errors = []
+        for cluster in clusters if clusters is not None else self.clusters():
+            try:
+                names = shards if shards is not None else self.shard_names(cluster)
+                targets.extend(self.shard(cluster, name) for name in names)
+            except (OSError, ValueError) as error:
+                errors.append({"cluster": cluster, "error": str(error)})
+
+        def run(process):
+            try:
+                action(process)
+                return process.status()
+            except (OSError, RuntimeError, subprocess.SubprocessError) as error:
+                return dict(process.status(), error=str(error))
+
+        if not targets:
+            return errors
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(targets))) as executor:
+            return errors + list(executor.map(run, targets))
+
+    def _cluster_dir(self, cluster):
+        if not cluster or path.basename(cluster) != cluster or cluster in (".", ".."):
+            raise ValueError("Invalid cluster name {!r}.".format(cluster))
+        directory = path.join(self.clusters_root, cluster)
+        if not path.isfile(path.join(directory, CLUSTER_INI)):
+            raise ValueError("Unknown cluster {}.".format(cluster))
+        return directory
+
+    def _command(self, cluster, shard):
+        root = path.abspath(self.clusters_root)
+        return [path.abspath(self.executable), "-console",
+                "-persistent_storage_root", path.dirname(root),
+                "-conf_dir", path.basename(root),
+                "-cluster", cluster,
+                "-shard", shard]
@@ -0,0 +1,155 @@
+from org.combatwombat.dst.config import ini
+from hashlib import sha256
+from os import fsync, makedirs, path, replace, scandir, unlink
+from threading import Lock
+from time import monotonic, sleep
+import tempfile
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class Throttle:
+    """Limits the rate of disk I/O shared by many threads.
+
+    A token bucket holding at most one second worth of bytes. Threads consuming more than is
+    available sleep until the bucket has refilled, so bursts are smoothed out over time.
+
+    Args:
+        bytes_per_second (int): Maximum rate, None or 0 for no limit.
+
+    Attributes:
+        bytes_per_second (int): Maximum rate, None or 0 for no limit.
+    """
+
+    def __init__(self, bytes_per_second=None):
+        self.bytes_per_second = bytes_per_second
+        self._available = float(bytes_per_second or 0)
+        self._last = monotonic()
+        self._lock = Lock()
+
+    def consume(self, count):
+        """Account for count bytes of I/O, sleeping if the rate limit has been reached"""
+        rate = self.bytes_per_second
+        if not rate:
+            return
+        with self._lock:
+            now = monotonic()
+            self._available = min(float(rate), self._available + (now - self._last) * rate) - count
+            self._last = now
+            wait = -self._available / rate if self._available < 0 else 0
+        if wait > 0:
+            sleep(wait)
+
+
+class ChunkStore:
+    """Content addressed store of file chunks.
+
+    Files are split into fixed size chunks stored once under their SHA-256 hash, so a chunk shared
+    by many files or many versions of a file takes space only once. A stored file is described by
+    the list of its chunk hashes. Chunks are on disk when put returns, so a manifest written after
+    them never refers to a chunk lost in a crash.
+
+    Args:
+        root (str): Directory holding the chunks.
+        chunk_size (int):   Bytes per chunk.
+        throttle (Throttle):    Rate limit for the bytes read and written.
+
+    Attributes:
+        root (str): Directory holding the chunks.
+        chunk_size (int):   Bytes per chunk.
+        throttle (Throttle):    Rate limit for the bytes read and written.
+    """
+
+    def __init__(self, root, chunk_size=DEFAULT_CHUNK_SIZE, throttle=None):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.throttle = throttle or Throttle()
+
+    def put_file(self, file):
+        """Store a file's chunks, writing only chunks not stored yet
+
+        Returns:
+            tuple: Chunk hashes of the file and the number of bytes newly written
+        """
+        chunks = []
+        written = 0
+        with open(file, 'rb') as in_file:
+            while True:
+                data = in_file.read(self.chunk_size)
+                if not data:
+                    break
+                self.throttle.consume(len(data))
+                digest, stored = self.put(data)
+                chunks.append(digest)
+                written += stored
+        return chunks, written
+
+    def put(self, data):
+        """Store one chunk
+
+        Returns:
+            tuple: Hash of the chunk and the number of bytes written, 0 if it was already stored
+        """
+        digest = sha256(data).hexdigest()
+        chunk_file = self._chunk_file(digest)
+        if path.exists(chunk_file):
+            return digest, 0
+        directory = path.dirname(chunk_file)
+        makedirs(directory, exist_ok=True)
+        self.throttle.consume(len(data))
+        handle, temp_file = tempfile.mkstemp(prefix=".chunk.", dir=directory)
+        try:
+            with open(handle, 'wb') as out_file:
+                out_file.write(data)
+                out_file.flush()
+                fsync(out_file.fileno())
+            replace(temp_file, chunk_file)
+        except BaseException:
+            try:
+                unlink(temp_file)
+            except OSError:
+                pass
+            raise
+        ini.fsync_directory(directory)
+        return digest, len(data)
+
+    def write_file(self, chunks, file):
+        """Write a file from its chunk hashes, checking every chunk against its hash
+
+        Raises:
+            ValueError: If a chunk is missing or does not match its hash.
+        """
+        with open(file, 'wb') as out_file:
+            for digest in chunks:
+                try:
+                    with open(self._chunk_file(digest), 'rb') as chunk_file:
+                        data = chunk_file.read()
+                except FileNotFoundError:
+                    raise ValueError("Chunk {} is missing from the backup store.".format(digest))
+                if sha256(data).hexdigest() != digest:
+                    raise ValueError("Chunk {} is corrupt.".format(digest))
+                self.throttle.consume(len(data))
+                out_file.write(data)
+
+    def collect_garbage(self, referenced):
+        """Delete every chunk whose hash is not in referenced
+
+        Returns:
+            tuple: Number of chunks and bytes deleted
+        """
+        chunks = 0
+        size = 0
+        if not path.isdir(self.root):
+            return chunks, size
+        for prefix in scandir(self.root):
+            if not prefix.is_dir():
+                continue
+            for chunk in scandir(prefix.path):
+                if prefix.name + chunk.name not in referenced and not chunk.name.startswith("."):
+                    size += chunk.stat().st_size
+                    unlink(chunk.path)
+                    chunks += 1
+        return chunks, size
+
+    def _chunk_file(self, digest):
+        return path.join(self.root, digest[:2], digest[2:])
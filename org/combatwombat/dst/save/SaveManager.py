@@ -0,0 +1,379 @@
+"""Incremental, deduplicated backups of the save folders of every shard.
+
+A snapshot is a manifest listing every file of a shard's save folder with its size, modification
+time, mode and the hashes of its chunks in the ChunkStore. Only files whose size or modification
+time changed since the shard's previous snapshot are read again, and only chunks not stored yet are
+written, so backing up a world where one session file changed costs about that file's size.
+Backups run on a background thread pool sharing one Throttle, so they do not starve the running
+shards of disk bandwidth.
+
+Restoring rebuilds the save folder next to the current one, hard linking the files that are
+unchanged and writing the others from their chunks, then swaps the two folders.
+
+Garbage collection deletes the chunks no manifest refers to, so it must not run while a backup has
+stored chunks but not yet written its manifest, or while a restore reads them. Backups and restores
+hold a shared lock on backup_root/.lock and garbage collection an exclusive one, so this also holds
+for several processes using the same store. Without fcntl, as on Windows, only the backups of the
+same process are waited for.
+
+The store lives below its root directory:
+
+    chunks/<first two hash characters>/<rest of the hash>
+    snapshots/<cluster>/<shard>/<snapshot id>.json
+"""
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.ClusterDirectory import CLUSTER_INI, SERVER_INI
+from org.combatwombat.dst.save.ChunkStore import ChunkStore, Throttle, DEFAULT_CHUNK_SIZE
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import count
+from os import chmod, link, listdir, makedirs, path, rename, scandir, stat, unlink, utime, walk
+from threading import Condition, Lock
+import json
+import shutil
+import time
+
+try:
+    import fcntl
+except ImportError:  # fcntl is POSIX only, fall back to coordinating the threads of this process
+    fcntl = None
+
+SAVE_DIR = "save"
+LOCK_FILE = ".lock"
+MANIFEST_VERSION = 1
+
+
+class SaveManager:
+    """Backs up and restores the save folder of each shard below a clusters root.
+
+    Args:
+        clusters_root (str):    Directory holding one sub directory per cluster.
+        backup_root (str):  Directory holding the chunks and snapshot manifests.
+        max_workers (int):  Number of shards backed up in parallel.
+        bytes_per_second (int): Limit of the disk I/O of all backups and restores together, None for no limit.
+        keep (int): Newest snapshots kept per shard, older ones are pruned after each backup, None keeps all.
+        chunk_size (int):   Bytes per stored chunk.
+
+    Attributes:
+        clusters_root (str):    Directory holding one sub directory per cluster.
+        backup_root (str):  Directory holding the chunks and snapshot manifests.
+        keep (int): Newest snapshots kept per shard.
+        store (ChunkStore): Store of the file chunks.
+    """
+
+    def __init__(self, clusters_root, backup_root, max_workers=2, bytes_per_second=None, keep=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        self.clusters_root = clusters_root
+        self.backup_root = backup_root
+        self.keep = keep
+        self.store = ChunkStore(path.join(backup_root, "chunks"), chunk_size, Throttle(bytes_per_second))
+        self._max_workers = max_workers
+        self._executor = None
+        self._jobs = {}
+        self._job_ids = count(1)
+        self._lock = Lock()
+        self._shard_locks = {}
+        self._condition = Condition()
+        self._running = 0
+        self._collecting = False
+
+    def submit(self, clusters=None, shards=None):
+        """Queue backups of shards on the background thread pool
+
+        Args:
+            clusters (list):    Cluster names, every cluster when None.
+            shards (list):  Shard names to back up in each cluster, every shard when None.
+
+        Returns:
+            list: Status of each queued job, and an error entry for every cluster that could not be listed
+        """
+        queued = []
+        for cluster in clusters if clusters is not None else self.clusters():
+            try:
+                names = shards if shards is not None else self.shard_names(cluster)
+                for shard in names:
+                    self._save_dir(cluster, shard)
+            except (OSError, ValueError) as error:
+                queued.append({"cluster": cluster, "error": str(error)})
+                continue
+            for shard in names:
+                queued.append(self._queue(cluster, shard))
+        return queued
+
+    def jobs(self):
+        """Returns the status of every backup job, oldest first"""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def backup(self, cluster, shard):
+        """Take a snapshot of a shard's save folder, reusing the chunks of unchanged files
+
+        Returns:
+            dict: Summary of the snapshot
+
+        Raises:
+            ValueError: If the cluster or shard does not exist.
+        """
+        save_dir = self._save_dir(cluster, shard)
+        with self._shard_lock(cluster, shard), self._using_store():
+            previous = self._latest(cluster, shard)
+            known = previous["files"] if previous is not None else {}
+            files = {}
+            directories = []
+            read = 0
+            written = 0
+            for directory, names, file_names in walk(save_dir):
+                names.sort()
+                relative = path.relpath(directory, save_dir)
+                if relative != ".":
+                    directories.append(relative.replace(path.sep, "/"))
+                for name in sorted(file_names):
+                    file = path.join(directory, name)
+                    key = path.relpath(file, save_dir).replace(path.sep, "/")
+                    status = stat(file)
+                    entry = known.get(key)
+                    if entry is None or entry["size"] != status.st_size or entry["mtime_ns"] != status.st_mtime_ns:
+                        chunks, stored = self.store.put_file(file)
+                        read += status.st_size
+                        written += stored
+                        entry = {"size": status.st_size, "mtime_ns": status.st_mtime_ns, "chunks": chunks}
+                    files[key] = dict(entry, mode=status.st_mode & 0o7777)
+
+            now = time.time()
+            manifest = {"version": MANIFEST_VERSION, "id": _snapshot_id(now), "cluster": cluster, "shard": shard,
+                        "time": now, "directories": directories, "files": files,
+                        "bytes": sum(entry["size"] for entry in files.values()), "read": read, "written": written}
+            manifest_file = self._manifest_file(cluster, shard, manifest["id"])
+            makedirs(path.dirname(manifest_file), exist_ok=True)
+            ini.atomic_write(manifest_file, json.dumps(manifest, separators=(",", ":")))
+        if self.keep:
+            self.prune(cluster, shard, self.keep)
+        return _summary(manifest)
+
+    def snapshots(self, cluster, shard):
+        """Summaries of a shard's snapshots, oldest first"""
+        return [_summary(self._manifest(cluster, shard, snapshot)) for snapshot in self._snapshot_ids(cluster, shard)]
+
+    def restore(self, cluster, shard, snapshot):
+        """Replace a shard's save folder with a snapshot
+
+        The shard must not be running. Files whose size and modification time match the snapshot
+        are hard linked from the current save folder instead of being rebuilt from their chunks.
+
+        Returns:
+            dict: Summary of the snapshot with the number of files "linked" and "rebuilt"
+
+        Raises:
+            ValueError: If the shard or snapshot does not exist, or a chunk is missing or corrupt.
+        """
+        save_dir = self._save_dir(cluster, shard)
+        with self._shard_lock(cluster, shard), self._using_store():
+            manifest = self._manifest(cluster, shard, snapshot)
+            staging = "{}.restore-{}".format(save_dir, snapshot)
+            shutil.rmtree(staging, ignore_errors=True)
+            linked = 0
+            rebuilt = 0
+            try:
+                makedirs(staging)
+                for directory in manifest["directories"]:
+                    makedirs(path.join(staging, *directory.split("/")), exist_ok=True)
+                for key, entry in manifest["files"].items():
+                    current = path.join(save_dir, *key.split("/"))
+                    target = path.join(staging, *key.split("/"))
+                    makedirs(path.dirname(target), exist_ok=True)
+                    if _unchanged(current, entry) and _link(current, target):
+                        linked += 1
+                        continue
+                    self.store.write_file(entry["chunks"], target)
+                    chmod(target, entry["mode"])
+                    utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+                    rebuilt += 1
+                previous = "{}.previous-{}".format(save_dir, _snapshot_id(time.time()))
+                if path.exists(save_dir):
+                    rename(save_dir, previous)
+                rename(staging, save_dir)
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+            shutil.rmtree(previous, ignore_errors=True)
+        return dict(_summary(manifest), linked=linked, rebuilt=rebuilt)
+
+    def prune(self, cluster, shard, keep):
+        """Delete all but the newest keep snapshots of a shard, then the chunks no snapshot uses
+
+        Returns:
+            dict: Number of "snapshots" and "chunks" deleted and the "bytes" freed
+        """
+        with self._shard_lock(cluster, shard):
+            snapshots = self._snapshot_ids(cluster, shard)
+            removed = snapshots[:max(len(snapshots) - keep, 0)]
+            for snapshot in removed:
+                unlink(self._manifest_file(cluster, shard, snapshot))
+        if not removed:
+            return {"snapshots": 0, "chunks": 0, "bytes": 0}
+        chunks, size = self.collect_garbage()
+        return {"snapshots": len(removed), "chunks": chunks, "bytes": size}
+
+    def collect_garbage(self):
+        """Delete the chunks no snapshot uses, waiting for running backups and restores of every process to finish first
+
+        Returns:
+            tuple: Number of chunks and bytes deleted
+        """
+        with self._condition:
+            while self._running or self._collecting:
+                self._condition.wait()
+            self._collecting = True
+        try:
+            with self._store_lock(exclusive=True):
+                referenced = set()
+                root = path.join(self.backup_root, "snapshots")
+                for directory, names, file_names in walk(root):
+                    for name in file_names:
+                        if name.endswith(".json"):
+                            with open(path.join(directory, name), 'r') as manifest_file:
+                                for entry in json.load(manifest_file)["files"].values():
+                                    referenced.update(entry["chunks"])
+                return self.store.collect_garbage(referenced)
+        finally:
+            with self._condition:
+                self._collecting = False
+                self._condition.notify_all()
+
+    def clusters(self):
+        """Names of the cluster directories below the clusters root"""
+        if not path.isdir(self.clusters_root):
+            return []
+        return sorted(name for name in listdir(self.clusters_root)
+                      if path.isfile(path.join(self.clusters_root, name, CLUSTER_INI)))
+
+    def shard_names(self, cluster):
+        """Names of the shard directories of a cluster"""
+        directory = self._cluster_dir(cluster)
+        with scandir(directory) as entries:
+            return sorted(entry.name for entry in entries
+                          if entry.is_dir() and path.isfile(path.join(entry.path, SERVER_INI)))
+
+    def shutdown(self, wait=True):
+        """Stop the background thread pool, waiting for queued backups unless wait is False"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _queue(self, cluster, shard):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="save-backup")
+            job = {"id": next(self._job_ids), "cluster": cluster, "shard": shard, "state": "queued",
+                   "queued_at": time.time(), "started_at": None, "finished_at": None}
+            self._jobs[job["id"]] = job
+            self._executor.submit(self._run, job)
+            return dict(job)
+
+    def _run(self, job):
+        with self._lock:
+            job.update(state="running", started_at=time.time())
+        try:
+            result = self.backup(job["cluster"], job["shard"])
+            update = {"state": "done", "snapshot": result}
+        except (OSError, ValueError) as error:
+            update = {"state": "failed", "error": str(error)}
+        with self._lock:
+            job.update(update, finished_at=time.time())
+
+    @contextmanager
+    def _using_store(self):
+        with self._condition:
+            while self._collecting:
+                self._condition.wait()
+            self._running += 1
+        try:
+            with self._store_lock(exclusive=False):
+                yield
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def _store_lock(self, exclusive):
+        if fcntl is None:
+            yield
+            return
+        makedirs(self.backup_root, exist_ok=True)
+        with open(path.join(self.backup_root, LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _shard_lock(self, cluster, shard):
+        with self._lock:
+            return self._shard_locks.setdefault((cluster, shard), Lock())
+
+    def _latest(self, cluster, shard):
+        snapshots = self._snapshot_ids(cluster, shard)
+        return self._manifest(cluster, shard, snapshots[-1]) if snapshots else None
+
+    def _manifest(self, cluster, shard, snapshot):
+        _check_name(snapshot)
+        try:
+            with open(self._manifest_file(cluster, shard, snapshot), 'r') as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            raise ValueError("Shard {}/{} has no snapshot {}.".format(cluster, shard, snapshot))
+
+    def _snapshot_ids(self, cluster, shard):
+        directory = path.join(self.backup_root, "snapshots", _check_name(cluster), _check_name(shard))
+        if not path.isdir(directory):
+            return []
+        return sorted(name[:-5] for name in listdir(directory) if name.endswith(".json"))
+
+    def _manifest_file(self, cluster, shard, snapshot):
+        return path.join(self.backup_root, "snapshots", cluster, shard, snapshot + ".json")
+
+    def _cluster_dir(self, cluster):
+        directory = path.join(self.clusters_root, _check_name(cluster))
+        if not path.isfile(path.join(directory, CLUSTER_INI)):
+            raise ValueError("Unknown cluster {}.".format(cluster))
+        return directory
+
+    def _save_dir(self, cluster, shard):
+        shard_dir = path.join(self._cluster_dir(cluster), _check_name(shard))
+        if not path.isfile(path.join(shard_dir, SERVER_INI)):
+            raise ValueError("Unknown shard {}/{}.".format(cluster, shard))
+        return path.join(shard_dir, SAVE_DIR)
+
+
+def _check_name(name):
+    if not name or not isinstance(name, str) or path.basename(name) != name or name in (".", ".."):
+        raise ValueError("Invalid name {!r}.".format(name))
+    return name
+
+
+def _snapshot_id(now):
+    return "{}-{:06d}".format(time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)), int(now % 1 * 1e6))
+
+
+def _summary(manifest):
+    summary = {key: manifest[key] for key in ("id", "cluster", "shard", "time", "bytes", "read", "written")}
+    summary["files"] = len(manifest["files"])
+    return summary
+
+
+def _unchanged(file, entry):
+    try:
+        status = stat(file)
+    except OSError:
+        return False
+    return status.st_size == entry["size"] and status.st_mtime_ns == entry["mtime_ns"]
+
+
+def _link(source, target):
+    try:
+        link(source, target)
+    except OSError:
+        return False
+    return True
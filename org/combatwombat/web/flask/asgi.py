@@ -0,0 +1,310 @@
+"""ASGI entry point for serving the config API in production.
+
+The Flask routes stay synchronous. FlaskASGI runs each request on a worker thread pool, so
+handlers that block on disk (ini reads and writes, batch jobs, event streams) do not stall the
+event loop or other requests. Request bodies are handed to the application as they arrive, so
+streaming uploads such as /config/import are never held in memory as a whole. Response bodies go
+the other way through a bounded queue: once it is full the application thread waits for the client,
+so a slow reader of /config/export does not make the whole export pile up in memory. Streamed
+responses, the ones without a Content-Length such as /config/watch, are iterated on a separate
+thread pool, so long lived event streams do not take request threads. Run it with any ASGI
+server, for example:
+
+    uvicorn org.combatwombat.web.flask.asgi:application
+
+or set SERVER_MODE = 'production' in settings and start server.py as usual. Serve it from a single
+worker process: shard processes, console queues, the port and search indexes, the config history
+logs and backup garbage collection all live in the memory of the process that started them, so a
+second worker would not see them.
+"""
+from org.combatwombat.web.flask.server import app, initialize_app
+from org.combatwombat.web.flask import settings
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import deque
+from threading import Condition, Event
+import asyncio
+import sys
+
+
+class FlaskASGI:
+    """ASGI adapter running a WSGI application on a thread pool.
+
+    Response bodies are streamed chunk by chunk, so Server-Sent Events keep working, and the
+    WSGI response is closed once the client disconnects.
+
+    Args:
+        wsgi_app (callable):    WSGI application to serve.
+        max_workers (int):  Number of threads handling requests concurrently.
+        max_streams (int):  Number of streamed responses sent concurrently.
+        max_chunks (int):   Response chunks waiting to be sent before the application thread blocks.
+
+    Attributes:
+        wsgi_app (callable):    WSGI application to serve.
+        executor (ThreadPoolExecutor):  Threads handling requests.
+        stream_executor (ThreadPoolExecutor):   Threads iterating streamed responses.
+        max_chunks (int):   Response chunks waiting to be sent before the application thread blocks.
+    """
+
+    def __init__(self, wsgi_app, max_workers=32, max_streams=64, max_chunks=16):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asgi-worker")
+        self.stream_executor = ThreadPoolExecutor(max_workers=max_streams, thread_name_prefix="asgi-stream")
+        self.max_chunks = max_chunks
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                self.stream_executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        messages = asyncio.Queue(self.max_chunks)
+        disconnected = Event()
+        body = _RequestBody(loop)
+        streamed = False
+
+        def put(item):
+            # Blocks the application thread while the queue is full, until the client is gone
+            future = asyncio.run_coroutine_threadsafe(messages.put(item), loop)
+            while True:
+                try:
+                    return future.result(0.5)
+                except FutureTimeoutError:
+                    if disconnected.is_set():
+                        future.cancel()
+                        return None
+
+        def start_response(status, headers, exc_info=None):
+            nonlocal streamed
+            streamed = not any(name.lower() == "content-length" for name, _ in headers)
+            put(("start", int(status.split(" ", 1)[0]),
+                 [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]))
+
+        def run():
+            try:
+                result = self.wsgi_app(_environ(scope, body), start_response)
+            except BaseException:
+                put(("end", None))
+                raise
+            if streamed:
+                return result
+            send_body(result)
+            return None
+
+        def send_body(result):
+            try:
+                try:
+                    for chunk in result:
+                        if disconnected.is_set():
+                            break
+                        if chunk:
+                            put(("body", chunk))
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+            finally:
+                put(("end", None))
+
+        async def respond():
+            result = await loop.run_in_executor(self.executor, run)
+            if result is not None:
+                await loop.run_in_executor(self.stream_executor, send_body, result)
+
+        async def receive_body():
+            try:
+                while True:
+                    message = await receive()
+                    if message["type"] == "http.disconnect":
+                        disconnected.set()
+                        body.feed_eof(aborted=True)
+                        return
+                    if message.get("body"):
+                        body.feed(message["body"])
+                        await body.drained()
+                    if not message.get("more_body", False):
+                        break
+                body.feed_eof()
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+                disconnected.set()
+            finally:
+                body.feed_eof()
+
+        producer = asyncio.ensure_future(respond())
+        receiver = asyncio.ensure_future(receive_body())
+        started = False
+        try:
+            while True:
+                kind, *payload = await messages.get()
+                if kind == "start":
+                    started = True
+                    await send({"type": "http.response.start", "status": payload[0], "headers": payload[1]})
+                elif not started:
+                    await send({"type": "http.response.start", "status": 500, "headers": []})
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+                elif kind == "body":
+                    await send({"type": "http.response.body", "body": payload[0], "more_body": True})
+                else:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+        except OSError:
+            pass
+        finally:
+            disconnected.set()  # Also releases an application thread waiting for room in the queue
+            receiver.cancel()
+        await producer
+
+
+class _RequestBody:
+    """wsgi.input reading the request body chunks received on the event loop.
+
+    Reads block the WSGI thread until enough data arrived or the body ended. Once max_buffer bytes
+    wait to be read, the event loop stops receiving until the application has read them.
+
+    Args:
+        loop (AbstractEventLoop):   Event loop feeding the body.
+        max_buffer (int):   Bytes buffered before receiving pauses.
+    """
+
+    def __init__(self, loop, max_buffer=1024 * 1024):
+        self._loop = loop
+        self._max_buffer = max_buffer
+        self._chunks = deque()
+        self._size = 0
+        self._eof = False
+        self._aborted = False
+        self._condition = Condition()
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+    def feed(self, data):
+        """Add a received chunk, called on the event loop"""
+        with self._condition:
+            self._chunks.append(data)
+            self._size += len(data)
+            self._condition.notify_all()
+            full = self._size >= self._max_buffer
+        if full:
+            self._drained.clear()
+
+    def feed_eof(self, aborted=False):
+        """Mark the end of the body, aborted when the client disconnected before sending all of it"""
+        with self._condition:
+            if not self._eof:
+                self._aborted = aborted
+            self._eof = True
+            self._condition.notify_all()
+        self._drained.set()
+
+    async def drained(self):
+        """Wait until the application has read enough of the buffered body"""
+        await self._drained.wait()
+
+    def read(self, size=-1):
+        with self._condition:
+            if size is None or size < 0:
+                while not self._eof:
+                    self._condition.wait()
+                if self._aborted:
+                    raise OSError("Client disconnected before sending the whole request body.")
+                size = self._size
+            else:
+                while self._size < size and not self._eof:
+                    self._condition.wait()
+            if self._aborted and self._size < size:
+                raise OSError("Client disconnected before sending the whole request body.")
+            return self._take(size)
+
+    def readline(self, size=-1):
+        with self._condition:
+            while True:
+                data = b"".join(self._chunks)
+                end = data.find(b"\n") + 1
+                if 0 < size <= len(data) and (not end or end > size):
+                    end = size
+                if self._aborted and not end:
+                    raise OSError("Client disconnected before sending the whole request body.")
+                if end or self._eof:
+                    self._chunks.clear()
+                    if data:
+                        self._chunks.append(data)
+                    return self._take(end or len(data))
+                self._condition.wait()
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+    def _take(self, size):
+        parts = []
+        taken = 0
+        while self._chunks and taken < size:
+            chunk = self._chunks.popleft()
+            if taken + len(chunk) > size:
+                self._chunks.appendleft(chunk[size - taken:])
+                chunk = chunk[:size - taken]
+            parts.append(chunk)
+            taken += len(chunk)
+        self._size -= taken
+        if self._size < self._max_buffer:
+            self._loop.call_soon_threadsafe(self._drained.set)
+        return b"".join(parts)
+
+
+def _environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/{}".format(scope.get("http_version", "1.1")),
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+            environ[name] = value
+            continue
+        name = "HTTP_" + name
+        environ[name] = environ[name] + "," + value if name in environ else value
+    return environ
+
+
+def serve():
+    """Serve the ASGI application with uvicorn and SERVER_WORKERS worker processes"""
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError("Production serving mode needs uvicorn, install dst-gui[asgi].")
+    host, _, port = settings.FLASK_SERVER_NAME.rpartition(':')
+    uvicorn.run("org.combatwombat.web.flask.asgi:application", host=host, port=int(port),
+                workers=settings.SERVER_WORKERS)
+
+
+initialize_app(app)
+application = FlaskASGI(app, settings.SERVER_THREADS, settings.SERVER_STREAM_THREADS)
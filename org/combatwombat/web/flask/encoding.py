@@ -0,0 +1,169 @@
+"""Conditional, delta encoded and compressed responses for the config API.
+
+ResponseEncoder.install adds an after request hook to a Flask app. For the read only routes it is
+given, every successful response gets a weak ETag derived from the SHA-256 hash of its body, which
+for the config routes is the hash of the configuration they return, and a request whose
+If-None-Match holds that ETag gets an empty 304 Not Modified instead.
+
+A client holding an earlier response may name its ETag in an X-Delta-Base header. If that body is
+still in the encoder's cache and both bodies are JSON, whatever their content type, the response
+is the RFC 6902 JSON patch turning it into the new body, sent as application/json-patch+json along
+with the new body's ETag, whenever the patch is smaller than the full body. Each worker process of
+the production mode keeps its own cache, a base it does not know simply gets the full body.
+
+Finally, bodies of at least min_size bytes are compressed with brotli when it is installed and the
+client accepts it, and with gzip otherwise. Streamed responses, such as /config/watch and
+/config/export, are left untouched.
+"""
+from collections import OrderedDict
+from flask import request
+from hashlib import sha256
+from threading import Lock
+import gzip
+import json
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+DELTA_BASE_HEADER = "X-Delta-Base"
+JSON_PATCH_MIMETYPE = "application/json-patch+json"
+
+
+class ResponseEncoder:
+    """Adds ETags, JSON patch deltas and compression to a Flask app's responses.
+
+    Args:
+        endpoints (iterable):   Names of the read only endpoints given ETags and deltas.
+        min_size (int): Smallest body in bytes that is compressed.
+        level (int):    gzip compression level, brotli uses a quality of level - 1 capped at 11.
+        delta_cache_size (int): Response bodies kept as delta bases.
+        delta_cache_bytes (int):    Total size of the response bodies kept as delta bases.
+
+    Attributes:
+        endpoints (frozenset):  Names of the read only endpoints given ETags and deltas.
+        min_size (int): Smallest body in bytes that is compressed.
+        level (int):    gzip compression level.
+        installed (bool):   Whether install was called.
+    """
+
+    def __init__(self, endpoints=(), min_size=1024, level=6, delta_cache_size=256, delta_cache_bytes=32 * 1024 * 1024):
+        self.endpoints = frozenset(endpoints)
+        self.min_size = min_size
+        self.level = level
+        self.installed = False
+        self._bases = OrderedDict()
+        self._bases_size = 0
+        self._max_bases = delta_cache_size
+        self._max_bases_size = delta_cache_bytes
+        self._lock = Lock()
+
+    def install(self, flask_app):
+        """Start encoding a Flask app's responses, does nothing if already installed"""
+        if self.installed:
+            return
+        self.installed = True
+        flask_app.after_request(self.encode)
+
+    def encode(self, response):
+        """After request hook adding the ETag, delta and compression to a response"""
+        if response.is_streamed or response.direct_passthrough:
+            return response
+        if request.endpoint in self.endpoints and response.status_code == 200:
+            self._conditional(response)
+        self._compress(response)
+        return response
+
+    def _conditional(self, response):
+        body = response.get_data()
+        etag = sha256(body).hexdigest()[:32]
+        response.set_etag(etag, weak=True)
+        if request.if_none_match.contains_weak(etag):
+            response.status_code = 304
+            response.set_data(b"")
+            return
+        base = request.headers.get(DELTA_BASE_HEADER)
+        if base is not None:
+            base = base.strip()
+            if base.startswith("W/"):
+                base = base[2:]
+            base = base.strip('"')
+        with self._lock:
+            base_body = self._bases.get(base) if base and base != etag else None
+            self._remember(etag, body)
+        if base_body is None:
+            return
+        try:
+            patch = json_patch(json.loads(base_body), json.loads(body))
+        except ValueError:
+            return
+        patch = json.dumps(patch, separators=(",", ":")).encode()
+        if len(patch) < len(body):
+            response.set_data(patch)
+            response.mimetype = JSON_PATCH_MIMETYPE
+            response.headers[DELTA_BASE_HEADER] = '"{}"'.format(base)
+            response.vary.add(DELTA_BASE_HEADER)
+
+    def _remember(self, etag, body):
+        if etag in self._bases:
+            self._bases.move_to_end(etag)
+            return
+        if len(body) > self._max_bases_size:
+            return
+        self._bases[etag] = body
+        self._bases_size += len(body)
+        while len(self._bases) > self._max_bases or self._bases_size > self._max_bases_size:
+            self._bases_size -= len(self._bases.popitem(last=False)[1])
+
+    def _compress(self, response):
+        if response.status_code < 200 or response.status_code in (204, 304) or "Content-Encoding" in response.headers:
+            return
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return
+        accepted = request.accept_encodings
+        if brotli is not None and accepted["br"]:
+            encoding, body = "br", brotli.compress(body, quality=min(max(self.level - 1, 0), 11))
+        elif accepted["gzip"]:
+            encoding, body = "gzip", gzip.compress(body, self.level)
+        else:
+            return
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+
+
+def json_patch(old, new):
+    """RFC 6902 operations turning the JSON document old into new
+
+    Objects are compared key by key and lists of equal length item by item, anything else that
+    changed is replaced as a whole.
+
+    Returns:
+        list: add, remove and replace operations with RFC 6901 paths
+    """
+    operations = []
+    _diff(old, new, "", operations)
+    return operations
+
+
+def _diff(old, new, pointer, operations):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                operations.append({"op": "remove", "path": pointer + "/" + _escape(key)})
+        for key, value in new.items():
+            if key in old:
+                _diff(old[key], value, pointer + "/" + _escape(key), operations)
+            else:
+                operations.append({"op": "add", "path": pointer + "/" + _escape(key), "value": value})
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            _diff(old_item, new_item, "{}/{}".format(pointer, index), operations)
+    elif type(old) is not type(new) or old != new:
+        operations.append({"op": "replace", "path": pointer, "value": new})
+
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
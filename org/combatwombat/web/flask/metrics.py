@@ -0,0 +1,309 @@
+"""Opt-in request metrics and sampling profiler for the config API.
+
+RequestMetrics.install hooks into a Flask app and times its JSON parsing and encoding through the
+app's JSON provider. Routes time the rest with explicit RequestMetrics.phase blocks around the calls
+they spend their time in. Outside a measured request a phase block does nothing, so nothing is
+measured, and nothing costs anything, unless METRICS_ENABLED is set:
+
+    parse:      JSON request bodies
+    validate:   schema loads and validation rules
+    serialize:  schema dumps and JSON responses
+    file_io:    ini reads and writes, including batch work done on worker threads
+
+Phase times are exclusive, a phase nested in another counts only towards the inner one, and
+whatever is left of a request's latency is reported as "other". RequestMetrics.uninstall removes
+the hooks again. Latencies are kept per route in
+Prometheus style histograms and rendered in the Prometheus text format by RequestMetrics.render.
+Each worker process of the production mode keeps its own metrics.
+
+When the SamplingProfiler is enabled, a background thread samples the stacks of the threads
+handling requests, and requests slower than its threshold are written to a folded stack file
+ready for flamegraph.pl or speedscope.
+"""
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from os import listdir, makedirs, path, unlink
+from threading import Event, Lock, Thread, get_ident, local
+from timeit import default_timer
+import re
+import sys
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative histogram of observed values, like a Prometheus histogram.
+
+    Args:
+        buckets (tuple): Sorted upper bounds of the buckets, +Inf is implied.
+
+    Attributes:
+        buckets (tuple): Sorted upper bounds of the buckets.
+        counts (list): Number of values per bucket, not cumulative, the last one is +Inf.
+        sum (float): Sum of every observed value.
+        count (int): Number of observed values.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """Per route latency histograms and phase breakdown of a Flask app's requests.
+
+    Args:
+        buckets (tuple): Latency histogram bucket bounds in seconds.
+        profiler (SamplingProfiler): Profiler told about every request, may be enabled later.
+
+    Attributes:
+        profiler (SamplingProfiler): Profiler told about every request.
+        installed (bool): Whether the metrics are installed in an app.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, profiler=None):
+        self.profiler = profiler
+        self.installed = False
+        self._json = None
+        self._buckets = buckets
+        self._latency = {}
+        self._phases = {}
+        self._lock = Lock()
+        self._local = local()
+
+    def install(self, flask_app):
+        """Start measuring a Flask app's requests, does nothing if already installed"""
+        if self.installed:
+            return
+        self.installed = True
+        flask_app.before_request(self._begin)
+        flask_app.after_request(self._end)
+        flask_app.teardown_request(self._teardown)
+        self._json = flask_app.json
+        flask_app.json = _TimedJSONProvider(flask_app, self)
+
+    def uninstall(self, flask_app):
+        """Stop measuring a Flask app's requests, keeping the metrics collected so far"""
+        if not self.installed:
+            return
+        self.installed = False
+        for hooks, hook in ((flask_app.before_request_funcs, self._begin),
+                            (flask_app.after_request_funcs, self._end),
+                            (flask_app.teardown_request_funcs, self._teardown)):
+            if hook in hooks.get(None, []):
+                hooks[None].remove(hook)
+        flask_app.json = self._json
+        self._json = None
+
+    @contextmanager
+    def phase(self, name):
+        """Count the exclusive time spent in a with block during a measured request towards a phase
+
+        Work the block waits for on other threads, like Fleet's batch pools, counts towards the phase too.
+        """
+        state = self._local
+        stack = getattr(state, "stack", None)
+        if stack is None:
+            yield
+            return
+        frame = [name, 0.0]
+        stack.append(frame)
+        start = default_timer()
+        try:
+            yield
+        finally:
+            elapsed = default_timer() - start
+            stack.pop()
+            state.phases[name] = state.phases.get(name, 0.0) + elapsed - frame[1]
+            if stack:
+                stack[-1][1] += elapsed
+
+    def _begin(self):
+        self._local.stack = []
+        self._local.phases = {}
+        self._local.start = default_timer()
+        if self.profiler is not None and self.profiler.enabled:
+            self.profiler.begin()
+
+    def _end(self, response):
+        state = self._local
+        if getattr(state, "stack", None) is None:
+            return response
+        elapsed = default_timer() - state.start
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        phases = state.phases
+        phases["other"] = max(elapsed - sum(phases.values()), 0.0)
+        with self._lock:
+            key = (route, request.method, response.status_code)
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(self._buckets)
+            histogram.observe(elapsed)
+            for phase, seconds in phases.items():
+                self._phases[(route, phase)] = self._phases.get((route, phase), 0.0) + seconds
+        if self.profiler is not None and self.profiler.enabled:
+            self.profiler.end("{} {}".format(request.method, route), elapsed)
+        state.stack = None
+        return response
+
+    def _teardown(self, error=None):
+        self._local.stack = None
+        if self.profiler is not None:
+            self.profiler.discard()
+
+    def render(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = ["# HELP dst_request_duration_seconds Time spent handling requests.",
+                 "# TYPE dst_request_duration_seconds histogram"]
+        with self._lock:
+            for (route, method, status), histogram in sorted(self._latency.items()):
+                labels = 'route="{}",method="{}",status="{}"'.format(_escape(route), method, status)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    lines.append('dst_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                        labels, "+Inf" if bound == float("inf") else repr(bound), cumulative))
+                lines.append("dst_request_duration_seconds_sum{{{}}} {!r}".format(labels, histogram.sum))
+                lines.append("dst_request_duration_seconds_count{{{}}} {}".format(labels, histogram.count))
+            lines.append("# HELP dst_request_phase_seconds_total Exclusive time spent per request phase.")
+            lines.append("# TYPE dst_request_phase_seconds_total counter")
+            for (route, phase), seconds in sorted(self._phases.items()):
+                lines.append('dst_request_phase_seconds_total{{route="{}",phase="{}"}} {!r}'.format(
+                    _escape(route), phase, seconds))
+        return "\n".join(lines) + "\n"
+
+
+class _TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider of an app with RequestMetrics installed, timing parsing and encoding"""
+
+    def __init__(self, flask_app, metrics):
+        super().__init__(flask_app)
+        self.metrics = metrics
+
+    def loads(self, s, **kwargs):
+        with self.metrics.phase("parse"):
+            return super().loads(s, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        with self.metrics.phase("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads handling requests and keeps those of slow requests.
+
+    Args:
+        directory (str): Directory the folded stack files are written to.
+        threshold (float): Requests taking at least this many seconds are written.
+        interval (float): Seconds between samples.
+        max_files (int): Number of newest files kept in directory.
+
+    Attributes:
+        directory (str): Directory the folded stack files are written to.
+        threshold (float): Requests taking at least this many seconds are written.
+        interval (float): Seconds between samples.
+        max_files (int): Number of newest files kept in directory.
+        enabled (bool): Whether requests are being sampled.
+    """
+
+    def __init__(self, directory, threshold=0.5, interval=0.005, max_files=100):
+        self.directory = directory
+        self.threshold = threshold
+        self.interval = interval
+        self.max_files = max_files
+        self.enabled = False
+        self._samples = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling, does nothing if already started"""
+        with self._lock:
+            if self.enabled:
+                return
+            self.enabled = True
+            self._stop.clear()
+            self._thread = Thread(target=self._sample, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop sampling and forget the samples of running requests"""
+        with self._lock:
+            self.enabled = False
+            self._stop.set()
+            self._samples.clear()
+
+    def begin(self):
+        """Start collecting samples for the request handled by the calling thread"""
+        with self._lock:
+            self._samples[get_ident()] = Counter()
+
+    def end(self, label, elapsed):
+        """Finish the calling thread's request, writing its samples if it was slow
+
+        Returns:
+            str: Path of the folded stack file, or None if the request was not written
+        """
+        with self._lock:
+            samples = self._samples.pop(get_ident(), None)
+        if not samples or elapsed < self.threshold:
+            return None
+        makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        file = path.join(self.directory, "{}.{:06d}-{}-{:.0f}ms.folded".format(
+            time.strftime("%Y%m%d-%H%M%S", time.localtime(now)), int(now % 1 * 1e6),
+            re.sub(r"[^\w]+", "_", label).strip("_"), elapsed * 1000))
+        with open(file, "w") as out_file:
+            for stack, count in samples.most_common():
+                out_file.write("{} {}\n".format(stack, count))
+        self._prune()
+        return file
+
+    def discard(self):
+        """Forget the calling thread's samples"""
+        with self._lock:
+            self._samples.pop(get_ident(), None)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, samples in self._samples.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_fold(frame)] += 1
+
+    def _prune(self):
+        files = sorted(name for name in listdir(self.directory) if name.endswith(".folded"))
+        for name in files[:max(len(files) - self.max_files, 0)]:
+            try:
+                unlink(path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+def _fold(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append("{} ({}:{})".format(code.co_name, path.basename(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,16 +1,67 @@
-from flask import Flask, request, jsonify, Blueprint
-from org.combatwombat.dst.config.Server import Server, ServerSchema
-from org.combatwombat.dst.config.Cluster import Cluster, ClusterSchema
+from flask import Flask, Response, request, jsonify, stream_with_context, Blueprint
+from org.combatwombat.dst.config.Server import Server, LazyServer, server_schema
+from org.combatwombat.dst.config.Cluster import Cluster, LazyCluster, cluster_schema
+from org.combatwombat.dst.config import Fleet, Rules, Topology, ini
+from org.combatwombat.dst.config.ClusterDirectory import fast_cluster_directory_schema
+from org.combatwombat.dst.config.Cache import config_cache
+from org.combatwombat.dst.config.History import ConfigHistory
+from org.combatwombat.dst.config.world.WorldOverride import WorldOverride, world_override_schema, WORLD_FILES
+from org.combatwombat.dst.config.mods.ModIndex import ModIndex
+from org.combatwombat.dst.config.mods.ModOverrides import ModOverrides, mod_overrides_schema, write_server_mods_setup, \
+    MODOVERRIDES, SERVER_MODS_SETUP
+from org.combatwombat.dst.config.Watcher import ConfigWatcher
+from org.combatwombat.dst.config.Ports import PortIndex, PORT_KINDS
+from org.combatwombat.dst.config.Search import SearchIndex
+from org.combatwombat.dst.config.PlayerList import PlayerList, PLAYER_LISTS, update_player_lists
+from org.combatwombat.dst.process.Supervisor import Supervisor
+from org.combatwombat.dst.process.Console import ConsoleDispatcher, SAVE_COMMAND, announce_command
+from org.combatwombat.dst.log.ShardLogs import ShardLogs
+from org.combatwombat.dst.save.SaveManager import SaveManager
+from org.combatwombat.dst.log.ServerLog import parse_time
 from org.combatwombat.web.flask import settings
-from configparser import ConfigParser
+from org.combatwombat.web.flask.metrics import RequestMetrics, SamplingProfiler
+from org.combatwombat.web.flask.encoding import ResponseEncoder
+from configparser import Error as ConfigParserError
 from os import path
+from queue import Empty
+import json
+from marshmallow import ValidationError
 
 app = Flask(__name__)
 app.config["TEMPLATES_AUTO_RELOAD"] = True
+config_watcher = ConfigWatcher(settings.CLUSTERS_ROOT, settings.WATCH_POLL_INTERVAL)
+port_index = PortIndex(settings.CLUSTERS_ROOT, config_watcher)
+search_index = SearchIndex(settings.CLUSTERS_ROOT, config_watcher)
+config_history = ConfigHistory(settings.HISTORY_ROOT)
+request_metrics = RequestMetrics(profiler=SamplingProfiler(settings.PROFILE_DIR, settings.PROFILE_THRESHOLD,
+                                                           settings.PROFILE_INTERVAL, settings.PROFILE_MAX_FILES))
+response_encoder = ResponseEncoder(('cluster_read', 'server_read', 'world_read', 'mods', 'mods_read', 'batch_read',
+                                    'validate', 'ports', 'ports_check', 'search', 'players_read', 'history',
+                                    'history_diff', 'history_stats'),
+                                   settings.RESPONSE_COMPRESSION_MIN_SIZE, settings.RESPONSE_COMPRESSION_LEVEL,
+                                   settings.RESPONSE_DELTA_CACHE_SIZE, settings.RESPONSE_DELTA_CACHE_BYTES)
+supervisor = Supervisor(settings.DST_EXECUTABLE, settings.CLUSTERS_ROOT, settings.SUPERVISOR_MAX_WORKERS,
+                        settings.SHARD_OUTPUT_LINES)
+console = ConsoleDispatcher(supervisor, settings.CONSOLE_QUEUE_SIZE, settings.CONSOLE_TIMEOUT,
+                            settings.CONSOLE_MAX_TIMEOUT)
+shard_logs = ShardLogs(settings.CLUSTERS_ROOT)
+mod_index = ModIndex(settings.MODS_DIR, settings.MOD_INDEX_FILE)
+save_manager = SaveManager(settings.CLUSTERS_ROOT, settings.BACKUP_ROOT, settings.BACKUP_MAX_WORKERS,
+                           settings.BACKUP_MAX_BYTES_PER_SECOND, settings.BACKUP_KEEP)
 
 
 def configure_app(flask_app):
     flask_app.config['SERVER_NAME'] = settings.FLASK_SERVER_NAME
+    config_cache.maxsize = settings.CONFIG_CACHE_SIZE
+    if settings.HISTORY_ENABLED:
+        ini.add_before_write_listener(config_history.snapshot)
+        ini.add_write_listener(config_history.record)
+    if settings.RESPONSE_ENCODING_ENABLED:
+        response_encoder.install(flask_app)
+    if settings.METRICS_ENABLED:
+        request_metrics.install(flask_app)
+        if settings.PROFILE_ENABLED:
+            request_metrics.profiler.start()
 
 
 def initialize_app(flask_app):
@@ -36,58 +87,124 @@ def info():
         "Write configured cluster.ini": "POST /config/cluster/write",
         "Create cluster config": "GET /config/cluster/read",
         "Read cluster config": "POST /config/cluster/read",
+        "Read one cluster config section": "POST /config/cluster/read?section=network",
         "Write default server.ini": "GET /config/server/write",
         "Write configured server.ini": "POST /config/server/write",
         "Create server config": "GET /config/server/read",
-        "Read server config": "POST /config/server/read"
+        "Read server config": "POST /config/server/read",
+        "Read one server config section": "POST /config/server/read?section=shard",
+        "Create world settings": "GET /config/world/read",
+        "Read world settings": "POST /config/world/read",
+        "Render world settings as Lua": "POST /config/world/read?format=lua",
+        "Write worldgenoverride.lua or leveldataoverride.lua": "POST /config/world/write",
+        "Installed mods": "GET /config/mods",
+        "Read modoverrides.lua": "POST /config/mods/read",
+        "Write modoverrides.lua for every shard of a cluster": "POST /config/mods/write",
+        "Write dedicated_server_mods_setup.lua for every cluster's mods": "POST /config/mods/setup",
+        "Read many cluster directories": "POST /config/batch/read",
+        "Write many cluster directories": "POST /config/batch/write",
+        "Validate cluster directories": "POST /config/validate",
+        "Config cache statistics": "GET /config/cache/stats",
+        "Stream config changes (Server-Sent Events)": "GET /config/watch",
+        "Build multi-shard cluster": "POST /config/topology/build",
+        "Next free ports and port conflicts": "GET /config/ports",
+        "Check server config for port conflicts": "POST /config/ports/check",
+        "Search cluster settings": "POST /config/search",
+        "Read a whitelist, adminlist or blocklist, or check ids in it": "POST /config/players/read",
+        "Add and remove ids in a player list of many clusters": "POST /config/players/update",
+        "Config file versions": "GET /config/history?path=<file>",
+        "Diff two config file versions": "GET /config/history/diff?path=<file>&from=<version>&to=<version>",
+        "Roll config file back to a version": "POST /config/history/rollback",
+        "Config history statistics": "GET /config/history/stats",
+        "Request metrics (Prometheus)": "GET /metrics",
+        "Toggle slow request profiler": "POST /metrics/profiler",
+        "Export every cluster (NDJSON stream)": "GET /config/export",
+        "Import clusters (NDJSON stream)": "POST /config/import",
+        "Shard process status": "GET /api/v1/shards",
+        "Start shards": "POST /api/v1/shards/start",
+        "Stop shards": "POST /api/v1/shards/stop",
+        "Restart shards": "POST /api/v1/shards/restart",
+        "Shard output": "GET /api/v1/shards/<cluster>/<shard>/output",
+        "Send a console command to running shards": "POST /api/v1/console",
+        "Save running shards (c_save)": "POST /api/v1/console/save",
+        "Announce a message on running shards (c_announce)": "POST /api/v1/console/announce",
+        "Read shard log (last ?lines= or ?from=HH:MM&to=HH:MM)": "GET /api/v1/logs/<cluster>/<shard>",
+        "Stream shard log (Server-Sent Events)": "GET /api/v1/logs/<cluster>/<shard>/stream",
+        "Save snapshots of a shard": "GET /api/v1/saves/<cluster>/<shard>",
+        "Back up shard save folders": "POST /api/v1/saves/backup",
+        "Backup jobs": "GET /api/v1/saves/jobs",
+        "Restore a shard save folder": "POST /api/v1/saves/restore"
     }
 
     return jsonify(output)
 
 
+def check_write(file, config):
+    """Validation errors that block writing a configuration, as a response body or None"""
+    if not settings.VALIDATE_WRITES:
+        return None
+    with request_metrics.phase('validate'):
+        problems = Rules.errors(Fleet.check_write(file, config))
+    if problems:
+        return "configuration failed validation:\n {}".format(json.dumps(problems))
+    return None
+
+
 @app.route('/config/cluster/write', methods=['GET', 'POST'])
 def cluster_write():
     """Write cluster configuration to cluster.ini"""
     if request.method == "POST":
         content = request.json
         if 'config' in content:
-            cluster = ClusterSchema().loads(content['config'])
+            with request_metrics.phase('validate'):
+                cluster = cluster_schema.loads(content['config'])
         else:
             cluster = Cluster()
 
-        if 'path' in content:
-            cluster.write_ini(content['path'])
-        else:
-            cluster.write_ini('./cluster.ini')
+        problems = check_write(content.get('path', './cluster.ini'), cluster)
+        if problems:
+            return problems, 400
+        with request_metrics.phase('file_io'):
+            cluster.write_ini(content.get('path', './cluster.ini'))
     else:
         cluster = Cluster()
-        cluster.write_ini('./cluster.ini')
+        with request_metrics.phase('file_io'):
+            cluster.write_ini('./cluster.ini')
 
-    return "wrote configuration as follows:\n {}".format(cluster.to_json())
+    with request_metrics.phase('serialize'):
+        return "wrote configuration as follows:\n {}".format(cluster.to_json())
 
 
 @app.route('/config/cluster/read', methods=['GET', 'POST'])
 def cluster_read():
-    """Read cluster configuration from cluster.ini or make default configuration"""
-    cluster_schema = ClusterSchema()
-    if request.method == "POST":
-        content = request.json
-        if 'config' in content:
-            cluster = cluster_schema.load(content['config'])
-        elif 'path' in content:
-            config_data = ConfigParser()
-            if path.exists(content['path']):
-                with open(content['path'], 'r') as in_file:
-                    config_data.read(in_file)
-                    cluster = cluster_schema.load(config_data._sections)
+    """Read cluster configuration from cluster.ini or make default configuration, only one section if requested"""
+    section = request.args.get('section')
+    if section is not None and section not in LazyCluster.SECTIONS:
+        return 'Unknown section {}.'.format(section), 400
+
+    try:
+        if request.method == "POST":
+            content = request.json
+            if 'config' in content:
+                with request_metrics.phase('validate'):
+                    cluster = cluster_schema.load(content['config'])
+            elif 'path' in content:
+                if path.exists(content['path']):
+                    with request_metrics.phase('file_io'):
+                        cluster = LazyCluster.load(content['path']) if section else Cluster.load_ini(content['path'])
+                else:
+                    return 'Specified file not found.'
             else:
-                return 'Specified file not found.'
+                return 'No valid options specified in post'
         else:
-            return 'No valid options specified in post'
-    else:
-        cluster = Cluster()
+            cluster = Cluster()
 
-    return cluster.to_json()
+        with request_metrics.phase('serialize'):
+            if section:
+                return getattr(cluster, section).to_json()
+            return cluster.to_json()
+    except (ConfigParserError, ValidationError) as error:
+        return 'Invalid cluster settings: {}'.format(getattr(error, 'messages', error)), 400
 
 
 @app.route('/config/server/write', methods=['GET', 'POST'])
@@ -96,48 +213,593 @@ def server_write():
     if request.method == "POST":
         content = request.json
         if 'config' in content:
-            server = ServerSchema().load(content['config'])
+            with request_metrics.phase('validate'):
+                server = server_schema.load(content['config'])
         else:
             server = Server()
 
-        if 'path' in content:
-            server.write_ini(content['path'])
-        else:
-            server.write_ini('./server.ini')
+        problems = check_write(content.get('path', './server.ini'), server)
+        if problems:
+            return problems, 400
+        with request_metrics.phase('file_io'):
+            server.write_ini(content.get('path', './server.ini'))
     else:
         server = Server()
-        server.write_ini('./server.ini')
+        with request_metrics.phase('file_io'):
+            server.write_ini('./server.ini')
 
-    return "wrote configuration as follows:\n {}".format(server.to_json())
+    with request_metrics.phase('serialize'):
+        return "wrote configuration as follows:\n {}".format(server.to_json())
 
 
 @app.route('/config/server/read', methods=['GET', 'POST'])
 def server_read():
-    """Read server configuration from server.ini or make default configuration"""
-    server_schema = ServerSchema()
-    if request.method == "POST":
-        content = request.json
-        if 'config' in content:
-            server = server_schema.load(content['config'])
-        elif 'path' in content:
-            config_data = ConfigParser()
-            if path.exists(content['path']):
-                with open(content['path'], 'r') as in_file:
-                    config_data.read(in_file)
-                    server = server_schema.load(config_data._sections)
+    """Read server configuration from server.ini or make default configuration, only one section if requested"""
+    section = request.args.get('section')
+    if section is not None and section not in LazyServer.SECTIONS:
+        return 'Unknown section {}.'.format(section), 400
+
+    try:
+        if request.method == "POST":
+            content = request.json
+            if 'config' in content:
+                with request_metrics.phase('validate'):
+                    server = server_schema.load(content['config'])
+            elif 'path' in content:
+                if path.exists(content['path']):
+                    with request_metrics.phase('file_io'):
+                        server = LazyServer.load(content['path']) if section else Server.load_ini(content['path'])
+                else:
+                    return 'Specified file not found.'
             else:
-                return 'Specified file not found.'
+                return 'No valid options specified in post'
         else:
-            return 'No valid options specified in post'
+            server = Server()
+
+        with request_metrics.phase('serialize'):
+            if section:
+                return getattr(server, section).to_json()
+            return server.to_json()
+    except (ConfigParserError, ValidationError) as error:
+        return 'Invalid server settings: {}'.format(getattr(error, 'messages', error)), 400
+
+
+@app.route('/config/world/read', methods=['GET', 'POST'])
+def world_read():
+    """Read world settings from worldgenoverride.lua or leveldataoverride.lua or make default settings"""
+    try:
+        if request.method == "POST":
+            content = request.json
+            if 'config' in content:
+                world = world_override_schema.load(content['config'])
+            elif 'path' in content:
+                if path.exists(content['path']):
+                    world = WorldOverride.read_lua(content['path'])
+                else:
+                    return 'Specified file not found.'
+            else:
+                return 'No valid options specified in post'
+        else:
+            world = WorldOverride()
+    except (ValidationError, ValueError) as error:
+        return 'Invalid world settings: {}'.format(getattr(error, 'messages', error)), 400
+
+    if request.args.get('format') == 'lua':
+        return Response(world.to_lua(), mimetype='text/plain')
+    return world.to_json()
+
+
+@app.route('/config/world/write', methods=['POST'])
+def world_write():
+    """Write world settings to a shard's worldgenoverride.lua or leveldataoverride.lua"""
+    content = request.json
+    if 'path' not in content:
+        return 'No valid options specified in post'
+    if path.basename(content['path']) not in WORLD_FILES:
+        return 'World settings can only be written to {}.'.format(' or '.join(WORLD_FILES)), 400
+    try:
+        world = world_override_schema.load(content.get('config', {}))
+    except ValidationError as error:
+        return 'Invalid world settings: {}'.format(error.messages), 400
+
+    world.write_lua(content['path'])
+    return "wrote configuration as follows:\n {}".format(world.to_json())
+
+
+@app.route('/config/mods')
+def mods():
+    """Metadata of every mod in MODS_DIR, parsing only modinfo.lua files changed since they were indexed"""
+    mod_index.refresh()
+    return jsonify({"mods": mod_index.mods(), "errors": mod_index.errors()})
+
+
+@app.route('/config/mods/read', methods=['POST'])
+def mods_read():
+    """Read the mods enabled on a shard from its modoverrides.lua"""
+    content = request.json
+    if 'path' not in content:
+        return 'No valid options specified in post'
+    if not path.exists(content['path']):
+        return 'Specified file not found.'
+    try:
+        return ModOverrides.read_lua(content['path']).to_json()
+    except (ValidationError, ValueError) as error:
+        return 'Invalid mod settings: {}'.format(getattr(error, 'messages', error)), 400
+
+
+@app.route('/config/mods/write', methods=['POST'])
+def mods_write():
+    """Write modoverrides.lua to every shard of a cluster, or the listed shards, filling in default mod options"""
+    content = request.json
+    if 'cluster' not in content:
+        return 'No valid options specified in post'
+    try:
+        overrides = mod_overrides_schema.load(content.get('config', {}))
+        shards = supervisor.shard_names(content['cluster'])
+    except ValidationError as error:
+        return 'Invalid mod settings: {}'.format(error.messages), 400
+    except (OSError, ValueError) as error:
+        return str(error), 400
+    unknown = set(content.get('shards', shards)) - set(shards)
+    if unknown:
+        return 'Unknown shards {}.'.format(', '.join(sorted(unknown))), 400
+
+    mod_index.refresh()
+    overrides = overrides.with_defaults(mod_index)
+    results = {}
+    for shard in content.get('shards', shards):
+        file = path.join(settings.CLUSTERS_ROOT, content['cluster'], shard, MODOVERRIDES)
+        results[shard] = overrides.write_lua(file)
+    return jsonify({"written": results, "config": json.loads(overrides.to_json())})
+
+
+@app.route('/config/mods/setup', methods=['POST'])
+def mods_setup():
+    """Write MODS_DIR/dedicated_server_mods_setup.lua downloading the Workshop mods enabled in any shard"""
+    content = request.get_json(silent=True) or {}
+    workshop_ids = set()
+    errors = {}
+    for cluster in supervisor.clusters():
+        for shard in supervisor.shard_names(cluster):
+            file = path.join(settings.CLUSTERS_ROOT, cluster, shard, MODOVERRIDES)
+            if not path.exists(file):
+                continue
+            try:
+                workshop_ids.update(ModOverrides.read_lua(file).workshop_ids())
+            except (OSError, ValidationError, ValueError) as error:
+                errors[file] = str(error)
+    file = path.join(settings.MODS_DIR, SERVER_MODS_SETUP)
+    try:
+        written = write_server_mods_setup(file, workshop_ids, content.get('collections', ()))
+    except ValueError as error:
+        return str(error), 400
+    except OSError as error:
+        return 'Could not write {}: {}'.format(file, error), 500
+    return jsonify({"path": file, "written": written, "workshop_ids": sorted(workshop_ids), "errors": errors})
+
+
+@app.route('/config/batch/read', methods=['POST'])
+def batch_read():
+    """Read cluster.ini and server.ini files from many cluster directories"""
+    content = request.json
+    if 'paths' not in content and 'glob' not in content:
+        return 'No valid options specified in post'
+    paths = content.get('paths', [])
+    if not isinstance(paths, list) or not all(isinstance(directory, str) for directory in paths) \
+            or not isinstance(content.get('glob', ''), str):
+        return 'No valid options specified in post', 400
+
+    section = content.get('section')
+    if section is not None and section not in LazyCluster.SECTIONS:
+        return 'Unknown section {}.'.format(section), 400
+
+    with request_metrics.phase('file_io'):
+        directories = Fleet.find_cluster_dirs(content.get('paths'), content.get('glob'))
+        results = Fleet.read_clusters(directories, settings.BATCH_MAX_WORKERS, section)
+    return jsonify({"results": results})
+
+
+@app.route('/config/validate', methods=['POST'])
+def validate():
+    """Check cross-section and cross-file rules for many cluster directories, every cluster by default"""
+    content = request.get_json(silent=True) or {}
+    with request_metrics.phase('validate'):
+        if 'paths' in content or 'glob' in content:
+            directories = Fleet.find_cluster_dirs(content.get('paths'), content.get('glob'))
+        else:
+            directories = Fleet.find_cluster_dirs(pattern=path.join(settings.CLUSTERS_ROOT, '*'))
+        diagnostics = Fleet.validate_clusters(directories, settings.BATCH_MAX_WORKERS)
+    return jsonify({"diagnostics": diagnostics})
+
+
+@app.route('/config/batch/write', methods=['POST'])
+def batch_write():
+    """Write cluster.ini and server.ini files to many cluster directories"""
+    content = request.json
+    if not isinstance(content.get('clusters'), list) \
+            or not all(isinstance(entry, dict) for entry in content['clusters']):
+        return 'No valid options specified in post', 400
+
+    with request_metrics.phase('file_io'):
+        results = Fleet.write_clusters(content['clusters'], settings.BATCH_MAX_WORKERS, settings.VALIDATE_WRITES)
+    return jsonify({"results": results})
+
+
+@app.route('/config/cache/stats')
+def cache_stats():
+    """Parsed config cache hit/miss counters"""
+    return jsonify(config_cache.stats())
+
+
+@app.route('/config/watch')
+def watch():
+    """Stream changes to cluster.ini and server.ini files below CLUSTERS_ROOT as Server-Sent Events"""
+    config_watcher.start()
+    events = config_watcher.subscribe()
+
+    def stream():
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=settings.WATCH_KEEPALIVE)
+                except Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield "data: {}\n\n".format(json.dumps(event))
+        finally:
+            config_watcher.unsubscribe(events)
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route('/config/topology/build', methods=['POST'])
+def topology_build():
+    """Generate and write cluster.ini plus every shard's server.ini for a multi-shard cluster"""
+    content = request.json
+    if not isinstance(content.get('path'), str):
+        return 'No valid options specified in post'
+
+    port_index.build()
+    try:
+        cluster_directory = Topology.build_topology(
+            layout=content.get('shards', 2),
+            cluster=cluster_schema.load(content['config']) if 'config' in content else None,
+            master_ip=content.get('master_ip', '127.0.0.1'),
+            bind_ip=content.get('bind_ip', '127.0.0.1'),
+            cluster_key=content.get('cluster_key'),
+            master_port=content.get('master_port') or port_index.next_free('master_port'),
+            taken_ports=port_index.ports())
+    except ValidationError as error:
+        return 'Invalid topology: {}'.format(json.dumps(error.messages)), 400
+    except ValueError as error:
+        return 'Invalid topology: {}'.format(error), 400
+
+    cluster_directory.write(content['path'])
+    return "wrote configuration as follows:\n {}".format(fast_cluster_directory_schema.dumps(cluster_directory))
+
+
+@app.route('/config/ports')
+def ports():
+    """Next free port of every kind and ports used by more than one server on this host"""
+    port_index.build()
+    return jsonify({
+        "next": {kind: port_index.next_free(kind) for kind in PORT_KINDS},
+        "conflicts": port_index.conflicts(),
+        "errors": port_index.errors
+    })
+
+
+@app.route('/config/ports/check', methods=['POST'])
+def ports_check():
+    """Check a server configuration's ports against every other server on this host"""
+    content = request.json
+    if 'config' not in content:
+        return 'No valid options specified in post'
+
+    try:
+        server = server_schema.load(content['config'])
+    except ValidationError as error:
+        return 'Invalid server settings: {}'.format(error.messages), 400
+    port_index.build()
+    return jsonify({"conflicts": port_index.conflicts(content.get('path'), server)})
+
+
+@app.route('/config/search', methods=['POST'])
+def search():
+    """Find clusters below CLUSTERS_ROOT by their settings, with filters, sorting and paging"""
+    content = request.get_json(silent=True) or {}
+    search_index.build()
+    try:
+        return jsonify(search_index.query(filters=content.get('filters', ()), sort=content.get('sort'),
+                                          descending=content.get('descending', False),
+                                          offset=content.get('offset', 0), limit=content.get('limit', 100),
+                                          fields=content.get('fields')))
+    except ValueError as error:
+        return 'Invalid search: {}'.format(error), 400
+
+
+@app.route('/config/players/read', methods=['POST'])
+def players_read():
+    """Read a cluster's whitelist.txt, adminlist.txt or blocklist.txt, or only check whether some ids are in it"""
+    content = request.json
+    if 'path' not in content or content.get('list') not in PLAYER_LISTS:
+        return 'No valid options specified in post'
+    if 'ids' in content and (not isinstance(content['ids'], list)
+                             or not all(isinstance(player_id, str) for player_id in content['ids'])):
+        return 'No valid options specified in post'
+    players = PlayerList.load(path.join(content['path'], PLAYER_LISTS[content['list']]))
+    if 'ids' in content:
+        return jsonify({"size": len(players), "contains": {player_id: player_id in players
+                                                           for player_id in content['ids']}})
+    return jsonify({"size": len(players), "ids": list(players)})
+
+
+@app.route('/config/players/update', methods=['POST'])
+def players_update():
+    """Add and remove ids in the same player list of many cluster directories, every cluster by default"""
+    content = request.json
+    add = content.get('add', [])
+    remove = content.get('remove', [])
+    if content.get('list') not in PLAYER_LISTS or not isinstance(add, list) or not isinstance(remove, list) \
+            or not all(isinstance(player_id, str) for player_id in add + remove):
+        return 'No valid options specified in post'
+    if 'paths' in content or 'glob' in content:
+        directories = Fleet.find_cluster_dirs(content.get('paths'), content.get('glob'))
     else:
-        server = Server()
+        directories = Fleet.find_cluster_dirs(pattern=path.join(settings.CLUSTERS_ROOT, '*'))
+    try:
+        results = update_player_lists(directories, content['list'], add, remove, settings.BATCH_MAX_WORKERS)
+    except ValueError as error:
+        return str(error), 400
+    return jsonify({"results": results})
+
+
+@app.route('/config/history')
+def history():
+    """List the recorded versions of a cluster.ini or server.ini"""
+    if 'path' not in request.args:
+        return 'No path specified.', 400
+    return jsonify({"path": path.abspath(request.args['path']),
+                    "versions": config_history.versions(request.args['path'])})
+
+
+@app.route('/config/history/diff')
+def history_diff():
+    """Unified diff between two versions of a cluster.ini or server.ini, the newest version by default"""
+    if 'path' not in request.args or 'from' not in request.args:
+        return 'No path or from version specified.', 400
+    versions = config_history.versions(request.args['path'])
+    try:
+        return Response(config_history.diff(request.args['path'], request.args.get('from', type=int),
+                                            request.args.get('to', len(versions), type=int)),
+                        mimetype='text/plain')
+    except ValueError as error:
+        return str(error), 404
+
+
+@app.route('/config/history/rollback', methods=['POST'])
+def history_rollback():
+    """Restore a cluster.ini or server.ini to a recorded version"""
+    content = request.json
+    if 'path' not in content or 'version' not in content:
+        return 'No valid options specified in post'
+    try:
+        config = config_history.load(content['path'], content['version'])
+        if config is not None:
+            problems = check_write(content['path'], config)
+            if problems:
+                return problems, 400
+        version = config_history.rollback(content['path'], content['version'])
+    except ValueError as error:
+        return str(error), 404
+    except (ConfigParserError, ValidationError) as error:
+        return 'Version {} can not be restored: {}'.format(content['version'], getattr(error, 'messages', error)), 400
+    return jsonify({"path": path.abspath(content['path']), "version": version})
+
+
+@app.route('/config/history/stats')
+def history_stats():
+    """Size of the config version store"""
+    return jsonify(config_history.stats())
+
+
+@app.route('/metrics')
+def metrics():
+    """Request latency histograms and phase times in the Prometheus text format"""
+    if not request_metrics.installed:
+        return 'Metrics are disabled, set METRICS_ENABLED in settings.', 404
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/metrics/profiler', methods=['POST'])
+def metrics_profiler():
+    """Start or stop sampling request stacks, optionally changing the slow request threshold in seconds"""
+    if not request_metrics.installed:
+        return 'Metrics are disabled, set METRICS_ENABLED in settings.', 404
+    content = request.get_json(silent=True) or {}
+    profiler = request_metrics.profiler
+    if 'threshold' in content:
+        profiler.threshold = float(content['threshold'])
+    if content.get('enabled', True):
+        profiler.start()
+    else:
+        profiler.stop()
+    return jsonify({"enabled": profiler.enabled, "threshold": profiler.threshold, "directory": profiler.directory})
+
+
+@app.route('/config/export')
+def export():
+    """Stream every cluster directory below CLUSTERS_ROOT, or those matching ?glob=, as NDJSON"""
+    directories = Fleet.find_cluster_dirs(pattern=request.args.get('glob', path.join(settings.CLUSTERS_ROOT, '*')))
+    return Response(stream_with_context(Fleet.export_clusters(settings.CLUSTERS_ROOT, directories)),
+                    mimetype='application/x-ndjson')
+
+
+@app.route('/config/import', methods=['POST'])
+def import_():
+    """Validate and write cluster directories below CLUSTERS_ROOT from an NDJSON request body"""
+    return jsonify(Fleet.import_clusters(settings.CLUSTERS_ROOT, request.stream, settings.VALIDATE_WRITES))
+
 
-    return server.to_json()
+@app.route('/api/v1/shards')
+def shards_status():
+    """Status of every started shard process, optionally limited to ?cluster="""
+    clusters = request.args.getlist('cluster') or None
+    return jsonify(supervisor.status(clusters))
+
+
+@app.route('/api/v1/shards/start', methods=['POST'])
+def shards_start():
+    """Start shard processes, every shard of every cluster unless clusters/shards are given"""
+    content = request.get_json(silent=True) or {}
+    return jsonify(supervisor.start(content.get('clusters'), content.get('shards')))
+
+
+@app.route('/api/v1/shards/stop', methods=['POST'])
+def shards_stop():
+    """Ask shard processes to shut down, every shard of every cluster unless clusters/shards are given"""
+    content = request.get_json(silent=True) or {}
+    return jsonify(supervisor.stop(content.get('clusters'), content.get('shards'), settings.SHARD_STOP_TIMEOUT))
+
+
+@app.route('/api/v1/shards/restart', methods=['POST'])
+def shards_restart():
+    """Restart shard processes, every shard of every cluster unless clusters/shards are given"""
+    content = request.get_json(silent=True) or {}
+    return jsonify(supervisor.restart(content.get('clusters'), content.get('shards'), settings.SHARD_STOP_TIMEOUT))
+
+
+@app.route('/api/v1/shards/<cluster>/<shard>/output')
+def shard_output(cluster, shard):
+    """Most recent output lines of a shard process, limited to ?lines="""
+    try:
+        process = supervisor.shard(cluster, shard)
+    except ValueError as error:
+        return str(error), 404
+    lines = list(process.output)
+    count = max(request.args.get('lines', len(lines), type=int), 0)
+    return jsonify({"status": process.status(), "output": lines[max(len(lines) - count, 0):]})
+
+
+@app.route('/api/v1/console', methods=['POST'])
+def console_send():
+    """Send a console command to every running shard unless clusters/shards are given, with the response of each"""
+    content = request.json
+    if 'command' not in content:
+        return 'No valid options specified in post'
+    try:
+        return jsonify(console.send(content['command'], content.get('clusters'), content.get('shards'),
+                                    content.get('timeout')))
+    except ValueError as error:
+        return str(error), 400
+
+
+@app.route('/api/v1/console/save', methods=['POST'])
+def console_save():
+    """Save the world of every running shard unless clusters/shards are given"""
+    content = request.get_json(silent=True) or {}
+    try:
+        return jsonify(console.send(SAVE_COMMAND, content.get('clusters'), content.get('shards'),
+                                    content.get('timeout')))
+    except ValueError as error:
+        return str(error), 400
+
+
+@app.route('/api/v1/console/announce', methods=['POST'])
+def console_announce():
+    """Show a message to the players of every running shard unless clusters/shards are given"""
+    content = request.json
+    if 'message' not in content:
+        return 'No valid options specified in post'
+    try:
+        return jsonify(console.send(announce_command(content['message']), content.get('clusters'),
+                                    content.get('shards'), content.get('timeout')))
+    except ValueError as error:
+        return str(error), 400
+
+
+@app.route('/api/v1/logs/<cluster>/<shard>')
+def log_read(cluster, shard):
+    """Read the last ?lines= of a shard's server_log.txt, or the lines logged between ?from= and ?to="""
+    try:
+        log = shard_logs.log(cluster, shard)
+    except ValueError as error:
+        return str(error), 404
+    if 'from' in request.args or 'to' in request.args:
+        try:
+            start = parse_time(request.args.get('from', '0:00'))
+            end = parse_time(request.args.get('to', '9999:59:59'))
+        except ValueError as error:
+            return 'Invalid time: {}'.format(error), 400
+        limit = request.args.get('limit', settings.LOG_MAX_LINES, type=int)
+        return jsonify({"lines": log.between(start, end, min(max(limit, 0), settings.LOG_MAX_LINES))})
+    lines, offset = log.tail(min(max(request.args.get('lines', 100, type=int), 0), settings.LOG_MAX_LINES))
+    return jsonify({"lines": lines, "offset": offset})
+
+
+@app.route('/api/v1/logs/<cluster>/<shard>/stream')
+def log_stream(cluster, shard):
+    """Stream lines appended to a shard's server_log.txt after ?offset= (default: the current end)"""
+    try:
+        log = shard_logs.log(cluster, shard)
+    except ValueError as error:
+        return str(error), 404
+
+    def stream():
+        for line in log.follow(request.args.get('offset', type=int), settings.LOG_POLL_INTERVAL,
+                               settings.WATCH_KEEPALIVE):
+            if line is None:
+                yield ": keepalive\n\n"
+                continue
+            yield "data: {}\n\n".format(json.dumps(line))
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route('/api/v1/saves/<cluster>/<shard>')
+def saves_list(cluster, shard):
+    """Snapshots of a shard's save folder, oldest first"""
+    try:
+        return jsonify(save_manager.snapshots(cluster, shard))
+    except ValueError as error:
+        return str(error), 404
+
+
+@app.route('/api/v1/saves/backup', methods=['POST'])
+def saves_backup():
+    """Queue backups of shard save folders, every shard of every cluster unless clusters/shards are given"""
+    content = request.get_json(silent=True) or {}
+    return jsonify(save_manager.submit(content.get('clusters'), content.get('shards')))
+
+
+@app.route('/api/v1/saves/jobs')
+def saves_jobs():
+    """Status of every queued, running and finished backup"""
+    return jsonify(save_manager.jobs())
+
+
+@app.route('/api/v1/saves/restore', methods=['POST'])
+def saves_restore():
+    """Replace a stopped shard's save folder with one of its snapshots"""
+    content = request.json
+    if 'cluster' not in content or 'shard' not in content or 'snapshot' not in content:
+        return 'No valid options specified in post'
+    for status in supervisor.status([content['cluster']]):
+        if status['shard'] == content['shard'] and status['state'] in ('running', 'stopping'):
+            return 'Shard {}/{} is running, stop it before restoring.'.format(content['cluster'], content['shard']), 409
+    try:
+        return jsonify(save_manager.restore(content['cluster'], content['shard'], content['snapshot']))
+    except ValueError as error:
+        return str(error), 404
 
 
 def main():
-    initialize_app(app)
-    app.run(debug=settings.FLASK_DEBUG)
+    if settings.SERVER_MODE == 'production':
+        from org.combatwombat.web.flask import asgi
+        asgi.serve()
+    else:
+        initialize_app(app)
+        app.run(debug=settings.FLASK_DEBUG)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,72 @@
+from os import path
+import tempfile
+
 # Flask settings
 FLASK_SERVER_NAME = 'localhost:8888'
 FLASK_DEBUG = True  # Do not use debug mode in production
+
+# Serving settings
+SERVER_MODE = 'development'  # 'development' runs Flask's dev server, 'production' serves asgi.application with uvicorn
+SERVER_WORKERS = 1  # Worker processes in production mode. Keep 1: the shard supervisor, console queues, port and
+# search indexes, config history and save backups keep their state in the process that serves the request
+SERVER_THREADS = 32  # Request handling threads per worker process in production mode
+SERVER_STREAM_THREADS = 64  # Threads per worker process sending streamed responses, such as /config/watch events
+
+# Validation settings
+VALIDATE_WRITES = True  # Refuse /config/*/write requests that break a cross-section or cross-file rule
+
+# Batch config API settings
+BATCH_MAX_WORKERS = 8  # Threads used for file I/O by /config/batch/* routes
+
+# Response encoding settings
+RESPONSE_ENCODING_ENABLED = True  # ETags, JSON patch deltas and gzip/brotli compression for the config routes
+RESPONSE_COMPRESSION_MIN_SIZE = 1024  # Smallest response body in bytes that is compressed
+RESPONSE_COMPRESSION_LEVEL = 6  # gzip compression level, 1 (fastest) to 9 (smallest)
+RESPONSE_DELTA_CACHE_SIZE = 256  # Recent responses kept as bases for X-Delta-Base requests
+RESPONSE_DELTA_CACHE_BYTES = 32 * 1024 * 1024  # Total size of the responses kept as delta bases
+
+# Config cache settings
+CONFIG_CACHE_SIZE = 4096  # Parsed cluster.ini/server.ini files kept in memory
+
+# Cluster directories
+CLUSTERS_ROOT = path.expanduser('~/.klei/DoNotStarveTogether')  # Directory holding one sub directory per cluster
+
+# Config history settings
+HISTORY_ENABLED = True  # Record every cluster.ini/server.ini write for /config/history
+HISTORY_ROOT = path.join(CLUSTERS_ROOT, '.history')  # Directory holding the content addressed version store
+
+# Save backup settings
+BACKUP_ROOT = path.join(CLUSTERS_ROOT, '.backups')  # Directory holding the deduplicated save folder snapshots
+BACKUP_MAX_WORKERS = 2  # Shards backed up in parallel
+BACKUP_MAX_BYTES_PER_SECOND = 32 * 1024 * 1024  # Disk I/O limit of all backups and restores together, None for none
+BACKUP_KEEP = 20  # Newest snapshots kept per shard, None keeps every snapshot
+
+# Config watch settings
+WATCH_POLL_INTERVAL = 2.0  # Seconds between scans when watchdog is not installed
+WATCH_KEEPALIVE = 15  # Seconds between keepalive comments on /config/watch and /api/v1/logs/<cluster>/<shard>/stream
+
+# Dedicated server process settings
+DST_EXECUTABLE = path.expanduser(
+    "~/Steam/steamapps/common/Don't Starve Together Dedicated Server/bin/dontstarve_dedicated_server_nullrenderer")
+SUPERVISOR_MAX_WORKERS = 16  # Shards started or stopped in parallel
+SHARD_OUTPUT_LINES = 1000  # Output lines kept in memory per shard
+SHARD_STOP_TIMEOUT = 30  # Seconds to wait for c_shutdown() before terminating a shard
+CONSOLE_QUEUE_SIZE = 16  # Console commands waiting per shard before new ones are refused
+CONSOLE_TIMEOUT = 10  # Seconds to wait for the shards' responses to a console command
+CONSOLE_MAX_TIMEOUT = 60  # Longest timeout a console request may ask for
+
+# Mod settings
+MODS_DIR = path.join(path.dirname(path.dirname(DST_EXECUTABLE)), 'mods')  # Dedicated server's mods directory
+MOD_INDEX_FILE = path.join(CLUSTERS_ROOT, '.mod_index.json')  # Parsed modinfo.lua of every mod in MODS_DIR
+
+# Server log settings
+LOG_MAX_LINES = 10000  # Maximum lines returned by one /api/v1/logs request
+LOG_POLL_INTERVAL = 0.5  # Seconds between checks for new lines on /api/v1/logs/<cluster>/<shard>/stream
+
+# Metrics settings
+METRICS_ENABLED = False  # Record per route latency histograms and phase times, served on /metrics
+PROFILE_ENABLED = False  # Sample request stacks from startup, can be toggled with POST /metrics/profiler
+PROFILE_THRESHOLD = 0.5  # Seconds a request must take for its stacks to be written
+PROFILE_INTERVAL = 0.005  # Seconds between stack samples
+PROFILE_DIR = path.join(tempfile.gettempdir(), 'dst-gui-profiles')  # Folded stack files of slow requests
+PROFILE_MAX_FILES = 100  # Newest folded stack files kept in PROFILE_DIR
@@ -1,4 +1,4 @@
-from setuptools import setup
+from setuptools import find_packages, setup
 
 setup(name='dst-gui',
       version='0.1',
@@ -7,10 +7,18 @@ setup(name='dst-gui',
       author='Ben Abrams',
       author_email='combatwombat16@gmail.com',
       license='MIT',
-      packages=[],
+      packages=find_packages(include=['org', 'org.*']),
       install_requires=[
           'flask',
           'react',
-          'marshmallow'
+          'marshmallow>=3,<4'
       ],
+      extras_require={
+          'watch': ['watchdog'],
+          'asgi': ['uvicorn'],
+          'brotli': ['brotli']
+      },
+      entry_points={
+          'console_scripts': ['dst-gui = org.combatwombat.cli:main']
+      },
       zip_safe=False)
@@ -0,0 +1,26 @@
+import pytest
+
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Ports import PortIndex
+from org.combatwombat.dst.config.Search import SearchIndex
+from org.combatwombat.web.flask import server
+
+
+@pytest.fixture(autouse=True)
+def write_listeners(monkeypatch):
+    """Drop the ini write listeners a test registers"""
+    monkeypatch.setattr(ini, "_listeners", list(ini._listeners))
+    monkeypatch.setattr(ini, "_before_listeners", list(ini._before_listeners))
+
+
+@pytest.fixture
+def clusters_root(tmp_path, monkeypatch):
+    """Clusters root the server module's indexes point at"""
+    monkeypatch.setattr(server, "port_index", PortIndex(str(tmp_path)))
+    monkeypatch.setattr(server, "search_index", SearchIndex(str(tmp_path)))
+    return tmp_path
+
+
+@pytest.fixture
+def client(clusters_root):
+    return server.app.test_client()
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+
+from flask import Flask, Response, request
+
+from org.combatwombat.web.flask.asgi import FlaskASGI
+
+app = Flask(__name__)
+first_line_read = threading.Event()
+
+
+@app.route("/lines", methods=["POST"])
+def lines():
+    count = 0
+    for line in request.stream:
+        first_line_read.set()
+        count += 1
+    return str(count)
+
+
+def call(application, chunks, wait_for=None):
+    sent = []
+
+    async def run():
+        queue = list(chunks)
+
+        async def receive():
+            if not queue:
+                await asyncio.sleep(60)
+                return {"type": "http.disconnect"}
+            if wait_for is not None and len(queue) == 1:
+                for _ in range(200):
+                    if wait_for.is_set():
+                        break
+                    await asyncio.sleep(0.01)
+                else:
+                    raise AssertionError("application did not start before the body ended")
+            chunk = queue.pop(0)
+            return {"type": "http.request", "body": chunk, "more_body": bool(queue)}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/lines", "query_string": b"",
+                 "headers": [(b"content-type", b"application/x-ndjson")]}
+        await asyncio.wait_for(application(scope, receive, send), 5)
+
+    asyncio.run(run())
+    return sent
+
+
+def test_body_is_streamed_to_the_application():
+    first_line_read.clear()
+    sent = call(FlaskASGI(app, max_workers=2), [b"a\n", b"b\nc", b"\n"], wait_for=first_line_read)
+    assert sent[0]["status"] == 200
+    assert b"".join(message.get("body", b"") for message in sent[1:]) == b"3"
+
+
+def test_empty_body():
+    sent = call(FlaskASGI(app, max_workers=2), [b""])
+    assert b"".join(message.get("body", b"") for message in sent[1:]) == b"0"
+
+
+produced = []
+streams_done = threading.Event()
+
+
+@app.route("/export")
+def export():
+    def chunks():
+        for number in range(1000):
+            produced.append(number)
+            yield b"x" * 100
+
+    return Response(chunks())
+
+
+@app.route("/events")
+def events():
+    def stream():
+        yield b"data: 1\n\n"
+        streams_done.wait(5)
+
+    return Response(stream(), mimetype="text/event-stream")
+
+
+def get(application, path, send):
+    async def receive():
+        await asyncio.sleep(60)
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []}
+    return application(scope, receive, send)
+
+
+def test_slow_client_blocks_the_application():
+    produced.clear()
+    application = FlaskASGI(app, max_workers=2, max_chunks=4)
+
+    async def run():
+        sent = []
+        reading = asyncio.Event()
+
+        async def send(message):
+            sent.append(message)
+            await reading.wait()
+
+        task = asyncio.ensure_future(get(application, "/export", send))
+        await asyncio.sleep(0.3)
+        buffered = len(produced)
+        reading.set()
+        await asyncio.wait_for(task, 5)
+        return buffered, sent
+
+    buffered, sent = asyncio.run(run())
+    assert buffered < 10
+    assert sum(len(message.get("body", b"")) for message in sent[1:]) == 100000
+
+
+def test_event_streams_do_not_take_request_threads():
+    streams_done.clear()
+    application = FlaskASGI(app, max_workers=1, max_streams=4)
+
+    async def run():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        streams = [asyncio.ensure_future(get(application, "/events", send)) for _ in range(2)]
+        await asyncio.sleep(0.3)
+        exported = []
+
+        async def collect(message):
+            exported.append(message)
+
+        await asyncio.wait_for(get(application, "/export", collect), 5)
+        streams_done.set()
+        await asyncio.wait_for(asyncio.gather(*streams), 5)
+        return sent, exported
+
+    sent, exported = asyncio.run(run())
+    assert [message["body"] for message in sent if message.get("body")] == [b"data: 1\n\n"] * 2
+    assert exported[0]["status"] == 200
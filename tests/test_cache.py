@@ -0,0 +1,77 @@
+import os
+
+from org.combatwombat.dst.config.Cache import ConfigCache
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, file):
+        self.calls.append(file)
+        with open(file) as config_file:
+            return config_file.read()
+
+
+def test_unchanged_files_are_parsed_once(tmp_path):
+    (tmp_path / "a.ini").write_text("a")
+    cache, loader = ConfigCache(), CountingLoader()
+    assert cache.get(str(tmp_path / "a.ini"), loader) == "a"
+    assert cache.get(str(tmp_path / "a.ini"), loader) == "a"
+    assert len(loader.calls) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 4096}
+
+
+def test_changed_stamp_invalidates_the_entry(tmp_path):
+    file = str(tmp_path / "a.ini")
+    (tmp_path / "a.ini").write_text("a")
+    cache, loader = ConfigCache(), CountingLoader()
+    cache.get(file, loader)
+    stamp = os.stat(file)
+
+    (tmp_path / "a.ini").write_text("b")  # Same size, only the mtime may differ
+    os.utime(file, ns=(stamp.st_atime_ns, stamp.st_mtime_ns + 1000))
+    assert cache.get(file, loader) == "b"
+
+    (tmp_path / "a.ini").write_text("bigger")  # Size changes, the mtime is set back
+    os.utime(file, ns=(stamp.st_atime_ns, stamp.st_mtime_ns + 1000))
+    assert cache.get(file, loader) == "bigger"
+
+    (tmp_path / "new.ini").write_text("newer!")  # Replaced like atomic_write, with the same mtime and size
+    os.utime(str(tmp_path / "new.ini"), ns=(stamp.st_atime_ns, stamp.st_mtime_ns + 1000))
+    os.replace(str(tmp_path / "new.ini"), file)
+    assert cache.get(file, loader) == "newer!"
+    assert len(loader.calls) == 4
+    assert (cache.hits, cache.misses) == (0, 4)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    for name in "abc":
+        (tmp_path / name).write_text(name)
+    cache, loader = ConfigCache(maxsize=2), CountingLoader()
+    cache.get(str(tmp_path / "a"), loader)
+    cache.get(str(tmp_path / "b"), loader)
+    cache.get(str(tmp_path / "a"), loader)  # b is now the least recently used
+    cache.get(str(tmp_path / "c"), loader)
+    assert cache.stats()["size"] == 2
+    loader.calls.clear()
+    cache.get(str(tmp_path / "a"), loader)
+    cache.get(str(tmp_path / "c"), loader)
+    assert loader.calls == []
+    cache.get(str(tmp_path / "b"), loader)
+    assert loader.calls == [str(tmp_path / "b")]
+    assert (cache.hits, cache.misses) == (3, 4)
+
+
+def test_entries_are_kept_per_loader_and_can_be_invalidated(tmp_path):
+    (tmp_path / "a").write_text("a")
+    cache, first, second = ConfigCache(), CountingLoader(), CountingLoader()
+    cache.get(str(tmp_path / "a"), first)
+    cache.get(str(tmp_path / "a"), second)
+    assert cache.stats()["size"] == 2
+    cache.invalidate(str(tmp_path / "a"))
+    assert cache.stats()["size"] == 0
+    cache.get(str(tmp_path / "a"), first)
+    cache.invalidate()
+    assert cache.stats()["size"] == 0
+    assert len(first.calls) == 2
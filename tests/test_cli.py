@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from org.combatwombat import cli
+from org.combatwombat.dst.config import defaults
+from org.combatwombat.dst.config.Cluster import Cluster, cluster_schema
+from org.combatwombat.dst.config.Server import Server, server_schema
+
+
+def test_write_then_read(tmp_path, capsys):
+    file = str(tmp_path / "server.ini")
+    assert cli.main(["config", "write", "server", file, "--no-validate"]) == 0
+    capsys.readouterr()
+    assert cli.main(["config", "read", "server", file, "--section", "network"]) == 0
+    assert json.loads(capsys.readouterr().out) == json.loads(cli.defaults("server", "network"))
+
+
+@pytest.mark.parametrize("text, message", [
+    ("[NETWORK]\nserver_port = abc\n", "Invalid configuration in"),
+    ("server_port = 10999\n", "Can not parse"),
+    ("[NETWORK]\n[NETWORK]\n", "Can not parse"),
+])
+@pytest.mark.parametrize("section", [[], ["--section", "network"]])
+def test_read_reports_invalid_files(tmp_path, capsys, text, message, section):
+    (tmp_path / "server.ini").write_text(text)
+    assert cli.main(["config", "read", "server", str(tmp_path / "server.ini")] + section) == 1
+    output = capsys.readouterr()
+    assert output.out == ""
+    assert output.err.startswith(message)
+
+
+def test_write_reports_invalid_configurations(tmp_path, capsys):
+    file = str(tmp_path / "server.ini")
+    assert cli.main(["config", "write", "server", file, "--config", '{"network": {"server_port": "abc"}}']) == 1
+    assert capsys.readouterr().err.startswith("Invalid configuration")
+    assert cli.main(["config", "read", "server", file]) == 1
+
+
+@pytest.mark.parametrize("config, schema, precomputed, precomputed_ini", [
+    (Cluster(), cluster_schema, defaults.DEFAULT_CLUSTER, defaults.DEFAULT_CLUSTER_INI),
+    (Server(), server_schema, defaults.DEFAULT_SERVER, defaults.DEFAULT_SERVER_INI),
+])
+def test_precomputed_defaults_match_the_config_classes(tmp_path, config, schema, precomputed, precomputed_ini):
+    assert json.dumps(schema.dump(config)) == json.dumps(precomputed)
+    file = str(tmp_path / "defaults.ini")
+    config.write_ini(file)
+    assert (tmp_path / "defaults.ini").read_text() == precomputed_ini
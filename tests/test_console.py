@@ -0,0 +1,121 @@
+import os
+import re
+import sys
+import time
+from timeit import default_timer
+
+import pytest
+
+from org.combatwombat.dst.config.Topology import build_topology
+from org.combatwombat.dst.process.Console import ConsoleDispatcher
+from org.combatwombat.dst.process.Supervisor import Supervisor
+from org.combatwombat.web.flask import server
+
+# Answers console commands like a shard: print(...) of the console marker prints it, any other
+# command echoes its text twice. Shard Slow never answers.
+STUB_SHARD = """#!{python}
+import re
+import sys
+shard = sys.argv[sys.argv.index("-shard") + 1]
+print("started", shard, flush=True)
+for line in sys.stdin:
+    if shard == "Slow":
+        continue
+    marker = re.match(r'print\\("(.*)" \\.\\. "(.*)"\\)', line.strip())
+    if marker:
+        print(marker.group(1) + marker.group(2), flush=True)
+    else:
+        print("answer", line.strip(), flush=True)
+        print("answer", line.strip(), flush=True)
+"""
+
+
+@pytest.fixture
+def supervisor(tmp_path):
+    executable = tmp_path / "bin" / "dontstarve_dedicated_server_nullrenderer"
+    executable.parent.mkdir()
+    executable.write_text(STUB_SHARD.format(python=sys.executable))
+    os.chmod(str(executable), 0o755)
+    root = tmp_path / "DoNotStarveTogether"
+    build_topology(["Master", "Caves"]).write(str(root / "Cluster_1"))
+    build_topology(["Slow"]).write(str(root / "Cluster_2"))
+    supervisor = Supervisor(str(executable), str(root))
+    yield supervisor
+    for process in supervisor._shards.values():
+        if process.process is not None and process.process.poll() is None:
+            process.process.kill()
+            process.process.wait()
+
+
+def start(supervisor, clusters):
+    supervisor.start(clusters)
+    deadline = time.monotonic() + 5
+    while any(not process.output for process in supervisor._shards.values()):
+        assert time.monotonic() < deadline, "shards did not start"
+        time.sleep(0.02)
+
+
+def by_shard(results):
+    return {result["shard"]: result for result in results}
+
+
+def test_output_is_matched_to_its_command(supervisor):
+    start(supervisor, ["Cluster_1"])
+    dispatcher = ConsoleDispatcher(supervisor)
+    for command in ("c_listallplayers()", "c_save()"):
+        results = by_shard(dispatcher.send(command, timeout=5))
+        assert set(results) == {"Master", "Caves"}
+        for result in results.values():
+            assert result["output"] == ["answer " + command] * 2
+            assert result["elapsed"] >= 0
+
+
+def test_unanswered_commands_time_out(supervisor):
+    start(supervisor, ["Cluster_1", "Cluster_2"])
+    dispatcher = ConsoleDispatcher(supervisor, max_timeout=0.3)
+    results = by_shard(dispatcher.send("c_save()", timeout=100))
+    assert results["Master"]["output"] == ["answer c_save()"] * 2
+    assert "timeout" in results["Slow"]["error"]
+    assert "output" not in results["Slow"]
+    results = by_shard(dispatcher.send("c_save()", clusters=["Cluster_2"], timeout=0.1))
+    assert "timeout" in results["Slow"]["error"]
+
+
+def test_full_queue_is_refused(supervisor):
+    supervisor.start(["Cluster_2"])
+    dispatcher = ConsoleDispatcher(supervisor, queue_size=1)
+    console = dispatcher._console("Cluster_2", "Slow")
+    console.submit("c_save()", default_timer() + 0.5)
+    console.submit("c_save()", default_timer() + 0.5)
+    with pytest.raises(RuntimeError):
+        for _ in range(2):
+            console.submit("c_save()", default_timer() + 0.5)
+
+
+@pytest.mark.parametrize("timeout", ["10", True, 0, -1])
+def test_invalid_timeouts_are_rejected(supervisor, timeout):
+    with pytest.raises(ValueError):
+        ConsoleDispatcher(supervisor).send("c_save()", timeout=timeout)
+
+
+def test_disabled_or_unreadable_console_is_reported(supervisor, tmp_path):
+    supervisor.start(["Cluster_1"])
+    cluster_ini = tmp_path / "DoNotStarveTogether" / "Cluster_1" / "cluster.ini"
+    text = cluster_ini.read_text()
+    cluster_ini.write_text(re.sub(r"console_enabled = \w+", "console_enabled = False", text))
+    results = ConsoleDispatcher(supervisor).send("c_save()", timeout=1)
+    assert [result["error"] for result in results] == ["console_enabled is off in cluster.ini."] * 2
+
+    cluster_ini.write_text(text.replace("[MISC]", "[MISC", 1))
+    results = ConsoleDispatcher(supervisor).send("c_save()", timeout=1)
+    assert all(result["error"].startswith("Can not read cluster.ini") for result in results)
+    assert all("output" not in result for result in results)
+
+
+def test_routes_reject_invalid_timeouts(supervisor, monkeypatch):
+    monkeypatch.setattr(server, "console", ConsoleDispatcher(supervisor))
+    client = server.app.test_client()
+    assert client.post("/api/v1/console", json={"command": "c_save()", "timeout": "abc"}).status_code == 400
+    assert client.post("/api/v1/console/save", json={"timeout": []}).status_code == 400
+    assert client.post("/api/v1/console/announce", json={"message": "hi", "timeout": -5}).status_code == 400
+    assert client.post("/api/v1/console/save", json={"timeout": 1}).get_json() == []
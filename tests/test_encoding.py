@@ -0,0 +1,121 @@
+import copy
+import gzip
+import json
+
+import pytest
+from flask import Flask, jsonify
+
+from org.combatwombat.web.flask import encoding
+from org.combatwombat.web.flask.encoding import DELTA_BASE_HEADER, JSON_PATCH_MIMETYPE, ResponseEncoder, json_patch
+
+
+def apply_patch(document, operations):
+    """Applies add, remove and replace operations as RFC 6902 defines them"""
+    document = copy.deepcopy(document)
+    for operation in operations:
+        if operation["path"] == "":
+            document = operation["value"]
+            continue
+        *parents, last = [key.replace("~1", "/").replace("~0", "~") for key in operation["path"].split("/")[1:]]
+        target = document
+        for key in parents:
+            target = target[int(key) if isinstance(target, list) else key]
+        last = int(last) if isinstance(target, list) else last
+        if operation["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = operation["value"]
+    return document
+
+
+@pytest.mark.parametrize("old, new", [
+    ({"a": 1, "b": {"c": [1, 2]}}, {"a": 1, "b": {"c": [1, 3]}, "d": None}),
+    ({"a/b": 1, "m~n": 2, "gone": 3}, {"a/b": 2, "m~n": {"x": 1}}),
+    ({"list": [1, 2]}, {"list": [1, 2, 3]}),
+    ({"flag": 1}, {"flag": True}),
+    ([1], {"a": 1}),
+])
+def test_json_patch_turns_old_into_new(old, new):
+    assert apply_patch(old, json_patch(old, new)) == new
+
+
+def test_json_patch_escapes_pointers_and_keeps_equal_values():
+    assert json_patch({"a": 1}, {"a": 1}) == []
+    assert json_patch({"a/b": 1, "m~n": 2}, {"a/b": 2}) == [
+        {"op": "remove", "path": "/m~0n"},
+        {"op": "replace", "path": "/a~1b", "value": 2},
+    ]
+
+
+@pytest.fixture
+def state():
+    return {"name": "Cluster_1", "shards": {"Master": {"port": 10999}}, "text": "x" * 400}
+
+
+@pytest.fixture
+def encoded_client(state):
+    app = Flask(__name__)
+
+    @app.route("/read")
+    def read():
+        return jsonify(state)
+
+    @app.route("/other")
+    def other():
+        return jsonify(state)
+
+    ResponseEncoder(("read",), min_size=2048, delta_cache_size=2).install(app)
+    return app.test_client()
+
+
+def test_etag_and_not_modified(encoded_client):
+    response = encoded_client.get("/read")
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert encoded_client.get("/read").headers["ETag"] == etag
+    response = encoded_client.get("/read", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.get_data() == b""
+    assert encoded_client.get("/read", headers={"If-None-Match": 'W/"other"'}).status_code == 200
+    assert "ETag" not in encoded_client.get("/other").headers
+
+
+def test_delta_against_a_known_base(encoded_client, state):
+    first = encoded_client.get("/read")
+    old = first.get_json()
+    state["shards"]["Master"]["port"] = 11000
+    state["shards"]["Caves"] = {"port": 11001}
+    response = encoded_client.get("/read", headers={DELTA_BASE_HEADER: first.headers["ETag"]})
+    assert response.mimetype == JSON_PATCH_MIMETYPE
+    assert response.headers[DELTA_BASE_HEADER] == first.headers["ETag"][2:]
+    assert DELTA_BASE_HEADER in response.headers["Vary"]
+    assert apply_patch(old, json.loads(response.get_data())) == state
+    full = encoded_client.get("/read", headers={"If-None-Match": response.headers["ETag"]})
+    assert full.status_code == 304
+
+
+def test_unknown_or_evicted_base_gets_the_full_body(encoded_client, state):
+    first = encoded_client.get("/read").headers["ETag"]
+    response = encoded_client.get("/read", headers={DELTA_BASE_HEADER: 'W/"unknown"'})
+    assert response.mimetype == "application/json" and response.get_json() == state
+    for port in (1, 2):  # Only two bases are kept
+        state["shards"]["Master"]["port"] = port
+        encoded_client.get("/read")
+    response = encoded_client.get("/read", headers={DELTA_BASE_HEADER: first})
+    assert response.mimetype == "application/json" and response.get_json() == state
+
+
+def test_large_patches_send_the_full_body(encoded_client, state):
+    state["ports"] = list(range(100))
+    first = encoded_client.get("/read").headers["ETag"]
+    state["ports"] = list(range(100, 200))  # One replace operation per item
+    response = encoded_client.get("/read", headers={DELTA_BASE_HEADER: first})
+    assert response.mimetype == "application/json" and response.get_json() == state
+
+
+def test_compression(encoded_client, state, monkeypatch):
+    monkeypatch.setattr(encoding, "brotli", None)
+    state["text"] = "x" * 4000
+    response = encoded_client.get("/read", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.get_data())) == state
+    assert "Content-Encoding" not in encoded_client.get("/read").headers
@@ -0,0 +1,21 @@
+from benchmarks.serialization import make_clusters
+from org.combatwombat.dst.config.Cluster import cluster_schema, fast_cluster_schema
+from org.combatwombat.dst.config.ClusterDirectory import ClusterDirectory, cluster_directory_schema, \
+    fast_cluster_directory_schema
+from org.combatwombat.dst.config.Server import Server
+
+
+def test_dump_matches_schema():
+    clusters = make_clusters(50)
+    assert [fast_cluster_schema.dump(cluster) for cluster in clusters] == \
+        [cluster_schema.dump(cluster) for cluster in clusters]
+
+
+def test_dump_nested_dict_matches_schema():
+    directory = ClusterDirectory(cluster=make_clusters(1)[0], servers={"Master": Server(), "Caves": Server()})
+    assert fast_cluster_directory_schema.dump(directory) == cluster_directory_schema.dump(directory)
+
+
+def test_load_is_schema_load():
+    document = cluster_schema.dump(make_clusters(1)[0])
+    assert cluster_schema.dump(fast_cluster_schema.load(document)) == document
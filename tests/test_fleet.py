@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from org.combatwombat.dst.config import Fleet
+from org.combatwombat.dst.config.ClusterDirectory import ClusterDirectory, fast_cluster_directory_schema
+from org.combatwombat.dst.config.Topology import build_topology
+
+
+def test_export_import_round_trip(tmp_path):
+    source = tmp_path / "source"
+    build_topology(2).write(str(source / "Cluster_1"))
+    lines = list(Fleet.export_clusters(str(source), [str(source / "Cluster_1")]))
+    result = Fleet.import_clusters(str(tmp_path / "target"), lines)
+    assert result == {"imported": 1, "errors": []}
+    assert sorted(ClusterDirectory.read(str(tmp_path / "target" / "Cluster_1")).servers) == ["Caves", "Master"]
+
+
+@pytest.mark.parametrize("name", ["", ".", "..", "../escape", "a/b", "/tmp/escape", 5])
+def test_import_rejects_names_that_are_not_a_single_directory(tmp_path, name):
+    root = tmp_path / "root"
+    config = fast_cluster_directory_schema.dump(build_topology(1))
+    result = Fleet.import_clusters(str(root), [json.dumps({"name": name, "config": config})])
+    assert result["imported"] == 0
+    assert "Invalid cluster name" in result["errors"][0]["error"]
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    build_topology(2).write(str(tmp_path / "Cluster_1"))
+    build_topology(1).write(str(tmp_path / "Cluster_2"))
+    return tmp_path
+
+
+def test_batch_read_route(client, fleet):
+    response = client.post("/config/batch/read", json={"paths": [str(fleet / "Missing")],
+                                                       "glob": str(fleet / "Cluster_*")})
+    results = response.get_json()["results"]
+    assert [result["path"] for result in results] == [str(fleet / name)
+                                                      for name in ("Missing", "Cluster_1", "Cluster_2")]
+    assert "error" in results[0]
+    assert sorted(results[1]["config"]["servers"]) == ["Caves", "Master"]
+    assert list(results[2]["config"]["servers"]) == ["Master"]
+
+    response = client.post("/config/batch/read", json={"paths": [str(fleet / "Cluster_1")], "section": "network"})
+    assert set(response.get_json()["results"][0]["config"]) >= {"cluster_name", "cluster_password"}
+    assert client.post("/config/batch/read", json={"glob": "*", "section": "bogus"}).status_code == 400
+
+
+@pytest.mark.parametrize("content", [{"paths": "abc"}, {"paths": [1]}, {"paths": None}, {"glob": ["*"]}])
+def test_batch_read_rejects_invalid_paths(client, content):
+    response = client.post("/config/batch/read", json=content)
+    assert response.status_code == 400
+
+
+def test_batch_write_route(client, fleet):
+    config = fast_cluster_directory_schema.dump(build_topology(1))
+    response = client.post("/config/batch/write", json={"clusters": [
+        {"path": str(fleet / "Cluster_3"), "config": config},
+        {"path": str(fleet / "Cluster_4"), "config": {"cluster": {"network": {"cluster_name": 5}}}},
+    ]})
+    results = response.get_json()["results"]
+    assert results[0] == {"path": str(fleet / "Cluster_3"), "written": True}
+    assert "error" in results[1]
+    assert list(ClusterDirectory.read(str(fleet / "Cluster_3")).servers) == ["Master"]
+    assert not (fleet / "Cluster_4" / "cluster.ini").exists()
+    assert client.post("/config/batch/write", json={"clusters": "abc"}).status_code == 400
+
+
+def test_import_checks_the_validation_rules(tmp_path):
+    config = fast_cluster_directory_schema.dump(build_topology(2))
+    config["cluster"]["gameplay"]["max_players"] = 2
+    config["cluster"]["network"]["whitelist_slots"] = 4
+    line = json.dumps({"name": "Cluster_1", "config": config})
+    result = Fleet.import_clusters(str(tmp_path), [line])
+    assert result["imported"] == 0
+    assert result["errors"][0]["error"][0]["rule"] == "whitelist_slots"
+    assert not (tmp_path / "Cluster_1").exists()
+    assert Fleet.import_clusters(str(tmp_path), [line], validate=False)["imported"] == 1
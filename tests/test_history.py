@@ -0,0 +1,89 @@
+import pytest
+from marshmallow import ValidationError
+
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Cluster import Cluster
+from org.combatwombat.dst.config.History import ConfigHistory
+from org.combatwombat.dst.config.cluster.Gameplay import Gameplay
+from org.combatwombat.dst.config.cluster.Network import Network
+from org.combatwombat.web.flask import server, settings
+
+HAND_EDITED = "; written by hand\n[GAMEPLAY]\nmax_players = 3\n"
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ConfigHistory(str(tmp_path / ".history"))
+    ini.add_before_write_listener(history.snapshot)
+    ini.add_write_listener(history.record)
+    return history
+
+
+def test_hand_edited_contents_are_kept(history, tmp_path):
+    file = str(tmp_path / "cluster.ini")
+    with open(file, "w") as ini_file:
+        ini_file.write(HAND_EDITED)
+    Cluster(gameplay=Gameplay(max_players=8)).write_ini(file)
+    versions = history.versions(file)
+    assert [version["version"] for version in versions] == [1, 2]
+    assert history.read(file, 1) == HAND_EDITED
+    assert "max_players = 8" in history.read(file, 2)
+    assert "-max_players = 3" in history.diff(file, 1, 2)
+
+
+def test_unchanged_writes_add_no_version(history, tmp_path):
+    file = str(tmp_path / "cluster.ini")
+    Cluster().write_ini(file)
+    Cluster().write_ini(file)
+    assert len(history.versions(file)) == 1
+    assert history.stats()["blobs"] == 1
+
+
+def test_rollback_restores_and_records(history, tmp_path):
+    file = str(tmp_path / "cluster.ini")
+    Cluster(gameplay=Gameplay(max_players=8)).write_ini(file)
+    Cluster(gameplay=Gameplay(max_players=12)).write_ini(file)
+    written = []
+    ini.add_write_listener(lambda written_file, config: written.append(config.gameplay.max_players))
+    assert history.rollback(file, 1)["version"] == 3
+    assert Cluster.read_ini(file).gameplay.max_players == 8
+    assert written == [8]
+
+
+def test_rollback_validates_before_writing(history, tmp_path):
+    file = str(tmp_path / "cluster.ini")
+    with open(file, "w") as ini_file:
+        ini_file.write("[GAMEPLAY]\nmax_players = lots\n")
+    Cluster().write_ini(file)
+    current = open(file).read()
+    with pytest.raises(ValidationError):
+        history.rollback(file, 1)
+    assert open(file).read() == current
+    with pytest.raises(ValueError):
+        history.rollback(file, 7)
+
+
+def test_processes_sharing_a_store_number_versions_in_order(tmp_path):
+    file = str(tmp_path / "cluster.ini")
+    server_history = ConfigHistory(str(tmp_path / ".history"))
+    cli_history = ConfigHistory(str(tmp_path / ".history"))  # Its own cache, like another process
+    assert server_history.snapshot(file, "a")["version"] == 1
+    assert cli_history.snapshot(file, "b")["version"] == 2
+    assert server_history.snapshot(file, "c")["version"] == 3
+    assert server_history.snapshot(file, "c")["version"] == 3
+    assert [version["version"] for version in cli_history.versions(file)] == [1, 2, 3]
+    assert cli_history.read(file, 3) == "c"
+
+
+def test_rollback_route_runs_the_write_rules(history, tmp_path, client, monkeypatch):
+    monkeypatch.setattr(server, "config_history", history)
+    monkeypatch.setattr(settings, "VALIDATE_WRITES", True)
+    file = str(tmp_path / "cluster.ini")
+    Cluster(gameplay=Gameplay(max_players=4), network=Network(whitelist_slots=6)).write_ini(file)
+    Cluster().write_ini(file)
+    current = open(file).read()
+    response = client.post("/config/history/rollback", json={"path": file, "version": 1})
+    assert response.status_code == 400
+    assert "whitelist_slots" in response.get_data(as_text=True)
+    assert open(file).read() == current
+    assert len(history.versions(file)) == 2
@@ -0,0 +1,82 @@
+from configparser import ConfigParser
+
+from org.combatwombat.dst.config import ini
+from org.combatwombat.dst.config.Cluster import Cluster
+from org.combatwombat.dst.config.Server import Server
+from org.combatwombat.dst.config.server.Shard import Shard
+
+
+def parser(values):
+    config = ConfigParser()
+    config.read_dict(values)
+    return config
+
+
+def test_unchanged_file_is_not_written(tmp_path):
+    file = str(tmp_path / "cluster.ini")
+    assert Cluster().write_ini(file)
+    assert not Cluster().write_ini(file)
+
+
+def test_patch_keeps_comments_and_unknown_keys():
+    text = "; top comment\n[GAMEPLAY]\nmax_players = 6\ncustom = 1\n\n[MISC]\nconsole_enabled = true\n"
+    patched = ini.patch_ini(text, parser({"GAMEPLAY": {"max_players": "8", "pvp": "true"}, "NEW": {"a": "b"}}))
+    assert patched == ("; top comment\n[GAMEPLAY]\nmax_players = 8\ncustom = 1\npvp = true\n\n"
+                       "[MISC]\nconsole_enabled = true\n\n[NEW]\na = b\n")
+
+
+def test_multi_line_value_round_trip(tmp_path):
+    file = str(tmp_path / "cluster.ini")
+    Cluster().write_ini(file)
+    for description in ("line1\nline2", "other\nx = y\nthird", "single"):
+        cluster = Cluster.read_ini(file)
+        cluster.network.cluster_description = description
+        cluster.network.cluster_name = description.split("\n")[0]
+        assert cluster.write_ini(file)
+        assert Cluster.read_ini(file).network.cluster_description == description
+    with open(file) as ini_file:
+        assert "line2" not in ini_file.read()
+
+
+def test_patch_replaces_old_continuation_lines():
+    text = "[NETWORK]\ncluster_description = a\n\tb\n\n\tc\ncluster_name = n\n"
+    patched = ini.patch_ini(text, parser({"NETWORK": {"cluster_description": "z"}}))
+    assert patched == "[NETWORK]\ncluster_description = z\ncluster_name = n\n"
+
+
+def test_atomic_write_keeps_mode(tmp_path):
+    file = tmp_path / "server.ini"
+    file.write_text("old")
+    file.chmod(0o600)
+    ini.atomic_write(str(file), "new")
+    assert file.read_text() == "new"
+    assert file.stat().st_mode & 0o777 == 0o600
+
+
+def test_managed_options_no_longer_set_are_removed(tmp_path):
+    file = str(tmp_path / "server.ini")
+    Server(shard=Shard(False, "Caves", 42)).write_ini(file)
+    with open(file, "a") as ini_file:
+        ini_file.write("custom = kept\n")
+    assert Server(shard=Shard(False, "Caves")).write_ini(file)
+    with open(file) as ini_file:
+        text = ini_file.read()
+    assert "id =" not in text and "custom = kept" in text
+    assert Server.read_ini(file).shard.id is None
+    assert not Server(shard=Shard(False, "Caves")).write_ini(file)
+
+
+def test_patch_removes_managed_options_with_their_continuation_lines():
+    text = "[SHARD]\nname = a\nid = 1\n\t2\nother = x\n"
+    assert ini.patch_ini(text, parser({"SHARD": {"name": "a"}}), {"SHARD": ("name", "id")}) == \
+        "[SHARD]\nname = a\nother = x\n"
+
+
+def test_failing_write_listener_is_logged(tmp_path, caplog):
+    def failing(file, obj):
+        raise RuntimeError("listener broke")
+
+    ini.add_write_listener(failing)
+    assert Cluster().write_ini(str(tmp_path / "cluster.ini"))
+    assert "listener broke" in caplog.text
+    assert (tmp_path / "cluster.ini").exists()
@@ -0,0 +1,76 @@
+import pytest
+
+from org.combatwombat.dst.config import lua
+
+WORLDGENOVERRIDE = """-- Generated by hand
+return {
+    override_enabled = true,
+    preset = "SURVIVAL_TOGETHER",  -- default preset
+    overrides = {
+        day = 'longday',
+        world_size = "huge",
+        spawn_rate = -1.5,
+        seed = 0x10,
+    },
+}
+"""
+
+MODINFO = """name = "Better" .. " Mod"
+version = 1.5
+if locale == "zh" then
+    name = "Chinese name"
+end
+local function helper() return 1 end
+api_version = helper()
+configuration_options = {
+    { name = "difficulty", default = false },
+}
+"""
+
+
+def test_loads_world_settings():
+    assert lua.loads(WORLDGENOVERRIDE) == {
+        "override_enabled": True,
+        "preset": "SURVIVAL_TOGETHER",
+        "overrides": {"day": "longday", "world_size": "huge", "spawn_rate": -1.5, "seed": 16},
+    }
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{1, 2, "three"; nil}', [1, 2, "three", None]),
+    ('{ a = 1, 2, [3] = "c", ["k y"] = [[long\nstring]] }', {"a": 1, 1: 2, 3: "c", "k y": "long\nstring"}),
+    (r'"a\n\65\x42\z   c"', "a\nABc"),
+    ("--[==[ block\ncomment ]==] return {}", {}),
+])
+def test_loads_values(text, expected):
+    assert lua.loads(text) == expected
+
+
+@pytest.mark.parametrize("value", [
+    {"a": [1, 2.5, "x"], "b": {"c": True, "d k": False, "e": 'quote " and\nnewline'}},
+    [{"name": "workshop-1", "enabled": True}],
+    {1: "a", "b": 2},
+])
+def test_dumps_round_trip(value):
+    assert lua.loads("return " + lua.dumps(value)) == value
+
+
+@pytest.mark.parametrize("text, line, column", [
+    ("{", 1, 2),
+    ("return 1 2", 1, 10),
+    ("{\n  a = }", 2, 7),
+    ("foo()", 1, 1),
+])
+def test_loads_reports_position_of_errors(text, line, column):
+    with pytest.raises(lua.LuaError) as error:
+        lua.loads(text)
+    assert (error.value.line, error.value.column) == (line, column)
+    assert isinstance(error.value, ValueError)
+
+
+def test_assignments_skips_unsupported_statements():
+    assert lua.assignments(MODINFO) == {
+        "name": "Better Mod",
+        "version": 1.5,
+        "configuration_options": [{"name": "difficulty", "default": False}],
+    }
@@ -0,0 +1,60 @@
+import time
+
+from flask import Flask, jsonify, request
+from marshmallow import Schema
+
+from org.combatwombat.web.flask.metrics import RequestMetrics
+
+
+def make_app(metrics):
+    app = Flask(__name__)
+
+    @app.route('/work', methods=['POST'])
+    def work():
+        content = request.json
+        with metrics.phase("file_io"):
+            time.sleep(0.05)
+            with metrics.phase("validate"):
+                time.sleep(0.05)
+        return jsonify(content)
+
+    return app
+
+
+def phase_seconds(metrics, phase):
+    for line in metrics.render().splitlines():
+        if 'phase="{}"'.format(phase) in line:
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_phases_are_exclusive():
+    metrics = RequestMetrics()
+    app = make_app(metrics)
+    metrics.install(app)
+    assert app.test_client().post("/work", json={"a": 1}).get_json() == {"a": 1}
+    assert 0.05 <= phase_seconds(metrics, "file_io") < 0.09
+    assert 0.05 <= phase_seconds(metrics, "validate")
+    assert phase_seconds(metrics, "parse") is not None
+    assert phase_seconds(metrics, "serialize") is not None
+    assert 'dst_request_duration_seconds_count{route="/work",method="POST",status="200"} 1' in metrics.render()
+
+
+def test_phase_outside_a_request_does_nothing():
+    metrics = RequestMetrics()
+    with metrics.phase("file_io"):
+        pass
+    assert phase_seconds(metrics, "file_io") is None
+
+
+def test_uninstall_restores_the_app():
+    schema_load = Schema.load
+    metrics = RequestMetrics()
+    app = make_app(metrics)
+    json_provider = app.json
+    metrics.install(app)
+    metrics.uninstall(app)
+    assert app.json is json_provider
+    assert Schema.load is schema_load
+    app.test_client().post("/work", json={"a": 1})
+    assert "dst_request_duration_seconds_count" not in metrics.render()
@@ -0,0 +1,40 @@
+import pytest
+
+from org.combatwombat.dst.config.Topology import build_topology
+from org.combatwombat.dst.config.mods.ModOverrides import server_mods_setup
+from org.combatwombat.dst.process.Supervisor import Supervisor
+from org.combatwombat.web.flask import server, settings
+
+
+@pytest.fixture
+def mods_client(tmp_path, monkeypatch):
+    root = tmp_path / "DoNotStarveTogether"
+    build_topology(2).write(str(root / "Cluster_1"))
+    (root / "Cluster_1" / "Master" / "modoverrides.lua").write_text(
+        'return { ["workshop-378160973"] = { enabled = true }, ["local-mod"] = { enabled = true } }\n')
+    monkeypatch.setattr(settings, "CLUSTERS_ROOT", str(root))
+    monkeypatch.setattr(server, "supervisor", Supervisor(str(tmp_path / "server"), str(root)))
+    return server.app.test_client()
+
+
+def test_server_mods_setup_text():
+    assert server_mods_setup(["2", 1], ["3"]) == 'ServerModSetup("1")\nServerModSetup("2")\n' \
+                                                 'ServerModCollectionSetup("3")\n'
+    with pytest.raises(ValueError):
+        server_mods_setup(["workshop-1"])
+
+
+def test_setup_route_writes_workshop_mods(mods_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODS_DIR", str(tmp_path))
+    response = mods_client.post("/config/mods/setup", json={"collections": ["42"]})
+    assert response.get_json()["workshop_ids"] == ["378160973"]
+    assert (tmp_path / "dedicated_server_mods_setup.lua").read_text() == \
+        'ServerModSetup("378160973")\nServerModCollectionSetup("42")\n'
+    assert mods_client.post("/config/mods/setup", json={"collections": ["42"]}).get_json()["written"] is False
+
+
+def test_setup_route_reports_write_errors(mods_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODS_DIR", str(tmp_path / "missing"))
+    response = mods_client.post("/config/mods/setup")
+    assert response.status_code == 500
+    assert response.get_data(as_text=True).startswith("Could not write")
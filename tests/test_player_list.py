@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from org.combatwombat.dst.config.PlayerList import PlayerList, update_player_lists
+
+
+def test_text_round_trip():
+    players = PlayerList.from_text("KU_b\n\n  KU_a  \nKU_b\n")
+    assert list(players) == ["KU_b", "KU_a"]
+    assert players.to_text() == "KU_b\nKU_a\n"
+
+
+def test_update_adds_and_removes(tmp_path):
+    (tmp_path / "whitelist.txt").write_text("KU_old\nKU_kept\n")
+    results = update_player_lists([str(tmp_path), str(tmp_path / "missing")], "whitelist",
+                                  add=["KU_new", "KU_both"], remove=["KU_old", "KU_both"])
+    assert results[0] == {"path": str(tmp_path), "added": 1, "removed": 1, "size": 2}
+    assert "error" in results[1]
+    assert (tmp_path / "whitelist.txt").read_text() == "KU_kept\nKU_new\n"
+    with pytest.raises(ValueError):
+        update_player_lists([str(tmp_path)], "whitelist", add=["not an id"])
+
+
+def test_concurrent_updates_keep_every_id(tmp_path):
+    ids = ["KU_{}".format(number) for number in range(40)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda player_id: update_player_lists([str(tmp_path)], "adminlist", add=[player_id]), ids))
+    assert sorted(PlayerList.read_file(str(tmp_path / "adminlist.txt"))) == sorted(ids)
+
+
+def test_read_route_checks_ids(client, tmp_path):
+    (tmp_path / "blocklist.txt").write_text("KU_a\n")
+    response = client.post("/config/players/read", json={"path": str(tmp_path), "list": "blocklist",
+                                                         "ids": ["KU_a", "KU_b"]})
+    assert response.get_json() == {"size": 1, "contains": {"KU_a": True, "KU_b": False}}
+    for ids in ("KU_a", [["KU_a"]], {"KU_a": 1}):
+        response = client.post("/config/players/read", json={"path": str(tmp_path), "list": "blocklist", "ids": ids})
+        assert response.get_data(as_text=True) == "No valid options specified in post"
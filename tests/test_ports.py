@@ -0,0 +1,77 @@
+import time
+
+from org.combatwombat.dst.config import Watcher
+from org.combatwombat.dst.config.Ports import PortIndex
+from org.combatwombat.dst.config.Server import Server
+from org.combatwombat.dst.config.server.Network import Network
+
+
+def write_server(root, cluster, port):
+    directory = root / cluster / "Master"
+    directory.mkdir(parents=True)
+    file = str(directory / "server.ini")
+    Server(network=Network(port=port)).write_ini(file)
+    return file
+
+
+def test_released_ports_are_reused_lowest_first(tmp_path):
+    files = [write_server(tmp_path, "C{}".format(port), port) for port in (10998, 10999, 11000)]
+    index = PortIndex(str(tmp_path))
+    index.build()
+    assert index.next_free("server_port") == 11001
+    index.remove(files[2])
+    index.remove(files[0])
+    assert index.next_free("server_port") == 10998
+
+
+def test_writes_outside_root_are_ignored(tmp_path):
+    index = PortIndex(str(tmp_path / "clusters"))
+    index.build()
+    write_server(tmp_path, "elsewhere", 10998)
+    assert index.ports() == set()
+
+
+def test_deleted_files_are_dropped(tmp_path):
+    write_server(tmp_path, "C1", 10998)
+    index = PortIndex(str(tmp_path))
+    index.build()
+    assert 10998 in index.ports()
+    (tmp_path / "C1" / "Master" / "server.ini").unlink()
+    index.build()
+    assert 10998 not in index.ports()
+    assert index.next_free("server_port") == 10998
+
+
+def test_check_route_rejects_invalid_config(client):
+    response = client.post("/config/ports/check", json={"config": {"network": {"server_port": "x"}}})
+    assert response.status_code == 400
+
+
+def test_released_ports_only_return_to_their_kind(tmp_path):
+    file = write_server(tmp_path, "C1", 10998)
+    index = PortIndex(str(tmp_path))
+    index.build()
+    index._cursors["master_port"] = 11000  # master_port's range also holds server ports
+    index.remove(file)
+    assert index.next_free("server_port") == 10998
+    assert index.next_free("master_port") == 11000
+
+
+def test_hand_edits_are_followed_through_the_watcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(Watcher, "Observer", None)
+    file = write_server(tmp_path, "C1", 10998)
+    watcher = Watcher.ConfigWatcher(str(tmp_path), poll_interval=0.05)
+    index = PortIndex(str(tmp_path), watcher)
+    index.build()
+    try:
+        with open(file) as ini_file:
+            text = ini_file.read()
+        with open(file, "w") as ini_file:  # Edited by hand, not through write_ini
+            ini_file.write(text.replace("server_port = 10998", "server_port = 11005"))
+        deadline = time.monotonic() + 5
+        while 11005 not in index.ports():
+            assert time.monotonic() < deadline, "edit was not picked up"
+            time.sleep(0.02)
+        assert 10998 not in index.ports()
+    finally:
+        watcher.stop()
@@ -0,0 +1,47 @@
+from org.combatwombat.dst.config import Fleet, Rules
+from org.combatwombat.dst.config.ClusterDirectory import fast_cluster_directory_schema
+from org.combatwombat.dst.config.Server import Server
+from org.combatwombat.dst.config.server.Shard import Shard
+from org.combatwombat.dst.config.Topology import build_topology
+from org.combatwombat.web.flask import server, settings
+
+
+def test_valid_topology_passes():
+    assert Rules.check_cluster("C", build_topology(2)) == []
+
+
+def test_second_master_is_reported():
+    cluster_directory = build_topology(2)
+    cluster_directory.servers["Caves"] = Server(shard=Shard(is_master=True, name="Caves"))
+    assert [diagnostic["rule"] for diagnostic in Rules.check_cluster("C", cluster_directory)] == ["single_master"]
+
+
+def test_cluster_key_mismatch_is_a_warning():
+    diagnostics = Rules.check_fleet([("A", build_topology(2, cluster_key="a")),
+                                     ("B", build_topology(2, cluster_key="b")),
+                                     ("C", build_topology(1, cluster_key="c"))])
+    assert [(d["path"], d["rule"], d["severity"]) for d in diagnostics] == [
+        ("A", "cluster_key", Rules.WARNING), ("B", "cluster_key", Rules.WARNING)]
+    assert Rules.errors(diagnostics) == []
+
+
+def test_check_write_reports_unreadable_files(tmp_path):
+    build_topology(2).write(str(tmp_path))
+    (tmp_path / "Caves" / "server.ini").write_text("[NETWORK]\nserver_port = abc\n")
+    file = str(tmp_path / "cluster.ini")
+    diagnostics = Fleet.check_write(file, build_topology(2).cluster)
+    assert [(d["rule"], d["severity"]) for d in diagnostics] == [("read", Rules.ERROR)]
+    assert Fleet.check_write(str(tmp_path / "Caves" / "server.ini"),
+                             build_topology(2).servers["Caves"]) == []
+
+
+def test_batch_write_follows_validate_writes(tmp_path, monkeypatch):
+    config = fast_cluster_directory_schema.dump(build_topology(2))
+    config["cluster"]["shard"]["shard_enabled"] = False
+    entries = [{"path": str(tmp_path / "Cluster_1"), "config": config}]
+    client = server.app.test_client()
+    results = client.post("/config/batch/write", json={"clusters": entries}).get_json()["results"]
+    assert results[0]["error"][0]["rule"] == "shard_enabled"
+    monkeypatch.setattr(settings, "VALIDATE_WRITES", False)
+    results = client.post("/config/batch/write", json={"clusters": entries}).get_json()["results"]
+    assert results == [{"path": entries[0]["path"], "written": True}]
@@ -0,0 +1,93 @@
+import os
+import threading
+from hashlib import sha256
+
+import pytest
+
+from org.combatwombat.dst.config.Topology import build_topology
+from org.combatwombat.dst.save import SaveManager as save_manager_module
+from org.combatwombat.dst.save.ChunkStore import ChunkStore
+from org.combatwombat.dst.save.SaveManager import SaveManager
+
+
+def test_chunks_are_deduplicated(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks"), chunk_size=4)
+    (tmp_path / "a").write_bytes(b"abcdabcdxy")
+    chunks, written = store.put_file(str(tmp_path / "a"))
+    assert chunks == [sha256(b"abcd").hexdigest()] * 2 + [sha256(b"xy").hexdigest()]
+    assert written == 6
+    assert store.put_file(str(tmp_path / "a")) == (chunks, 0)
+    store.write_file(chunks, str(tmp_path / "b"))
+    assert (tmp_path / "b").read_bytes() == b"abcdabcdxy"
+
+
+def test_corrupt_and_missing_chunks_are_detected(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks"))
+    digest, _ = store.put(b"data")
+    with open(store._chunk_file(digest), "wb") as chunk_file:
+        chunk_file.write(b"evil")
+    with pytest.raises(ValueError, match="corrupt"):
+        store.write_file([digest], str(tmp_path / "out"))
+    with pytest.raises(ValueError, match="missing"):
+        store.write_file(["00" * 32], str(tmp_path / "out"))
+
+
+def test_collect_garbage_keeps_referenced_chunks(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks"))
+    kept, _ = store.put(b"kept")
+    store.put(b"garbage")
+    assert store.collect_garbage({kept}) == (1, 7)
+    store.write_file([kept], str(tmp_path / "out"))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    build_topology(1).write(str(tmp_path / "clusters" / "Cluster_1"))
+    save = tmp_path / "clusters" / "Cluster_1" / "Master" / "save"
+    (save / "session").mkdir(parents=True)
+    (save / "session" / "0000000001").write_bytes(b"world" * 1000)
+    (save / "client_temp").mkdir()
+    return SaveManager(str(tmp_path / "clusters"), str(tmp_path / "backups"), chunk_size=1024)
+
+
+def test_backup_and_restore(manager, tmp_path):
+    save = tmp_path / "clusters" / "Cluster_1" / "Master" / "save"
+    first = manager.backup("Cluster_1", "Master")
+    assert first["files"] == 1 and first["read"] == 5000
+    assert manager.backup("Cluster_1", "Master")["read"] == 0
+    (save / "session" / "0000000001").write_bytes(b"changed")
+    (save / "session" / "0000000002").write_bytes(b"new")
+    manager.backup("Cluster_1", "Master")
+
+    restored = manager.restore("Cluster_1", "Master", first["id"])
+    assert restored["rebuilt"] == 1
+    assert sorted(os.listdir(str(save / "session"))) == ["0000000001"]
+    assert (save / "session" / "0000000001").read_bytes() == b"world" * 1000
+    assert (save / "client_temp").is_dir()
+
+
+def test_prune_collects_unused_chunks(manager, tmp_path):
+    save = tmp_path / "clusters" / "Cluster_1" / "Master" / "save"
+    manager.backup("Cluster_1", "Master")
+    (save / "session" / "0000000001").write_bytes(b"changed")
+    latest = manager.backup("Cluster_1", "Master")
+    result = manager.prune("Cluster_1", "Master", 1)
+    assert result["snapshots"] == 1 and result["chunks"] > 0
+    assert [snapshot["id"] for snapshot in manager.snapshots("Cluster_1", "Master")] == [latest["id"]]
+    manager.restore("Cluster_1", "Master", latest["id"])
+    assert (save / "session" / "0000000001").read_bytes() == b"changed"
+
+
+@pytest.mark.skipif(save_manager_module.fcntl is None, reason="needs fcntl")
+def test_collect_garbage_waits_for_other_processes(manager, tmp_path):
+    fcntl = save_manager_module.fcntl
+    os.makedirs(str(tmp_path / "backups"), exist_ok=True)
+    with open(str(tmp_path / "backups" / ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH)  # Another process backing up
+        collector = threading.Thread(target=manager.collect_garbage)
+        collector.start()
+        collector.join(0.2)
+        assert collector.is_alive()
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    collector.join(5)
+    assert not collector.is_alive()
@@ -0,0 +1,106 @@
+import shutil
+import time
+
+import pytest
+
+from org.combatwombat.dst.config import Watcher
+from org.combatwombat.dst.config.Cluster import Cluster
+from org.combatwombat.dst.config.Search import SearchIndex
+from org.combatwombat.dst.config.cluster.Gameplay import Gameplay
+from org.combatwombat.dst.config.cluster.Network import Network
+
+
+def write_cluster(root, name, max_players, cluster_name):
+    (root / name).mkdir(parents=True)
+    Cluster(gameplay=Gameplay(max_players=max_players),
+            network=Network(cluster_name=cluster_name)).write_ini(str(root / name / "cluster.ini"))
+
+
+@pytest.fixture
+def index(tmp_path):
+    write_cluster(tmp_path, "A", 6, "Forest 42")
+    write_cluster(tmp_path, "B", 12, "Caves")
+    index = SearchIndex(str(tmp_path))
+    index.build()
+    return index
+
+
+def names(result):
+    return [row["cluster_name"] for row in result["results"]]
+
+
+def test_filters_and_sorting(index):
+    assert names(index.query([["max_players", "ge", 10]])) == ["Caves"]
+    assert names(index.query(sort="max_players", descending=True)) == ["Caves", "Forest 42"]
+    assert names(index.query({"cluster_name": "Caves"})) == ["Caves"]
+
+
+def test_contains_accepts_any_value(index):
+    assert names(index.query([["cluster_name", "contains", 42]])) == ["Forest 42"]
+    assert names(index.query([["cluster_name", "contains", "FOREST"]])) == ["Forest 42"]
+
+
+def test_invalid_filters_raise_value_error(index):
+    with pytest.raises(ValueError):
+        index.query([["max_players", "gt", "many"]])
+    with pytest.raises(ValueError):
+        index.query([["cluster_password", "eq", ""]])
+
+
+def test_new_and_deleted_clusters(index, tmp_path):
+    write_cluster(tmp_path, "C", 8, "Volcano")
+    assert len(index) == 3
+    shutil.rmtree(str(tmp_path / "A"))
+    index.build()
+    assert names(index.query()) == ["Caves", "Volcano"]
+
+
+def test_writes_outside_root_are_ignored(index, tmp_path_factory):
+    write_cluster(tmp_path_factory.mktemp("elsewhere"), "D", 8, "Elsewhere")
+    assert len(index) == 2
+
+
+def test_watcher_reports_deleted_clusters(index, tmp_path, monkeypatch):
+    monkeypatch.setattr(Watcher, "Observer", None)
+    watcher = Watcher.ConfigWatcher(str(tmp_path))
+    watcher.add_listener(index.watched)
+    watcher.start()
+    watcher.stop()
+    (tmp_path / "A" / "cluster.ini").unlink()
+    watcher.changed(str(tmp_path / "A" / "cluster.ini"))
+    assert len(index) == 1
+
+
+def test_watcher_reindexes_outside_edits(tmp_path, monkeypatch):
+    monkeypatch.setattr(Watcher, "Observer", None)
+    write_cluster(tmp_path, "A", 6, "Forest")
+    watcher = Watcher.ConfigWatcher(str(tmp_path), poll_interval=0.05)
+    index = SearchIndex(str(tmp_path), watcher)
+    index.build()
+    try:
+        file = tmp_path / "A" / "cluster.ini"
+        file.write_text(file.read_text().replace("cluster_name = Forest", "cluster_name = Edited"))
+        deadline = time.monotonic() + 5
+        while names(index.query()) != ["Edited"]:
+            assert time.monotonic() < deadline, "edit was not indexed"
+            time.sleep(0.02)
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize("content", [{"limit": "10"}, {"offset": "1"}, {"offset": -1}, {"fields": 5},
+                                     {"fields": [["max_players"]]}, {"filters": [5]}, {"filters": "abc"},
+                                     {"sort": ["max_players"]}, {"descending": "yes"}])
+def test_search_route_rejects_invalid_arguments(client, clusters_root, content):
+    write_cluster(clusters_root, "A", 6, "Forest")
+    response = client.post("/config/search", json=content)
+    assert response.status_code == 400
+    assert response.get_data(as_text=True).startswith("Invalid search")
+
+
+def test_search_route(client, clusters_root):
+    write_cluster(clusters_root, "A", 6, "Forest")
+    write_cluster(clusters_root, "B", 12, "Caves")
+    response = client.post("/config/search", json={"filters": [["max_players", "gt", 8]], "fields": ["max_players"],
+                                                    "limit": 1, "offset": 0})
+    assert response.get_json() == {"total": 1, "results": [{"path": str(clusters_root / "B"), "max_players": 12}]}
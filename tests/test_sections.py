@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from marshmallow import ValidationError
+
+from org.combatwombat.dst.config.Cluster import Cluster, LazyCluster
+from org.combatwombat.dst.config.Server import LazyServer, Server
+from org.combatwombat.dst.config.cluster.Gameplay import Gameplay
+
+
+@pytest.fixture
+def cluster_ini(tmp_path):
+    file = str(tmp_path / "cluster.ini")
+    Cluster(gameplay=Gameplay(max_players=6)).write_ini(file)
+    return file
+
+
+def break_option(file, option, value):
+    with open(file) as ini_file:
+        lines = ini_file.read().splitlines()
+    with open(file, "w") as ini_file:
+        ini_file.write("\n".join(option + " = " + value if line.startswith(option + " ") else line
+                                 for line in lines) + "\n")
+
+
+def test_sections_are_built_on_first_access(cluster_ini, monkeypatch):
+    built = []
+    from_config = Gameplay.from_config
+    monkeypatch.setattr(Gameplay, "from_config", staticmethod(lambda config: built.append(1) or from_config(config)))
+    cluster = LazyCluster(cluster_ini)
+    assert built == []
+    assert cluster.gameplay.max_players == 6
+    assert cluster.gameplay is cluster.gameplay
+    assert built == [1]
+    with pytest.raises(AttributeError):
+        cluster.bogus
+
+
+def test_invalid_sections_only_fail_when_used(cluster_ini):
+    break_option(cluster_ini, "max_players", "many")
+    cluster = LazyCluster(cluster_ini)
+    assert cluster.network.cluster_name == ""
+    with pytest.raises(ValidationError):
+        cluster.gameplay
+
+
+def test_load_is_cached_until_the_file_changes(cluster_ini):
+    first = LazyCluster.load(cluster_ini)
+    assert LazyCluster.load(cluster_ini) is first
+    Cluster(gameplay=Gameplay(max_players=8)).write_ini(cluster_ini)
+    assert LazyCluster.load(cluster_ini).gameplay.max_players == 8
+
+
+def test_lazy_server_sections(tmp_path):
+    file = str(tmp_path / "server.ini")
+    Server().write_ini(file)
+    server = LazyServer.load(file)
+    assert server.network.server_port == Server().network.server_port
+    assert set(LazyServer.SECTIONS) == {"network", "shard", "steam"}
+
+
+def test_section_routes(client, cluster_ini, tmp_path):
+    response = client.post("/config/cluster/read?section=gameplay", json={"path": cluster_ini})
+    assert json.loads(response.get_data())["max_players"] == 6
+    assert "network" in json.loads(client.post("/config/cluster/read", json={"path": cluster_ini}).get_data())
+    assert client.post("/config/cluster/read?section=bogus", json={"path": cluster_ini}).status_code == 400
+    assert client.get("/config/cluster/read?section=misc").status_code == 200
+
+    server_ini = str(tmp_path / "server.ini")
+    Server().write_ini(server_ini)
+    response = client.post("/config/server/read?section=steam", json={"path": server_ini})
+    assert set(json.loads(response.get_data())) == {"authentication_port", "master_server_port"}
+    assert client.post("/config/server/read?section=gameplay", json={"path": server_ini}).status_code == 400
+
+
+def test_read_routes_reject_invalid_files(client, cluster_ini, tmp_path):
+    break_option(cluster_ini, "max_players", "many")
+    assert client.post("/config/cluster/read", json={"path": cluster_ini}).status_code == 400
+    assert client.post("/config/cluster/read?section=gameplay", json={"path": cluster_ini}).status_code == 400
+    assert client.post("/config/cluster/read?section=network", json={"path": cluster_ini}).status_code == 200
+
+    server_ini = tmp_path / "server.ini"
+    server_ini.write_text("server_port = 10999\n")
+    response = client.post("/config/server/read?section=network", json={"path": str(server_ini)})
+    assert response.status_code == 400
+    assert response.get_data(as_text=True).startswith("Invalid server settings")
+    assert client.post("/config/server/read", json={"config": {"network": {"server_port": "x"}}}).status_code == 400
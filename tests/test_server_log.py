@@ -0,0 +1,71 @@
+import pytest
+
+from org.combatwombat.dst.config.Topology import build_topology
+from org.combatwombat.dst.log.ServerLog import ServerLog, parse_time
+from org.combatwombat.dst.log.ShardLogs import ShardLogs
+from org.combatwombat.web.flask import server, settings
+
+
+def write_log(file, count):
+    with open(str(file), "w") as log_file:
+        for second in range(count):
+            log_file.write("[00:{:02d}:{:02d}]: line {}\n".format(second // 60, second % 60, second))
+            if second % 10 == 0:
+                log_file.write("\tcontinued {}\n".format(second))
+
+
+def test_between_uses_the_index(tmp_path):
+    write_log(tmp_path / "server_log.txt", 600)
+    log = ServerLog(str(tmp_path / "server_log.txt"), index_step=256)
+    lines = log.between(parse_time("0:02"), parse_time("0:02:10"))
+    assert lines[0] == "[00:02:00]: line 120"
+    assert lines[1] == "\tcontinued 120"
+    assert lines[-1] == "\tcontinued 130"
+    assert log.index_size() > 10
+    assert log.between(0, 599, limit=5)[-1] == "[00:00:03]: line 3"
+
+
+def test_tail_and_read_from(tmp_path):
+    file = tmp_path / "server_log.txt"
+    write_log(file, 5)
+    log = ServerLog(str(file))
+    lines, offset = log.tail(2)
+    assert lines == ["[00:00:03]: line 3", "[00:00:04]: line 4"]
+    assert log.tail(0)[0] == []
+    with open(str(file), "a") as log_file:
+        log_file.write("[00:00:05]: line 5\n[00:00:06]: partial")
+    assert log.read_from(offset) == (["[00:00:05]: line 5"], offset + 19)
+
+
+def test_follow_yields_keepalives_while_idle(tmp_path):
+    file = tmp_path / "server_log.txt"
+    write_log(file, 1)
+    follow = ServerLog(str(file)).follow(interval=0.01, keepalive=0.05)
+    assert next(follow) is None
+    with open(str(file), "a") as log_file:
+        log_file.write("[00:00:01]: line 1\n")
+    assert next(follow) == "[00:00:01]: line 1"
+
+
+@pytest.fixture
+def log_client(tmp_path, monkeypatch):
+    build_topology(1).write(str(tmp_path / "Cluster_1"))
+    write_log(tmp_path / "Cluster_1" / "Master" / "server_log.txt", 100)
+    monkeypatch.setattr(server, "shard_logs", ShardLogs(str(tmp_path)))
+    return server.app.test_client()
+
+
+def test_log_route_caps_limit(log_client, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_MAX_LINES", 3)
+    response = log_client.get("/api/v1/logs/Cluster_1/Master?from=0:00&limit=50")
+    assert len(response.get_json()["lines"]) == 3
+    assert log_client.get("/api/v1/logs/Cluster_1/Master?lines=-5").get_json()["lines"] == []
+
+
+@pytest.mark.parametrize("query", ["from=noon", "to=1:2:3:4", "from=1:xx"])
+def test_log_route_rejects_invalid_times(log_client, query):
+    assert log_client.get("/api/v1/logs/Cluster_1/Master?" + query).status_code == 400
+
+
+def test_log_route_unknown_shard(log_client):
+    assert log_client.get("/api/v1/logs/Cluster_1/Caves?from=0:00").status_code == 404
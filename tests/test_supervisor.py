@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+import pytest
+
+from org.combatwombat.dst.config.Topology import build_topology
+from org.combatwombat.dst.process.Supervisor import Supervisor
+from org.combatwombat.web.flask import server
+
+# Echoes console commands and exits on c_shutdown(), except as shard Stubborn which ignores it
+STUB_SHARD = """#!{python}
+import sys
+shard = sys.argv[sys.argv.index("-shard") + 1]
+print("started", shard, flush=True)
+for line in sys.stdin:
+    print("command", line.strip(), flush=True)
+    if line.strip() == "c_shutdown()" and shard != "Stubborn":
+        print("shutting down", flush=True)
+        break
+"""
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def supervisor(tmp_path):
+    executable = tmp_path / "bin" / "dontstarve_dedicated_server_nullrenderer"
+    executable.parent.mkdir()
+    executable.write_text(STUB_SHARD.format(python=sys.executable))
+    os.chmod(str(executable), 0o755)
+    root = tmp_path / "DoNotStarveTogether"
+    build_topology(["Master", "Stubborn"]).write(str(root / "Cluster_1"))
+    supervisor = Supervisor(str(executable), str(root), output_lines=3)
+    yield supervisor
+    for process in supervisor._shards.values():
+        if process.process is not None and process.process.poll() is None:
+            process.process.kill()
+            process.process.wait()
+
+
+def test_start_captures_output(supervisor):
+    results = supervisor.start(["Cluster_1"], ["Master"])
+    assert [result["state"] for result in results] == ["running"]
+    process = supervisor.shard("Cluster_1", "Master")
+    wait_for(lambda: list(process.output) == ["started Master"])
+    assert process.command[-6:] == ["-conf_dir", "DoNotStarveTogether", "-cluster", "Cluster_1", "-shard", "Master"]
+
+
+def test_output_keeps_the_most_recent_lines(supervisor):
+    supervisor.start(["Cluster_1"], ["Master"])
+    process = supervisor.shard("Cluster_1", "Master")
+    received = []
+    process.add_output_listener(received.append)
+    for number in range(4):
+        process.send("print({})".format(number))
+    wait_for(lambda: received[-1:] == ["command print(3)"])
+    assert list(process.output) == ["command print(1)", "command print(2)", "command print(3)"]
+
+
+def test_stop_sends_shutdown(supervisor):
+    supervisor.start(["Cluster_1"], ["Master"])
+    process = supervisor.shard("Cluster_1", "Master")
+    supervisor.stop(["Cluster_1"], ["Master"], timeout=5)
+    wait_for(lambda: process.status()["state"] == "stopped")
+    assert process.status()["returncode"] == 0
+    assert list(process.output)[-2:] == ["command c_shutdown()", "shutting down"]
+
+
+def test_stop_terminates_after_timeout(supervisor):
+    supervisor.start(["Cluster_1"], ["Stubborn"])
+    process = supervisor.shard("Cluster_1", "Stubborn")
+    wait_for(lambda: list(process.output) == ["started Stubborn"])
+    supervisor.stop(["Cluster_1"], ["Stubborn"], timeout=0.2)
+    wait_for(lambda: process.status()["state"] == "stopped")
+    assert process.status()["returncode"] != 0
+    assert list(process.output)[-1] == "command c_shutdown()"
+
+
+def test_unknown_shards_are_reported(supervisor):
+    assert supervisor.start(["Cluster_1"], ["Forest"]) == [{"cluster": "Cluster_1",
+                                                             "error": "Unknown shard Cluster_1/Forest."}]
+    assert supervisor.start(["../Cluster_1"])[0]["error"] == "Invalid cluster name '../Cluster_1'."
+
+
+@pytest.mark.parametrize("lines, expected", [(None, ["a", "b", "c"]), (2, ["b", "c"]), (0, []), (-1, [])])
+def test_output_route_limits_lines(supervisor, monkeypatch, lines, expected):
+    monkeypatch.setattr(server, "supervisor", supervisor)
+    supervisor.shard("Cluster_1", "Master").output.extend(["a", "b", "c"])
+    query = "" if lines is None else "?lines={}".format(lines)
+    response = server.app.test_client().get("/api/v1/shards/Cluster_1/Master/output" + query)
+    assert response.get_json()["output"] == expected
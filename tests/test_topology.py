@@ -0,0 +1,53 @@
+import pytest
+
+from org.combatwombat.dst.config import Topology
+from org.combatwombat.dst.config.ClusterDirectory import ClusterDirectory
+
+
+def test_shard_names():
+    assert Topology.shard_names(3) == ["Master", "Caves", "Shard3"]
+    assert Topology.shard_names(["Forest", "Caves"]) == ["Forest", "Caves"]
+
+
+@pytest.mark.parametrize("layout", ["Master", True, 0, [], ["Master", "Master"], ["../Master"], [".."], [3]])
+def test_shard_names_rejects_invalid_layouts(layout):
+    with pytest.raises(ValueError):
+        Topology.shard_names(layout)
+
+
+def test_build_topology_uses_unique_ports():
+    cluster_directory = Topology.build_topology(4, taken_ports={10998, 8766})
+    assert Topology.check_topology(cluster_directory) == []
+    ports = [server.network.server_port for server in cluster_directory.servers.values()]
+    assert 10998 not in ports and len(set(ports)) == 4
+
+
+def test_build_route_writes_cluster(client, clusters_root):
+    target = str(clusters_root / "Cluster_1")
+    response = client.post("/config/topology/build", json={"path": target, "shards": ["Master", "Caves"]})
+    assert response.status_code == 200
+    assert sorted(ClusterDirectory.read(target).servers) == ["Caves", "Master"]
+
+
+@pytest.mark.parametrize("content", [{"shards": "Master"}, {"shards": [1, 2]},
+                                     {"config": {"gameplay": {"max_players": "many"}}}])
+def test_build_route_rejects_invalid_input(client, clusters_root, content):
+    target = clusters_root / "Cluster_1"
+    response = client.post("/config/topology/build", json=dict(content, path=str(target)))
+    assert response.status_code == 400
+    assert not target.exists()
+
+
+@pytest.mark.parametrize("content", [{"master_port": "abc"}, {"master_port": 70000}, {"master_port": True},
+                                     {"master_port": 10888.5}, {"bind_ip": 5}, {"master_ip": ["a"]},
+                                     {"cluster_key": 1234}, {"shards": 30000000}, {"shards": 22}])
+def test_build_route_checks_arguments_before_writing(client, clusters_root, content):
+    target = clusters_root / "Cluster_1"
+    response = client.post("/config/topology/build", json=dict(content, path=str(target)))
+    assert response.status_code == 400
+    assert response.get_data(as_text=True).startswith("Invalid topology")
+    assert not target.exists()
+
+
+def test_build_topology_allows_one_shard_per_server_port():
+    assert len(Topology.build_topology(len(Topology.SERVER_PORTS)).servers) == len(Topology.SERVER_PORTS)
@@ -0,0 +1,42 @@
+import threading
+import time
+
+from org.combatwombat.dst.config import Watcher
+from org.combatwombat.dst.config.Cluster import Cluster
+
+
+def poll_threads():
+    return sum(thread.name == "config-watcher" for thread in threading.enumerate())
+
+
+def test_restart_leaves_one_poller(tmp_path, monkeypatch):
+    monkeypatch.setattr(Watcher, "Observer", None)
+    watcher = Watcher.ConfigWatcher(str(tmp_path), poll_interval=0.05)
+    watcher.start()
+    watcher.stop()
+    watcher.start()
+    time.sleep(0.2)
+    assert poll_threads() == 1
+    watcher.stop()
+    time.sleep(0.2)
+    assert poll_threads() == 0
+
+
+def test_changes_are_published(tmp_path, monkeypatch):
+    monkeypatch.setattr(Watcher, "Observer", None)
+    (tmp_path / "A").mkdir()
+    file = str(tmp_path / "A" / "cluster.ini")
+    Cluster().write_ini(file)
+    watcher = Watcher.ConfigWatcher(str(tmp_path), poll_interval=0.05)
+    events = watcher.subscribe()
+    watcher.start()
+    try:
+        cluster = Cluster.read_ini(file)
+        cluster.gameplay.max_players = 8
+        cluster.write_ini(file)
+        event = events.get(timeout=2)
+    finally:
+        watcher.stop()
+    assert event["path"] == file
+    assert event["kind"] == "cluster"
+    assert event["changes"]